@@ -2,6 +2,20 @@
 
 import logging
 from .fmc import FMC
+from .asyncfmc import AsyncFMC
+from .fmcfleet import FMCFleet
+from .ratelimiter import RateLimiter
+from .scheduler import RequestScheduler, request_priority
+from .retrypolicy import RetryPolicy
+from .circuitbreaker import CircuitBreaker, CircuitOpenError
+from .metrics import Metrics
+from .tokencache import TokenCache
+from .tracing import Tracer
+from .cassette import CassetteError
+from .emulator import FMCEmulator
+from .requestlog import RequestLogger
+from .responsecache import ResponseCache
+from .nameresolver import NameResolver
 from .api_objects import *
 
 logging.debug("In the fmcapi __init__.py file.")
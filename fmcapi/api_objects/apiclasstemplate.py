@@ -1,5 +1,7 @@
 """Super class(es) that is inherited by all API objects."""
 from .helper_functions import syntax_correcter
+from ..tracing import traced, trace_methods
+from ..nameresolver import NameResolver
 import logging
 import json
 
@@ -22,6 +24,11 @@ class APIClassTemplate(object):
     GLOBAL_VALID_FOR_KWARGS = ["dry_run"]
     VALID_FOR_KWARGS = VALID_JSON_DATA + []
 
+    def __init_subclass__(cls, **kwargs):
+        """Time the public methods of every API object in spans when the FMC has a tracer."""
+        super().__init_subclass__(**kwargs)
+        trace_methods(cls)
+
     @property
     def show_json(self):
         """
@@ -106,6 +113,12 @@ class APIClassTemplate(object):
                 return False
         return True
 
+    def _list_all(self):
+        """Every item of this object's collection, for the FMC's name_resolver."""
+        url = f"{self.URL}?expanded=true&limit={self.limit}"
+        return self.fmc.send_to_api(method="get", url=url).get("items", [])
+
+    @traced
     def get(self, **kwargs):
         """
         Prepare to send GET call to FMC API.
@@ -150,6 +163,17 @@ class APIClassTemplate(object):
                         f'GET success. Object with id: "{self.id}" fetched from FMC.'
                     )
             elif "name" in self.__dict__:
+                resolver = getattr(self.fmc, "name_resolver", None)
+                if isinstance(resolver, NameResolver) and "offset" not in self.__dict__:
+                    item = resolver.lookup(self.URL, self.name, self._list_all)
+                    if item is not None:
+                        self.id = item["id"]
+                        self.parse_kwargs(**item)
+                        logging.info(
+                            f'GET success. Object with name: "{self.name}" and id: "{self.id}" '
+                            f"resolved from the FMC's name cache."
+                        )
+                        return item
                 if self.FILTER_BY_NAME:
                     url = f"{self.URL}?name={self.name}&expanded=true"
                 else:
@@ -203,6 +227,35 @@ class APIClassTemplate(object):
             )
             return {}
 
+    def iter_all(self):
+        """
+        Yield every object of this type from the FMC, fetching one page at a time.
+
+        Unlike get() the full listing is never held in memory, so this suits very large exports.
+
+        :return: (generator) Each item of the listing
+        """
+        logging.debug("In iter_all() for APIClassTemplate class.")
+        if self.fmc.serverVersion < self.FIRST_SUPPORTED_FMC_VERSION:
+            logging.error(
+                f"Your FMC version, {self.fmc.serverVersion} does not support GET of this feature."
+            )
+            return
+        if not self.valid_for_get():
+            logging.warning(
+                "iter_all() method failed due to failure to pass valid_for_get() test."
+            )
+            return
+        url = f"{self.URL}?expanded=true&limit={self.limit}"
+        if self.dry_run:
+            logging.info(
+                "Dry Run enabled.  Not actually sending to FMC.  Here is what would have been sent:"
+            )
+            logging.info("\tMethod = GET")
+            logging.info(f"\tURL = {url}")
+            return
+        yield from self.fmc.iter_items(url=url)
+
     def valid_for_post(self):
         """
         Use REQUIRED_FOR_POST to ensure all necessary variables exist prior to submitting to API.
@@ -216,6 +269,7 @@ class APIClassTemplate(object):
                 return False
         return True
 
+    @traced
     def post(self, **kwargs):
         """
         Prepare to send POST call to FMC API.
@@ -279,6 +333,7 @@ class APIClassTemplate(object):
                 return False
         return True
 
+    @traced
     def put(self, **kwargs):
         """
         Prepare to send PUT call to FMC API.
@@ -334,6 +389,7 @@ class APIClassTemplate(object):
                 return False
         return True
 
+    @traced
     def delete(self, **kwargs):
         """
         Prepare to send DELETE call to FMC API.
@@ -375,3 +431,39 @@ class APIClassTemplate(object):
                 "delete() method failed due to failure to pass valid_for_delete() test."
             )
             return False
+
+    async def aget(self, **kwargs):
+        """
+        Awaitable version of get().  Requires self.fmc to be an AsyncFMC.
+
+        :return: (dict) requests response
+        """
+        logging.debug("In aget() for APIClassTemplate class.")
+        return await self.fmc.run_in_executor(self.get, **kwargs)
+
+    async def apost(self, **kwargs):
+        """
+        Awaitable version of post().  Requires self.fmc to be an AsyncFMC.
+
+        :return: requests response
+        """
+        logging.debug("In apost() for APIClassTemplate class.")
+        return await self.fmc.run_in_executor(self.post, **kwargs)
+
+    async def aput(self, **kwargs):
+        """
+        Awaitable version of put().  Requires self.fmc to be an AsyncFMC.
+
+        :return: requests response
+        """
+        logging.debug("In aput() for APIClassTemplate class.")
+        return await self.fmc.run_in_executor(self.put, **kwargs)
+
+    async def adelete(self, **kwargs):
+        """
+        Awaitable version of delete().  Requires self.fmc to be an AsyncFMC.
+
+        :return: requests response
+        """
+        logging.debug("In adelete() for APIClassTemplate class.")
+        return await self.fmc.run_in_executor(self.delete, **kwargs)
@@ -4,6 +4,7 @@ import re
 import ipaddress
 import json
 import logging
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
 logging.debug(f"In the {__name__} module.")
 
@@ -149,6 +150,76 @@ def mocked_requests_get(**kwargs):
     return MockResponse(**kwargs)
 
 
+def set_url_query(url, **kwargs):
+    """
+    Add or replace query parameters in a URL.
+
+    :param url: (str) URL to modify.
+    :param kwargs: Query parameters to set.
+    :return: (str) Modified URL.
+    """
+    logging.debug("In set_url_query() helper_function.")
+    scheme, netloc, path, query, fragment = urlsplit(url)
+    params = dict(parse_qsl(query, keep_blank_values=True))
+    params.update({key: str(value) for key, value in kwargs.items()})
+    return urlunsplit((scheme, netloc, path, urlencode(params, safe=","), fragment))
+
+
+UUID_PATTERN = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE
+)
+
+
+def endpoint_template(url):
+    """
+    Reduce a URL to its endpoint: no host or query, and every UUID replaced with {id}.
+
+    e.g. https://fmc/api/fmc_config/v1/domain/e276abec-.../object/hosts/00505686-...?expanded=true becomes
+    /api/fmc_config/v1/domain/{id}/object/hosts/{id}
+
+    :param url: (str) URL of an API call.
+    :return: (str) Endpoint template.
+    """
+    return UUID_PATTERN.sub("{id}", urlsplit(url).path)
+
+
+def chunk_payload(items, max_bytes, max_items=None):
+    """
+    Split a list of items into the fewest JSON array payloads that each stay within a size and item count limit.
+
+    Every item is serialized once, the way requests serializes a json= payload, so the sizes are what goes on the
+    wire.  An item that is too large on its own is sent in a chunk by itself with a warning.
+
+    :param items: (list) JSON serializable items.
+    :param max_bytes: (int) Most bytes of encoded JSON per chunk.
+    :param max_items: (int) Most items per chunk.  None means no limit.
+    :return: (generator) Lists of items.
+    """
+    logging.debug("In chunk_payload() helper_function.")
+    chunk = []
+    # Size of the chunk serialized as a JSON array: "[" + items joined with ", " + "]".
+    chunk_bytes = 2
+    for item in items:
+        item_bytes = len(json.dumps(item, allow_nan=False).encode("utf-8"))
+        separator_bytes = 2 if chunk else 0
+        if chunk and (
+            chunk_bytes + separator_bytes + item_bytes > max_bytes
+            or (max_items and len(chunk) >= max_items)
+        ):
+            yield chunk
+            chunk = []
+            chunk_bytes = 2
+            separator_bytes = 0
+        if item_bytes + 2 > max_bytes:
+            logging.warning(
+                f"An item of {item_bytes} bytes is larger than the {max_bytes} byte payload limit by itself."
+            )
+        chunk.append(item)
+        chunk_bytes += separator_bytes + item_bytes
+    if chunk:
+        yield chunk
+
+
 def validate_vlans(start_vlan, end_vlan=""):
     """
     Validate that the start_vlan and end_vlan numbers are in 1 - 4094 range.  If not, then return 1, 4094.
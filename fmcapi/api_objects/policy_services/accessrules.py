@@ -16,13 +16,14 @@ from fmcapi.api_objects.object_services.isesecuritygrouptags import ISESecurityG
 from fmcapi.api_objects.helper_functions import (
     get_networkaddress_type,
     true_false_checker,
+    set_url_query,
+    chunk_payload,
 )
 from fmcapi.api_objects.object_services.applications import Applications
 from fmcapi.api_objects.object_services.applicationfilters import ApplicationFilters
 from fmcapi.api_objects.object_services.urlgroups import URLGroups
 from fmcapi.api_objects.object_services.urls import URLs
 import logging
-import sys
 
 
 class AccessRules(APIClassTemplate):
@@ -1448,26 +1449,31 @@ class Bulk(object):
         """
         Send list of self.items to FMC as a bulk import.
 
-        :return: (str) requests response from FMC
+        The items are split into the fewest requests that stay within MAX_SIZE_QTY items and the FMC's payload size
+        limit.  With insertBefore or insertAfter, the position is moved along by each chunk posted so the rules keep
+        their order.
+
+        :return: (dict) requests response from FMC.  When more than one request was needed, {"items": [...]} with the
+        items of every response.
         """
-        # Build URL
-        self.URL = f"{self.URL}{self.URL_SUFFIX}&bulk=true"
-
-        # Break up the items into MAX_BULK_POST_SIZE chunks.
-        chunks = [
-            self.items[i * self.MAX_SIZE_QTY : (i + 1) * self.MAX_SIZE_QTY]
-            for i in range(
-                (len(self.items) + self.MAX_SIZE_QTY - 1) // self.MAX_SIZE_QTY
+        url = set_url_query(f"{self.URL}{self.URL_SUFFIX}", bulk="true")
+        max_bytes = min(self.MAX_SIZE_IN_BYTES, self.fmc.FMC_MAX_PAYLOAD)
+        responses = []
+        posted = 0
+        for chunk in chunk_payload(self.items, max_bytes, self.MAX_SIZE_QTY):
+            # Each chunk goes after the rules of the chunks already posted, keeping them in order.
+            if "insertBefore" in self.__dict__:
+                url = set_url_query(url, insertBefore=int(self.insertBefore) + posted)
+            if "insertAfter" in self.__dict__:
+                url = set_url_query(url, insertAfter=int(self.insertAfter) + posted)
+            logging.info(f"Posting {len(chunk)} bulk items.")
+            responses.append(
+                self.fmc.send_to_api(method="post", url=url, json_data=chunk)
             )
-        ]
-
-        # Post the chunks
-        for item in chunks:
-            # I'm not sure what to do about the max bytes right now so I'll just throw a warning message.
-            if sys.getsizeof(item, 0) > self.MAX_SIZE_IN_BYTES:
-                logging.warning(
-                    f"This chunk of the post is too large.  Please submit less items to be bulk posted."
-                )
-            response = self.fmc.send_to_api(method="post", url=self.URL, json_data=item)
-            logging.info(f"Posting to bulk items.")
-            return response
+            posted += len(chunk)
+        if len(responses) == 1:
+            return responses[0]
+        items = []
+        for response in responses:
+            items.extend(response.get("items", []))
+        return {"items": items}
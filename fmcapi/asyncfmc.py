@@ -0,0 +1,138 @@
+"""
+Use the FMC API from asyncio code.
+
+The AsyncFMC class hands every blocking HTTP request to a bounded pool of worker threads so that an event loop can
+keep thousands of FMC API calls outstanding at once.  The token handling, paging and 429/401 logic are the very same
+code used by the FMC class.
+"""
+
+import asyncio
+import functools
+import logging
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor
+from .fmc import FMC
+
+
+class AsyncFMC(FMC):
+    """Asyncio flavour of the FMC class."""
+
+    logging.debug("In the AsyncFMC() class.")
+
+    MAX_WORKERS = 32
+
+    def __init__(self, max_workers=None, **kwargs):
+        """
+        Instantiate some variables prior to calling the __aenter__() method.
+
+        :param max_workers (int): Maximum number of API calls on the wire at once. (Default is MAX_WORKERS)
+        :param **kwargs: Passed to the FMC class.  (host, username, password, etc.)  pool_maxsize defaults to
+        max_workers so that every worker keeps its own connection open.
+        :return: None
+        """
+        kwargs.setdefault("pool_maxsize", max_workers or self.MAX_WORKERS)
+        super().__init__(**kwargs)
+        logging.debug("In the AsyncFMC __init__() class method.")
+        self.max_workers = max_workers or self.MAX_WORKERS
+        self.executor = None
+
+    async def __aenter__(self):
+        """
+        Start the worker pool then get a token from the FMC, just like FMC.__enter__().
+
+        :return: self
+        """
+        logging.debug("In the AsyncFMC __aenter__() class method.")
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="fmcapi"
+        )
+        try:
+            await self.run_in_executor(self.__enter__)
+        except Exception:
+            self.executor.shutdown(wait=False)
+            raise
+        return self
+
+    async def __aexit__(self, *args):
+        """
+        Run FMC.__exit__() (autodeploy) and then stop the worker pool.
+
+        :param args:
+        :return: None
+        """
+        logging.debug("In the AsyncFMC __aexit__() class method.")
+        try:
+            await self.run_in_executor(self.__exit__, *args)
+        finally:
+            self.executor.shutdown(wait=True)
+
+    async def run_in_executor(self, func, *args, **kwargs):
+        """
+        Run a blocking callable in the worker pool and await its result.
+
+        :param func: Callable to run.
+        :param args: Positional arguments for func.
+        :param kwargs: Keyword arguments for func.
+        :return: Whatever func returns.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            functools.partial(copy_context().run, func, *args, **kwargs),
+        )
+
+    async def asend_to_api(self, method="", url="", headers="", json_data=None):
+        """
+        Awaitable version of send_to_api().
+
+        The call runs in the worker pool as a whole, so GETs go through the response cache and identical GETs in
+        flight at once are sent once, exactly as with send_to_api().  Use aiter_pages() to get the pages of a large
+        listing one worker job at a time.
+
+        :param method (str): GET, POST, PUT, or DELETE
+        :param url (str): URL for API call.
+        :param headers (str):  String of header variables.
+        :param json_data (str):  JSON formatted string as payload. (Default is None)
+        :return: (dict) JSON response from FMC
+        """
+        logging.debug("In the AsyncFMC asend_to_api() class method.")
+        return await self.run_in_executor(
+            self.send_to_api,
+            method=method,
+            url=url,
+            headers=headers,
+            json_data=json_data,
+        )
+
+    async def aiter_pages(self, method="get", url="", headers="", json_data=None):
+        """
+        Async generator version of iter_pages().
+
+        :param method (str): GET, POST, PUT, or DELETE
+        :param url (str): URL for API call.
+        :param headers (str):  String of header variables.
+        :param json_data (str):  JSON formatted string as payload. (Default is None)
+        :return: (async generator) JSON response of each page
+        """
+        logging.debug("In the AsyncFMC aiter_pages() class method.")
+        pages = self.iter_pages(
+            method=method, url=url, headers=headers, json_data=json_data
+        )
+        while True:
+            page = await self.run_in_executor(next, pages, None)
+            if page is None:
+                return
+            yield page
+
+    async def aiter_items(self, url="", headers=""):
+        """
+        Async generator version of iter_items().
+
+        :param url (str): URL for API call.
+        :param headers (str):  String of header variables.
+        :return: (async generator) Each item of the listing
+        """
+        logging.debug("In the AsyncFMC aiter_items() class method.")
+        async for page in self.aiter_pages(method="get", url=url, headers=headers):
+            for item in page.get("items", []):
+                yield item
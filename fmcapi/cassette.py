@@ -0,0 +1,216 @@
+"""
+Record FMC API traffic to a file and play it back later without an FMC.
+
+In record mode every request and response that goes through the FMC object's requests session is appended to a
+cassette: a gzip compressed file holding one JSON document per line.  In replay mode the same FMC code is answered
+from the cassette, optionally with the latency that was recorded, so a real workload can be re-run offline to measure
+fmcapi's own performance.
+"""
+
+import gzip
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+from .jsondecoder import read_body
+
+# Tokens are not written to the cassette.  Replayed logins get this value instead.
+REDACTED = "REDACTED"
+# Header names are compared in lower case, as servers and HTTP/2 send them in any case.
+SECRET_HEADERS = ("x-auth-access-token", "x-auth-refresh-token")
+# The cassette stores decoded bodies, so these no longer describe them.
+DROPPED_HEADERS = ("content-encoding", "transfer-encoding", "content-length")
+
+
+class CassetteError(Exception):
+    """No recorded response matches a request being replayed."""
+
+    pass
+
+
+def request_key(method, url, json_data=None, match_body=True):
+    """
+    Build the key requests are matched on during replay.
+
+    :param method (str): HTTP method.
+    :param url (str): URL of the request.
+    :param json_data (dict): JSON payload of the request.
+    :param match_body (bool): Include the payload in the key.
+    :return: (tuple) key
+    """
+    body = json.dumps(json_data, sort_keys=True) if match_body else None
+    return method.upper(), url, body
+
+
+class RecordingSession(object):
+    """Wraps a requests session and writes every exchange to a cassette."""
+
+    logging.debug("In the RecordingSession() class.")
+
+    def __init__(self, session, path):
+        """
+        Start a new cassette.
+
+        :param session: requests session (or anything with get/post/put/delete) that really sends the requests.
+        :param path (str): Cassette file.  It is overwritten.
+        :return: None
+        """
+        logging.debug("In the RecordingSession __init__() class method.")
+        self.session = session
+        self.path = path
+        self.lock = threading.Lock()
+        self.recorded = 0
+        self.cassette_file = gzip.open(path, "wt", encoding="utf-8")
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send the request with the wrapped session and record the exchange.
+
+        :param method (str): HTTP method.
+        :param url (str): URL of the request.
+        :param kwargs: Passed on to the wrapped session.
+        :return: requests Response
+        """
+        start = time.perf_counter()
+        response = getattr(self.session, method.lower())(url, **kwargs)
+        # Read (and decompress) the body the way FMC does and keep its wire size, which read_body() then reports.
+        response.wire_bytes = read_body(response)
+        elapsed = time.perf_counter() - start
+        headers = {
+            name: REDACTED if name.lower() in SECRET_HEADERS else value
+            for name, value in CaseInsensitiveDict(response.headers).items()
+            if name.lower() not in DROPPED_HEADERS
+        }
+        entry = {
+            "method": method.upper(),
+            "url": url,
+            "json": kwargs.get("json"),
+            "status": response.status_code,
+            "headers": headers,
+            "body": response.content.decode("utf-8", "replace"),
+            "elapsed": round(elapsed, 6),
+        }
+        line = json.dumps(entry, separators=(",", ":"))
+        with self.lock:
+            if self.cassette_file is None:
+                self.cassette_file = gzip.open(self.path, "at", encoding="utf-8")
+            self.cassette_file.write(line + "\n")
+            self.recorded += 1
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("get", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("post", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("put", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("delete", url, **kwargs)
+
+    def close(self):
+        """
+        Finish writing the cassette.  Recording resumes, appending to it, if more requests are sent.
+
+        :return: None
+        """
+        logging.debug("In the RecordingSession close() class method.")
+        with self.lock:
+            if self.cassette_file is not None:
+                self.cassette_file.close()
+                self.cassette_file = None
+        logging.info(f"Recorded {self.recorded} requests to {self.path}.")
+
+
+class ReplaySession(object):
+    """Stands in for a requests session and answers from a cassette."""
+
+    logging.debug("In the ReplaySession() class.")
+
+    def __init__(self, path, latency=0.0, match_body=True):
+        """
+        Load a cassette.
+
+        Requests are matched on method, URL and (optionally) JSON payload.  Matching responses are served in the order
+        they were recorded.  Once they are used up the last one is served again.
+
+        :param path (str): Cassette file.
+        :param latency (float): Multiplier for the recorded response times.  1 sleeps as long as the FMC took.
+        (Default is 0, answer immediately)
+        :param match_body (bool): Tell apart requests that differ only by payload.  (Default is True)
+        :return: None
+        """
+        logging.debug("In the ReplaySession __init__() class method.")
+        self.path = path
+        self.latency = latency
+        self.match_body = match_body
+        self.lock = threading.Lock()
+        self.replayed = 0
+        self.entries = defaultdict(deque)
+        self.last_entry = {}
+        with gzip.open(path, "rt", encoding="utf-8") as cassette_file:
+            for line in cassette_file:
+                entry = json.loads(line)
+                key = request_key(
+                    entry["method"], entry["url"], entry["json"], self.match_body
+                )
+                self.entries[key].append(entry)
+        logging.info(
+            f"Loaded {sum(len(entries) for entries in self.entries.values())} recorded requests from {path}."
+        )
+
+    def request(self, method, url, **kwargs):
+        """
+        Answer a request from the cassette.
+
+        :param method (str): HTTP method.
+        :param url (str): URL of the request.
+        :param kwargs: json payload.  Everything else is ignored.
+        :return: requests Response
+        """
+        key = request_key(method, url, kwargs.get("json"), self.match_body)
+        with self.lock:
+            if self.entries[key]:
+                entry = self.last_entry[key] = self.entries[key].popleft()
+            elif key in self.last_entry:
+                entry = self.last_entry[key]
+            else:
+                raise CassetteError(
+                    f"No recorded response for {method.upper()} {url} in {self.path}."
+                )
+            self.replayed += 1
+        if self.latency:
+            time.sleep(entry["elapsed"] * self.latency)
+        response = Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = entry["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = url
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("get", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("post", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("put", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("delete", url, **kwargs)
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def close(self):
+        logging.info(f"Replayed {self.replayed} requests from {self.path}.")
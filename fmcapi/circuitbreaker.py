@@ -0,0 +1,209 @@
+"""
+Stop sending requests to an FMC endpoint that keeps failing.
+
+When part of the FMC misbehaves (the deployment service restarting, a policy lock being held) every worker would keep
+sending it requests, each waiting out its timeouts and retries and using up the shared rate budget.  The
+CircuitBreaker class tracks failures per endpoint template.  After enough consecutive failures the endpoint's circuit
+opens and requests to it fail fast with CircuitOpenError (or wait) until a cool-down has passed.  A few probe requests
+are then let through and the circuit closes again once one of them succeeds.
+"""
+
+import logging
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """A request was refused because its endpoint's circuit is open."""
+
+    def __init__(self, endpoint, retry_in):
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+        super().__init__(
+            f"Circuit for {endpoint} is open after repeated failures.  Try again in {retry_in:.1f} seconds."
+        )
+
+
+class CircuitBreaker(object):
+    """
+    Closed/open/half-open circuit per endpoint template, shared by every thread using an FMC object.
+
+    closed: requests go through.  failure_threshold failures in a row open the circuit.
+    open: requests are refused until cooldown seconds have passed, then the circuit goes half-open.
+    half-open: up to half_open_probes requests go through.  A success closes the circuit, a failure opens it again.
+    """
+
+    logging.debug("In the CircuitBreaker() class.")
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+    FAILURE_STATUSES = (500, 502, 503, 504)
+
+    def __init__(
+        self,
+        failure_threshold=5,
+        cooldown=30,
+        half_open_probes=1,
+        wait=False,
+        failure_statuses=FAILURE_STATUSES,
+    ):
+        """
+        Initialize the circuit breaker.
+
+        :param failure_threshold (int): Failures in a row that open a circuit.  (Default is 5)
+        :param cooldown (float): Seconds a circuit stays open before probes are let through.  (Default is 30)
+        :param half_open_probes (int): Requests let through at once while a circuit is half-open.  (Default is 1)
+        :param wait (bool): Wait for an open circuit to let requests through instead of raising CircuitOpenError.
+        (Default is False)
+        :param failure_statuses (tuple): HTTP status codes counted as failures.  Connection errors and timeouts always
+        are.  (Default is FAILURE_STATUSES)
+        :return: None
+        """
+        logging.debug("In the CircuitBreaker __init__() class method.")
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.half_open_probes = half_open_probes
+        self.wait = wait
+        self.failure_statuses = tuple(failure_statuses)
+        self.circuits = {}
+        self.counters = {"opened": 0, "rejected": 0}
+        self.condition = threading.Condition()
+
+    def _circuit(self, endpoint):
+        if endpoint not in self.circuits:
+            self.circuits[endpoint] = {
+                "state": self.CLOSED,
+                "failures": 0,
+                "opened_at": 0.0,
+                "probes": 0,
+            }
+        return self.circuits[endpoint]
+
+    def _admit(self, circuit, now):
+        # Return None when the request may go, else the seconds until it might.
+        if circuit["state"] == self.OPEN:
+            remaining = circuit["opened_at"] + self.cooldown - now
+            if remaining > 0:
+                return remaining
+            circuit["state"] = self.HALF_OPEN
+            circuit["probes"] = 0
+        if circuit["state"] == self.HALF_OPEN:
+            if circuit["probes"] >= self.half_open_probes:
+                return self.cooldown
+            circuit["probes"] += 1
+        return None
+
+    def acquire(self, endpoint):
+        """
+        Check that a request to an endpoint may be sent.  Every call must be followed by on_success(), on_failure()
+        or release().
+
+        :param endpoint (str): Endpoint template from helper_functions.endpoint_template().
+        :return: (float) Seconds spent waiting.
+        """
+        start = time.monotonic()
+        with self.condition:
+            circuit = self._circuit(endpoint)
+            while True:
+                now = time.monotonic()
+                retry_in = self._admit(circuit, now)
+                if retry_in is None:
+                    return now - start
+                if not self.wait:
+                    self.counters["rejected"] += 1
+                    raise CircuitOpenError(endpoint, retry_in)
+                self.condition.wait(retry_in)
+
+    def is_failure(self, status_code):
+        """
+        Check whether a response status counts against its endpoint.
+
+        :param status_code (int): HTTP status code.
+        :return: (bool)
+        """
+        return status_code in self.failure_statuses
+
+    def on_success(self, endpoint):
+        """
+        Record a request that got an answer from its endpoint.  Closes the circuit.
+
+        :param endpoint (str): Endpoint template.
+        :return: None
+        """
+        with self.condition:
+            circuit = self._circuit(endpoint)
+            if circuit["state"] != self.CLOSED:
+                logging.info(f"Circuit for {endpoint} is closed again.")
+                self.condition.notify_all()
+            circuit["state"] = self.CLOSED
+            circuit["failures"] = 0
+            circuit["probes"] = 0
+
+    def on_failure(self, endpoint):
+        """
+        Record a failed request.  Opens the circuit when the threshold is reached or a probe fails.
+
+        :param endpoint (str): Endpoint template.
+        :return: None
+        """
+        with self.condition:
+            circuit = self._circuit(endpoint)
+            circuit["failures"] += 1
+            if circuit["state"] == self.HALF_OPEN or (
+                circuit["state"] == self.CLOSED
+                and circuit["failures"] >= self.failure_threshold
+            ):
+                logging.warning(
+                    f"Opening circuit for {endpoint} after {circuit['failures']} failures in a row.  Requests to "
+                    f"it are held back for {self.cooldown} seconds."
+                )
+                circuit["state"] = self.OPEN
+                circuit["opened_at"] = time.monotonic()
+                self.counters["opened"] += 1
+            circuit["probes"] = 0
+
+    def release(self, endpoint):
+        """
+        Record a request whose outcome says nothing about its endpoint (e.g. a 429 or 401).
+
+        :param endpoint (str): Endpoint template.
+        :return: None
+        """
+        with self.condition:
+            circuit = self._circuit(endpoint)
+            if circuit["state"] == self.HALF_OPEN and circuit["probes"] > 0:
+                circuit["probes"] -= 1
+                self.condition.notify_all()
+
+    def state(self, endpoint):
+        """
+        Current state of an endpoint's circuit.
+
+        :param endpoint (str): Endpoint template.
+        :return: (str) CLOSED, OPEN or HALF_OPEN
+        """
+        with self.condition:
+            circuit = self._circuit(endpoint)
+            if (
+                circuit["state"] == self.OPEN
+                and time.monotonic() >= circuit["opened_at"] + self.cooldown
+            ):
+                return self.HALF_OPEN
+            return circuit["state"]
+
+    def stats(self):
+        """
+        Snapshot of the circuit breaker.
+
+        :return: (dict) Times circuits opened, requests rejected and the state of every circuit that is not closed.
+        """
+        with self.condition:
+            stats = dict(self.counters)
+            endpoints = [
+                endpoint
+                for endpoint, circuit in self.circuits.items()
+                if circuit["state"] != self.CLOSED
+            ]
+        stats["circuits"] = {endpoint: self.state(endpoint) for endpoint in endpoints}
+        return stats
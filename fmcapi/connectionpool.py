@@ -0,0 +1,146 @@
+"""
+HTTP connection pooling for the FMC class.
+
+The PoolStatsAdapter class is a requests HTTPAdapter that keeps a few counters about its connection pool so that
+pool sizing can be checked against the concurrency actually used.
+"""
+
+import logging
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.poolmanager import PoolManager
+
+
+class StatsPoolManager(PoolManager):
+    """PoolManager that tells its PoolStatsAdapter whenever one of its pools opens a new connection."""
+
+    def __init__(self, adapter, **kwargs):
+        super().__init__(**kwargs)
+        self.adapter = adapter
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context=request_context)
+        new_conn = pool._new_conn
+
+        def counting_new_conn():
+            self.adapter.count("connections_created")
+            return new_conn()
+
+        pool._new_conn = counting_new_conn
+        return pool
+
+
+class PoolStatsAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that counts requests, new connections and pool saturation.
+
+    A request is counted as "saturated" when it starts while pool_maxsize requests are already on the wire.  With
+    pool_block=True it waits for a free connection.  Otherwise it opens a connection that is thrown away afterwards.
+    """
+
+    logging.debug("In the PoolStatsAdapter() class.")
+
+    def __init__(
+        self, pool_connections=10, pool_maxsize=10, pool_block=False, **kwargs
+    ):
+        """
+        Initialize the adapter and its counters.
+
+        :param pool_connections (int): Number of hosts to keep a connection pool for.  (Default is 10)
+        :param pool_maxsize (int): Connections kept open per host.  (Default is 10)
+        :param pool_block (bool): Wait for a free connection instead of opening an extra one.  (Default is False)
+        :return: None
+        """
+        logging.debug("In the PoolStatsAdapter __init__() class method.")
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.counters = {
+            "requests": 0,
+            "connections_created": 0,
+            "saturated": 0,
+            "peak_in_flight": 0,
+        }
+        super().__init__(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            **kwargs,
+        )
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        """Set up a StatsPoolManager instead of the default PoolManager."""
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = StatsPoolManager(
+            self, num_pools=connections, maxsize=maxsize, block=block, **pool_kwargs
+        )
+
+    def count(self, counter):
+        """
+        Add one to a counter.
+
+        :param counter (str): Name of the counter.
+        :return: None
+        """
+        with self.lock:
+            self.counters[counter] += 1
+
+    def send(self, request, **kwargs):
+        """
+        Send the request while keeping track of how many are on the wire.
+
+        A request stays on the wire until its connection goes back to the pool, i.e. until its body has been read or
+        the response is closed, since that is how long it holds the connection.
+        """
+        with self.lock:
+            self.counters["requests"] += 1
+            if self.in_flight >= self._pool_maxsize:
+                self.counters["saturated"] += 1
+            self.in_flight += 1
+            self.counters["peak_in_flight"] = max(
+                self.counters["peak_in_flight"], self.in_flight
+            )
+        try:
+            response = super().send(request, **kwargs)
+        except BaseException:
+            self.done()
+            raise
+        release_conn = response.raw.release_conn
+        released = []
+
+        def counting_release_conn():
+            with self.lock:
+                first = not released
+                released.append(True)
+            if first:
+                self.done()
+            release_conn()
+
+        response.raw.release_conn = counting_release_conn
+        return response
+
+    def done(self):
+        """
+        Take a request off the wire.
+
+        :return: None
+        """
+        with self.lock:
+            self.in_flight -= 1
+
+    def stats(self):
+        """
+        Snapshot of the pool counters.
+
+        :return: (dict) Counters plus current in_flight and connections_reused.
+        """
+        with self.lock:
+            stats = dict(self.counters)
+            stats["in_flight"] = self.in_flight
+        stats["connections_reused"] = max(
+            stats["requests"] - stats["connections_created"], 0
+        )
+        stats["pool_maxsize"] = self._pool_maxsize
+        stats["pool_block"] = self._pool_block
+        return stats
@@ -0,0 +1,489 @@
+"""
+A local stand-in for the FMC REST API.
+
+The FMCEmulator class runs a small threaded HTTP server that behaves enough like an FMC to drive fmcapi: token
+generation and refresh (with lifetimes and a refresh limit), the DOMAINS header, server version, CRUD of any
+collection under /api/fmc_config/v1/domain/{uuid}/ (object/*, policy/accesspolicies/{id}/accessrules with bulk=true,
+deployment/*, ...), offset/limit paging with paging.next, and optional 429 throttling and added latency.  It is meant
+for load and regression testing fmcapi's concurrency, paging and rate limiting without a lab FMC, not for checking
+payloads: any JSON object is accepted.
+
+e.g.
+    with fmcapi.FMCEmulator(rate_limit=120) as emulator:
+        with fmcapi.FMC(host=emulator.url, username="admin", password="Admin123", autodeploy=False) as fmc:
+            fmcapi.Hosts(fmc=fmc, name="host1", value="10.0.0.1").post()
+"""
+
+import base64
+import gzip
+import json
+import logging
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from random import uniform
+from urllib.parse import urlsplit, parse_qs
+
+PLATFORM_PATH = "/api/fmc_platform/v1"
+CONFIG_PATH = "/api/fmc_config/v1/domain/"
+# Collections the FMC answers with 202 Accepted instead of 201 Created.
+ACCEPTED_COLLECTIONS = ("deployment/deploymentrequests",)
+# Read only collections that list the objects of several others, as the FMC does.
+AGGREGATE_COLLECTIONS = {
+    "object/networkaddresses": ("object/hosts", "object/networks", "object/ranges"),
+    "object/ports": (
+        "object/protocolportobjects",
+        "object/icmpv4objects",
+        "object/icmpv6objects",
+    ),
+}
+
+
+def fmc_error(description):
+    """
+    Build an error body the way the FMC does.
+
+    :param description (str): What went wrong.
+    :return: (dict) Error body.
+    """
+    return {
+        "error": {
+            "category": "FRAMEWORK",
+            "messages": [{"description": description}],
+            "severity": "ERROR",
+        }
+    }
+
+
+class FMCEmulator(object):
+    """In-process HTTP server that imitates an FMC."""
+
+    logging.debug("In the FMCEmulator() class.")
+
+    DEFAULT_LIMIT = 25
+    MAX_LIMIT = 1000
+    MAX_BULK_ITEMS = 1000
+    MAX_PAYLOAD = 2048000
+    MIN_COMPRESS_SIZE = 1024
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        username="admin",
+        password="Admin123",
+        domains=None,
+        server_version="7.0.0",
+        token_lifetime=1800,
+        max_refreshes=3,
+        rate_limit=None,
+        latency=0.0,
+        bandwidth=None,
+        compression=True,
+    ):
+        """
+        Set up the emulator.  Call start(), or use it in a with statement, to serve requests.
+
+        :param host (str): Address to listen on.  (Default is 127.0.0.1)
+        :param port (int): Port to listen on.  (Default is 0, any free port)
+        :param username (str): User accepted by generatetoken.  (Default is admin)
+        :param password (str): That user's password.  (Default is Admin123)
+        :param domains (list): Names of child domains to create under Global.  (Default is None, only Global)
+        :param server_version (str): Version reported by /info/serverversion.  (Default is 7.0.0)
+        :param token_lifetime (int): Seconds an access token is valid for.  (Default is 1800)
+        :param max_refreshes (int): Times a token pair can be refreshed.  (Default is 3)
+        :param rate_limit (int): Requests per minute before answering 429.  (Default is None, never throttle)
+        :param latency (float): Seconds added to each response, or a (min, max) tuple for a random delay.  (Default
+        is 0)
+        :param bandwidth (int): Bytes per second to send response bodies at, to imitate a slow link.  (Default is None,
+        no limit)
+        :param compression (bool): gzip or deflate responses when the client accepts it.  (Default is True)
+        :return: None
+        """
+        logging.debug("In the FMCEmulator __init__() class method.")
+        self.username = username
+        self.password = password
+        self.server_version = server_version
+        self.token_lifetime = token_lifetime
+        self.max_refreshes = max_refreshes
+        self.rate_limit = rate_limit
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.compression = compression
+        self.lock = threading.Lock()
+        self.domains = [{"name": "Global", "uuid": str(uuid.uuid4()), "type": "LEAF"}]
+        for name in domains or []:
+            self.domains.append(
+                {"name": f"Global/{name}", "uuid": str(uuid.uuid4()), "type": "LEAF"}
+            )
+        self.collections = {}
+        self.tokens = {}
+        self.recent_requests = deque()
+        self.counters = {
+            "requests": 0,
+            "throttled": 0,
+            "unauthorized": 0,
+            "bytes_sent": 0,
+        }
+        self.server = ThreadingHTTPServer((host, port), FMCEmulatorHandler)
+        self.server.daemon_threads = True
+        self.server.emulator = self
+        self.thread = None
+
+    @property
+    def url(self):
+        """(str) Pass this as the FMC host, e.g. http://127.0.0.1:40123."""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def global_uuid(self):
+        """(str) UUID of the Global domain."""
+        return self.domains[0]["uuid"]
+
+    def start(self):
+        """
+        Serve requests in a background thread.
+
+        :return: self
+        """
+        logging.debug("In the FMCEmulator start() class method.")
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="fmcapi-emulator", daemon=True
+        )
+        self.thread.start()
+        logging.info(f"FMC emulator listening on {self.url}.")
+        return self
+
+    def stop(self):
+        """
+        Stop serving requests.
+
+        :return: None
+        """
+        logging.debug("In the FMCEmulator stop() class method.")
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def stats(self):
+        """
+        Counters of what the emulator has answered.
+
+        :return: (dict) requests, throttled (429), unauthorized (401) and bytes_sent (response bodies as sent).
+        """
+        with self.lock:
+            return dict(self.counters)
+
+    def seed(self, collection, items, domain=None):
+        """
+        Add objects without going through the API, e.g. to set up a large listing.
+
+        :param collection (str): Collection path under the domain, e.g. object/hosts.
+        :param items (list): Objects to add.  Each gets an id unless it already has one.
+        :param domain (str): Domain UUID.  (Default is None, the Global domain)
+        :return: (list) The stored objects.
+        """
+        domain = domain or self.global_uuid
+        path = tuple(collection.strip("/").split("/"))
+        with self.lock:
+            return [self._create(domain, path, dict(item)) for item in items]
+
+    # The methods below are called by FMCEmulatorHandler.
+
+    def _throttled(self):
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            while self.recent_requests and self.recent_requests[0] <= now - 60:
+                self.recent_requests.popleft()
+            if len(self.recent_requests) >= self.rate_limit:
+                self.counters["throttled"] += 1
+                return True
+            self.recent_requests.append(now)
+        return False
+
+    def encode(self, content, accept_encoding):
+        """
+        Compress a response body the way the client asked, and pace it to the bandwidth.
+
+        :param content (bytes): Response body.
+        :param accept_encoding (str): The request's Accept-Encoding header.
+        :return: (tuple) body to send, Content-Encoding (or None)
+        """
+        encoding = None
+        accepted = [
+            value.split(";")[0].strip() for value in (accept_encoding or "").split(",")
+        ]
+        if self.compression and len(content) >= self.MIN_COMPRESS_SIZE:
+            if "gzip" in accepted:
+                content, encoding = gzip.compress(content, compresslevel=6), "gzip"
+            elif "deflate" in accepted:
+                content, encoding = zlib.compress(content, 6), "deflate"
+        with self.lock:
+            self.counters["bytes_sent"] += len(content)
+        if self.bandwidth:
+            time.sleep(len(content) / self.bandwidth)
+        return content, encoding
+
+    def _delay(self):
+        if isinstance(self.latency, (tuple, list)):
+            time.sleep(uniform(*self.latency))
+        elif self.latency:
+            time.sleep(self.latency)
+
+    def _new_tokens(self, refreshes=0):
+        access_token = str(uuid.uuid4())
+        refresh_token = str(uuid.uuid4())
+        self.tokens[access_token] = {
+            "refresh_token": refresh_token,
+            "expires": time.monotonic() + self.token_lifetime,
+            "refreshes": refreshes,
+        }
+        return {
+            "X-auth-access-token": access_token,
+            "X-auth-refresh-token": refresh_token,
+            "DOMAIN_UUID": self.global_uuid,
+            "DOMAINS": json.dumps(self.domains),
+        }
+
+    def _generate_token(self, authorization):
+        try:
+            scheme, credentials = authorization.split(" ", 1)
+            username, password = base64.b64decode(credentials).decode().split(":", 1)
+        except (AttributeError, ValueError):
+            return 401, None, {}
+        if scheme != "Basic" or (username, password) != (self.username, self.password):
+            return 401, None, {}
+        with self.lock:
+            return 204, None, self._new_tokens()
+
+    def _refresh_token(self, access_token, refresh_token):
+        with self.lock:
+            token = self.tokens.get(access_token)
+            if (
+                token is None
+                or token["refresh_token"] != refresh_token
+                or token["refreshes"] >= self.max_refreshes
+            ):
+                return 401, fmc_error("Invalid refresh token."), {}
+            del self.tokens[access_token]
+            return 204, None, self._new_tokens(refreshes=token["refreshes"] + 1)
+
+    def _authorized(self, access_token):
+        with self.lock:
+            token = self.tokens.get(access_token)
+            if token and token["expires"] > time.monotonic():
+                return True
+            self.counters["unauthorized"] += 1
+            return False
+
+    def _find(self, domain, path):
+        """Check that every parent object in path exists.  Return the collection or None."""
+        for depth in range(3, len(path), 2):
+            parent = self.collections.get((domain,) + path[: depth - 1], {})
+            if path[depth - 1] not in parent:
+                return None
+        return self.collections.setdefault((domain,) + path, {})
+
+    def _create(self, domain, path, item):
+        collection = self._find(domain, path)
+        item.setdefault("id", str(uuid.uuid4()))
+        item.setdefault("type", path[-1])
+        item["links"] = {"self": f"{CONFIG_PATH}{domain}/{'/'.join(path)}/{item['id']}"}
+        collection[item["id"]] = item
+        return item
+
+    def _listing(self, domain, path, collection, query, base_url):
+        items = list(collection.values())
+        if "name" in query:
+            items = [item for item in items if item.get("name") == query["name"][0]]
+        offset = int(query.get("offset", ["0"])[0])
+        limit = min(int(query.get("limit", [self.DEFAULT_LIMIT])[0]), self.MAX_LIMIT)
+        page = items[offset : offset + limit]
+        if query.get("expanded", ["false"])[0].lower() != "true":
+            page = [
+                {
+                    key: item[key]
+                    for key in ("id", "name", "type", "links")
+                    if key in item
+                }
+                for item in page
+            ]
+        url = f"{base_url}{CONFIG_PATH}{domain}/{'/'.join(path)}"
+        extra = "&expanded=true" if query.get("expanded") else ""
+        paging = {
+            "offset": offset,
+            "limit": limit,
+            "count": len(items),
+            "pages": -(-len(items) // limit) if limit else 0,
+        }
+        if offset + limit < len(items):
+            paging["next"] = [f"{url}?offset={offset + limit}&limit={limit}{extra}"]
+        if offset > 0:
+            paging["previous"] = [
+                f"{url}?offset={max(offset - limit, 0)}&limit={limit}{extra}"
+            ]
+        response = {"links": {"self": f"{url}?offset={offset}&limit={limit}"}}
+        if page:
+            response["items"] = page
+        response["paging"] = paging
+        return response
+
+    def _config(self, method, path, query, body, base_url):
+        """Handle /api/fmc_config/v1/domain/{uuid}/..."""
+        domain, *path = path
+        path = tuple(path)
+        if domain not in [d["uuid"] for d in self.domains] or len(path) < 2:
+            return 404, fmc_error("Invalid domain or URL."), {}
+        is_item = len(path) % 2 == 1
+        collection_path = path[:-1] if is_item else path
+        with self.lock:
+            collection = self._find(domain, collection_path)
+            if collection is None:
+                return 404, fmc_error("Parent object not found."), {}
+            if not is_item and method == "GET":
+                if "/".join(path) in AGGREGATE_COLLECTIONS:
+                    collection = {}
+                    for member in AGGREGATE_COLLECTIONS["/".join(path)]:
+                        key = (domain,) + tuple(member.split("/"))
+                        collection.update(self.collections.get(key, {}))
+                return 200, self._listing(domain, path, collection, query, base_url), {}
+            if not is_item and method == "POST":
+                bulk = query.get("bulk", ["false"])[0].lower() == "true"
+                if isinstance(body, list) != bulk or not body:
+                    return 400, fmc_error("Invalid payload for this request."), {}
+                items = body if bulk else [body]
+                if len(items) > self.MAX_BULK_ITEMS:
+                    return 422, fmc_error("Too many items in bulk request."), {}
+                names = [item.get("name") for item in collection.values()]
+                for item in items:
+                    if item.get("name") is not None and item.get("name") in names:
+                        return (
+                            400,
+                            fmc_error(
+                                f"The object name {item['name']} already exists."
+                            ),
+                            {},
+                        )
+                    names.append(item.get("name"))
+                created = [self._create(domain, path, dict(item)) for item in items]
+                status = 202 if "/".join(path) in ACCEPTED_COLLECTIONS else 201
+                return status, {"items": created} if bulk else created[0], {}
+            if not is_item:
+                return 405, fmc_error(f"{method} is not allowed here."), {}
+            item_id = path[-1]
+            if item_id not in collection:
+                return 404, fmc_error(f"Object {item_id} not found."), {}
+            if method == "GET":
+                return 200, collection[item_id], {}
+            if method == "PUT":
+                if not isinstance(body, dict):
+                    return 400, fmc_error("Invalid payload for this request."), {}
+                item = dict(body, id=item_id, links=collection[item_id]["links"])
+                item.setdefault("type", collection[item_id]["type"])
+                collection[item_id] = item
+                return 200, item, {}
+            if method == "DELETE":
+                prefix = (domain,) + path
+                for key in [
+                    key for key in self.collections if key[: len(prefix)] == prefix
+                ]:
+                    del self.collections[key]
+                return 200, collection.pop(item_id), {}
+            return 405, fmc_error(f"{method} is not allowed here."), {}
+
+    def handle(self, method, url, headers, raw_body, base_url):
+        """
+        Answer one request.
+
+        :param method (str): HTTP method.
+        :param url (str): Path and query of the request.
+        :param headers: Request headers.
+        :param raw_body (bytes): Request body.
+        :param base_url (str): Scheme and address the client used, for links.
+        :return: (tuple) status, JSON body (or None), extra response headers
+        """
+        with self.lock:
+            self.counters["requests"] += 1
+        self._delay()
+        split = urlsplit(url)
+        query = parse_qs(split.query)
+        path = split.path.rstrip("/")
+        if path == f"{PLATFORM_PATH}/auth/generatetoken" and method == "POST":
+            return self._generate_token(headers.get("Authorization"))
+        if path == f"{PLATFORM_PATH}/auth/refreshtoken" and method == "POST":
+            return self._refresh_token(
+                headers.get("X-auth-access-token"), headers.get("X-auth-refresh-token")
+            )
+        if not self._authorized(headers.get("X-auth-access-token")):
+            return 401, fmc_error("Access token invalid."), {}
+        if self._throttled():
+            return 429, fmc_error("Too many requests."), {}
+        if len(raw_body) > self.MAX_PAYLOAD:
+            return 422, fmc_error("Payload too large."), {}
+        try:
+            body = json.loads(raw_body) if raw_body else None
+        except ValueError:
+            return 400, fmc_error("Invalid JSON."), {}
+        if path == f"{PLATFORM_PATH}/info/serverversion" and method == "GET":
+            version = {
+                "serverVersion": self.server_version,
+                "vdbVersion": "build 354",
+                "sruVersion": "2022-01-01-001-vrt",
+                "geoVersion": "2022-01-01-001",
+                "type": "ServerVersion",
+            }
+            return 200, {"items": [version], "paging": {"count": 1}}, {}
+        if path.startswith(CONFIG_PATH):
+            return self._config(
+                method, path[len(CONFIG_PATH) :].split("/"), query, body, base_url
+            )
+        return 404, fmc_error("Unknown URL."), {}
+
+
+class FMCEmulatorHandler(BaseHTTPRequestHandler):
+    """Passes each HTTP request to the server's FMCEmulator."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately.  Without this keep-alive responses stall on delayed ACKs.
+    disable_nagle_algorithm = True
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+        host, port = self.server.server_address[:2]
+        status, body, headers = self.server.emulator.handle(
+            self.command, self.path, self.headers, raw_body, f"http://{host}:{port}"
+        )
+        content = json.dumps(body).encode() if body is not None else b""
+        content, encoding = self.server.emulator.encode(
+            content, self.headers.get("Accept-Encoding")
+        )
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if content:
+            self.send_header("Content-Type", "application/json")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+    def log_message(self, format, *args):
+        logging.debug(f"FMC emulator: {format % args}")
@@ -8,6 +8,7 @@ FMC API too.  Just Google for it as it gets updated with each release of code.
 
 import datetime
 import requests
+import threading
 import time
 import json
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
@@ -16,7 +17,26 @@ from logging.handlers import RotatingFileHandler
 from random import randint
 from .api_objects import ServerVersion
 from .api_objects import DeploymentRequests
-from sys import exit
+from .api_objects.helper_functions import set_url_query, endpoint_template
+from .ratelimiter import RateLimiter
+from .retrypolicy import RetryPolicy
+from .connectionpool import PoolStatsAdapter
+from .tokencache import TokenCache
+from .jsondecoder import get_json_decoder, read_body
+from .metrics import Metrics
+from .cassette import RecordingSession, ReplaySession
+from .requestlog import RequestLogger
+from .responsecache import ResponseCache, normalize_url
+from .singleflight import SingleFlight
+from .http2 import HTTP2Session
+from .circuitbreaker import CircuitBreaker
+from .scheduler import RequestScheduler
+from .nameresolver import NameResolver
+from contextvars import copy_context
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from sys import exit, exc_info
 
 # Disable annoying HTTP warnings
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
@@ -34,7 +54,15 @@ class AuthenticationError(Exception):
 
 
 class FMC(object):
-    """Establish and maintain connection to Firepower Management Center."""
+    """
+    Establish and maintain connection to Firepower Management Center.
+
+    Thread safety:  One FMC object, and so one authenticated session, may be shared by any number of threads (or
+    AsyncFMC coroutines).  send_to_api(), iter_pages() and iter_items() keep their paging state per call, token
+    generation and renewal are serialized by a lock in the Token object, and the RateLimiter is shared by all callers.
+    error_response holds the most recent error from any thread.  The api_objects instances are not shared state
+    safe, so give each thread its own.
+    """
 
     logging.debug("In the FMC() class.")
 
@@ -58,11 +86,35 @@ class FMC(object):
         limit=1000,
         timeout=5,
         check_server_version=True,
+        paging_workers=1,
+        rate_limit=120,
+        retry_policy=None,
+        read_timeout=None,
+        pool_connections=10,
+        pool_maxsize=10,
+        pool_block=False,
+        token_cache=None,
+        background_token_refresh=False,
+        json_decoder=None,
+        metrics=True,
+        tracer=None,
+        cassette=None,
+        cassette_mode="record",
+        replay_latency=0.0,
+        request_log=True,
+        response_cache=None,
+        coalesce_gets=True,
+        accept_encoding="gzip, deflate",
+        http2=False,
+        circuit_breaker=None,
+        scheduler=True,
+        name_resolver=None,
     ):
         """
         Instantiate some variables prior to calling the __enter__() method.
 
-        :param host (str): Hostname/IP of FMC (Default is 192.168.45.45)
+        :param host (str): Hostname/IP of FMC.  Prefix it with http:// to talk plain HTTP, e.g. to an FMCEmulator.
+        (Default is 192.168.45.45)
         :param username (str): Admin for FMC (Default is admin)
         :param password (str): Admin Password (Default is Admin123)
         :param domain (str): UUID of domain (Default is None which implies the Global domain)
@@ -74,6 +126,57 @@ class FMC(object):
         :param limit (int): Sets up max data to gather per "page". (Default is 1000)
         :param timeout (int):  Maximum seconds to establish connection (Default is 5)
         :param check_server_version (bool): Check server version compatibility (Default is True)
+        :param paging_workers (int): Number of pages of a GET listing to fetch at once.  (Default is 1, which fetches
+        one page after another)
+        :param rate_limit (int): Requests per minute to pace API calls to, or a RateLimiter to share between FMC
+        objects.  None, False or 0 restore the fixed TOO_MANY_CONNECTIONS_TIMEOUT wait on a 429.  (Default is 120)
+        :param retry_policy (RetryPolicy): How to retry connection errors, timeouts and 5xx responses.  (Default is
+        None which uses RetryPolicy() defaults)
+        :param read_timeout (int): Maximum seconds to wait for the FMC to respond once connected.  (Default is None
+        which uses the timeout value)
+        :param pool_connections (int): Number of hosts to keep a connection pool for.  (Default is 10)
+        :param pool_maxsize (int): Connections kept open, and reused, per host.  Match this to the number of
+        concurrent workers.  (Default is 10)
+        :param pool_block (bool): When all pool_maxsize connections are busy wait for one instead of opening an extra
+        connection that is not kept.  (Default is False)
+        :param token_cache (str): File in which to share tokens with other processes and later runs, True for
+        TokenCache.DEFAULT_PATH, or a TokenCache object.  (Default is None, no token cache)
+        :param background_token_refresh (bool): Renew tokens in a background thread before they expire so that API
+        calls never wait on authentication.  (Default is False)
+        :param json_decoder (str): "orjson", "json" or a callable that decodes response body bytes.  (Default is None
+        which uses orjson when it is installed)
+        :param metrics (bool): Record every API call in self.metrics, or a Metrics object to share between FMC
+        objects.  None or False turns recording off.  (Default is True)
+        :param tracer (Tracer): Record nested spans for api_objects methods, send_to_api() calls and HTTP requests.
+        (Default is None, no tracing)
+        :param cassette (str): File to record API traffic to, or to replay it from.  (Default is None)
+        :param cassette_mode (str): "record" to talk to the FMC and save every exchange in the cassette, or "replay"
+        to answer every request from the cassette without an FMC.  (Default is record)
+        :param replay_latency (float): When replaying, sleep for the recorded response time multiplied by this.
+        (Default is 0, answer immediately)
+        :param request_log (bool): Write a JSON line per API call to the "fmcapi.requests" logger at DEBUG level, or
+        a RequestLogger for other levels, sampling, redaction and truncation.  None or False turns it off.  Records are
+        only built when that logger is enabled.  (Default is True)
+        :param response_cache (bool): Serve repeated GETs from a ResponseCache.  Writes sent through this FMC object
+        drop what they change from it.  True for ResponseCache() defaults, or a ResponseCache.  (Default is None, no
+        caching)
+        :param coalesce_gets (bool): When send_to_api() is asked for a GET that another thread is already sending,
+        wait for that one and share its response instead of sending it again.  (Default is True)
+        :param accept_encoding (str): Compression to ask the FMC for.  Bodies are decompressed as they are streamed
+        in.  None asks for uncompressed responses.  (Default is "gzip, deflate")
+        :param http2 (bool): Talk to the FMC over HTTP/2 with an HTTP2Session (needs httpx[http2]) so concurrent
+        requests share one multiplexed connection.  pool_maxsize caps its connections.  (Default is False, requests
+        over HTTP/1.1)
+        :param circuit_breaker (bool): Stop sending requests to an endpoint that keeps failing for a while, raising
+        CircuitOpenError instead.  True for CircuitBreaker() defaults, or a CircuitBreaker.  (Default is None, off)
+        :param scheduler (bool): Hand out the rate limiter's budget by priority class (see request_priority()) with a
+        RequestScheduler, so bulk jobs cannot starve interactive lookups.  A RequestScheduler shares its queue, and
+        its rate limiter, between FMC objects and takes the place of rate_limit.  None or False lets requests take
+        turns on the rate limiter as they come.  (Default is True)
+        :param name_resolver (bool): Answer get(name=...) lookups, and so the api_objects helpers, from whole
+        collections loaded once into a NameResolver instead of a listing per lookup.  Writes sent through this FMC
+        object drop what they change from it.  True for NameResolver() defaults, or a NameResolver.  (Default is None,
+        a listing per lookup)
         :return: None
         """
         self.debug = debug
@@ -107,24 +210,96 @@ class FMC(object):
 
         logging.debug("In the FMC __init__() class method.")
 
-        self.host = host
+        self.scheme = "http" if host.startswith("http://") else "https"
+        self.host = host.removeprefix("https://").removeprefix("http://")
         self.username = username
         self.password = password
         self.domain = domain
         self.autodeploy = autodeploy
         self.limit = limit
-        self.timeout = timeout
+        if read_timeout is None:
+            self.timeout = timeout
+        else:
+            self.timeout = (timeout, read_timeout)
         self.check_server_version = check_server_version
+        self.background_token_refresh = background_token_refresh
+        self.json_decoder = get_json_decoder(json_decoder)
+        self.paging_workers = paging_workers
+        if not rate_limit:
+            self.rate_limiter = None
+        elif isinstance(rate_limit, RateLimiter):
+            self.rate_limiter = rate_limit
+        else:
+            self.rate_limiter = RateLimiter(rate=rate_limit)
+        if isinstance(scheduler, RequestScheduler):
+            self.scheduler = scheduler
+            self.rate_limiter = scheduler.rate_limiter
+        elif scheduler and self.rate_limiter:
+            self.scheduler = RequestScheduler(self.rate_limiter)
+        else:
+            self.scheduler = None
+        self.retry_policy = retry_policy or RetryPolicy()
+        if metrics is True:
+            self.metrics = Metrics()
+        else:
+            self.metrics = metrics or None
+        self.tracer = tracer
+        if request_log is True:
+            self.request_log = RequestLogger()
+        else:
+            self.request_log = request_log or None
+        if response_cache is True:
+            self.response_cache = ResponseCache()
+        else:
+            self.response_cache = response_cache
+        self.single_flight = SingleFlight() if coalesce_gets else None
+        if name_resolver is True:
+            self.name_resolver = NameResolver()
+        else:
+            self.name_resolver = name_resolver or None
+        self.accept_encoding = accept_encoding or "identity"
+        if circuit_breaker is True:
+            self.circuit_breaker = CircuitBreaker()
+        else:
+            self.circuit_breaker = circuit_breaker or None
         self.vdbVersion = None
         self.sruVersion = None
         self.serverVersion = None
         self.geoVersion = None
         self.configuration_url = None
         self.platform_url = None
-        self.page_counter = None
-        self.more_items = []
         self.error_response = None
-        self.requests_session = requests.session()
+        self.mytoken = None
+        if token_cache is True:
+            self.token_cache = TokenCache()
+        elif isinstance(token_cache, str):
+            self.token_cache = TokenCache(path=token_cache)
+        else:
+            self.token_cache = token_cache
+        if http2:
+            self.http2_session = HTTP2Session(
+                verify=self.VERIFY_CERT, max_connections=pool_maxsize
+            )
+            self.pool_adapter = None
+            self.requests_session = self.http2_session
+        else:
+            self.http2_session = None
+            self.requests_session = requests.session()
+            self.pool_adapter = PoolStatsAdapter(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                pool_block=pool_block,
+            )
+            self.requests_session.mount("https://", self.pool_adapter)
+            self.requests_session.mount("http://", self.pool_adapter)
+        if cassette and cassette_mode == "record":
+            self.requests_session = RecordingSession(self.requests_session, cassette)
+        elif cassette and cassette_mode == "replay":
+            self.requests_session = ReplaySession(cassette, latency=replay_latency)
+        elif cassette:
+            raise ValueError(
+                f'cassette_mode must be "record" or "replay", not "{cassette_mode}".'
+            )
 
     def __enter__(self):
         """
@@ -133,31 +308,38 @@ class FMC(object):
         :return: self
         """
         logging.debug("In the FMC __enter__() class method.")
-        self.mytoken = Token(
-            host=self.host,
-            username=self.username,
-            password=self.password,
-            domain=self.domain,
-            verify_cert=self.VERIFY_CERT,
-            timeout=self.timeout,
-            requests_session=self.requests_session,
-        )
-        self.uuid = self.mytoken.uuid
-        if self.mytoken.access_token:
-            self.build_urls()
-
-            if self.check_server_version:
-                version = ServerVersion(fmc=self)
-                version.get()
-                self.serverVersion = version.serverVersion
-                logging.info(f"This FMC's version is {self.serverVersion}")
-            else:
-                self.serverVersion = str(9) * 10
+        try:
+            self.mytoken = Token(
+                host=f"{self.scheme}://{self.host}",
+                username=self.username,
+                password=self.password,
+                domain=self.domain,
+                verify_cert=self.VERIFY_CERT,
+                timeout=self.timeout,
+                requests_session=self.requests_session,
+                token_cache=self.token_cache,
+                background_refresh=self.background_token_refresh,
+            )
+            self.uuid = self.mytoken.uuid
+            if self.mytoken.access_token:
+                self.build_urls()
 
-            return self
-        else:
-            logging.info("User authentication failed.")
-            raise AuthenticationError("Access token not found in the response")
+                if self.check_server_version:
+                    version = ServerVersion(fmc=self)
+                    version.get()
+                    self.serverVersion = version.serverVersion
+                    logging.info(f"This FMC's version is {self.serverVersion}")
+                else:
+                    self.serverVersion = str(9) * 10
+
+                return self
+            else:
+                logging.info("User authentication failed.")
+                raise AuthenticationError("Access token not found in the response")
+        except BaseException:
+            # __exit__() is not called when __enter__() fails.
+            self._close_sessions()
+            raise
 
     def __exit__(self, *args):
         """
@@ -168,13 +350,29 @@ class FMC(object):
         """
         logging.debug("In the FMC __exit__() class method.")
 
-        if self.autodeploy:
-            tmp = DeploymentRequests(fmc=self)
-            tmp.post()
-        else:
-            logging.info(
-                "Auto deploy changes set to False.  Use the Deploy button in FMC to push changes to FTDs."
-            )
+        try:
+            if self.autodeploy:
+                tmp = DeploymentRequests(fmc=self)
+                tmp.post()
+            else:
+                logging.info(
+                    "Auto deploy changes set to False.  Use the Deploy button in FMC to push changes to FTDs."
+                )
+        finally:
+            self._close_sessions()
+
+    def _close_sessions(self):
+        """
+        Stop the background token refresh and close the cassette and HTTP/2 sessions.
+
+        :return: None
+        """
+        if self.mytoken:
+            self.mytoken.stop_background_refresh()
+        if isinstance(self.requests_session, (RecordingSession, ReplaySession)):
+            self.requests_session.close()
+        if self.http2_session:
+            self.http2_session.close()
 
     def build_urls(self):
         """
@@ -185,130 +383,445 @@ class FMC(object):
         logging.debug("In the FMC build_urls() class method.")
         logging.info("Building base to URLs.")
         self.configuration_url = (
-            f"https://{self.host}/{self.API_CONFIG_VERSION}/domain/{self.uuid}"
+            f"{self.scheme}://{self.host}/{self.API_CONFIG_VERSION}/domain/{self.uuid}"
         )
-        self.platform_url = f"https://{self.host}/{self.API_PLATFORM_VERSION}"
+        self.platform_url = f"{self.scheme}://{self.host}/{self.API_PLATFORM_VERSION}"
 
-    def send_to_api(
-        self, method="", url="", headers="", json_data=None, more_items=None
-    ):
+    def pool_stats(self):
+        """
+        Report how the HTTP connection pool is being used.
+
+        :return: (dict) Requests sent, connections created and reused, peak and current in-flight requests, and how
+        many requests found the pool saturated.  With http2=True, the responses received per HTTP version.
+        """
+        logging.debug("In the FMC pool_stats() class method.")
+        if self.http2_session:
+            return self.http2_session.stats()
+        return self.pool_adapter.stats()
+
+    def send_to_api(self, method="", url="", headers="", json_data=None):
         """
         Send API call to FMC.
 
+        All pages of a paged response are gathered and returned as one response.  Use iter_items() instead when the
+        listing is too large to hold in memory.  With a response_cache, GETs may be answered from it and writes drop
+        the cached responses of the collection they change.  Identical GETs in flight at the same time are sent once
+        unless coalesce_gets is False.
+
         :param method (str): GET, POST, PUT, or DELETE
         :param url (str): URL for API call.
         :param headers (str):  String of header variables.
         :param json_data (str):  JSON formatted string as payload. (Default is None)
-        :param more_items (str):  Used for paging in query.
         :return: (dict) JSON response from FMC
         """
         logging.debug("In the FMC send_to_api() class method.")
 
-        if not more_items:
-            self.more_items = []
-            self.page_counter = 0
+        span = None
+        if self.tracer is not None:
+            span = self.tracer.start_span(
+                "FMC.send_to_api", method=method.upper(), endpoint=endpoint_template(url)
+            )
+        cache = self.response_cache
+        if cache and method == "get" and headers == "" and cache.cacheable(url):
+            json_response = cache.get(url)
+            if json_response is not None:
+                if span:
+                    span.set(cache="hit")
+                    span.finish()
+                return json_response
+            generation = cache.generation
+        else:
+            cache = None
+        try:
+            if self.single_flight and method == "get" and headers == "":
+                json_response = self.single_flight.do(
+                    normalize_url(url),
+                    lambda: self._gather_pages(method=method, url=url),
+                )
+            else:
+                json_response = self._gather_pages(
+                    method=method, url=url, headers=headers, json_data=json_data
+                )
+        except BaseException as err:
+            if span:
+                span.finish(error=err)
+            raise
+        if cache:
+            cache.put(url, json_response, generation)
+        if span:
+            span.set(items=len(json_response.get("items", [])))
+            span.finish()
+        return json_response
+
+    def _gather_pages(self, method="", url="", headers="", json_data=None):
+        """
+        Send API call to FMC and merge the items of all pages into the last page.
+
+        :param method (str): GET, POST, PUT, or DELETE
+        :param url (str): URL for API call.
+        :param headers (str):  String of header variables.
+        :param json_data (str):  JSON formatted string as payload. (Default is None)
+        :return: (dict) JSON response from FMC
+        """
+        json_response = None
+        more_items = []
+        for page in self.iter_pages(
+            method=method, url=url, headers=headers, json_data=json_data
+        ):
+            if json_response is not None:
+                more_items += json_response.get("items", [])
+            json_response = page
+        if more_items:
+            json_response["items"] = more_items + json_response.get("items", [])
+        return json_response
+
+    def iter_pages(self, method="get", url="", headers="", json_data=None):
+        """
+        Send API call to FMC and yield each page of the response as it arrives.
+
+        The "paging.next" links are followed in a loop (not recursively) until there are no more pages or
+        MAX_PAGING_REQUESTS is reached.
+
+        :param method (str): GET, POST, PUT, or DELETE
+        :param url (str): URL for API call.
+        :param headers (str):  String of header variables.
+        :param json_data (str):  JSON formatted string as payload. (Default is None)
+        :return: (generator) JSON response of each page
+        """
+        logging.debug("In the FMC iter_pages() class method.")
+
+        page_counter = 0
+        while True:
+            json_response = self._send_request(
+                method=method, url=url, headers=headers, json_data=json_data
+            )
+            yield json_response
+            next_url = self._next_page_url(json_response, page_counter)
+            if (
+                next_url
+                and method == "get"
+                and self.paging_workers > 1
+                and "count" in json_response["paging"]
+            ):
+                for json_response in self._prefetch_pages(
+                    json_response["paging"], page_counter
+                ):
+                    yield json_response
+                    page_counter += 1
+                next_url = self._next_page_url(json_response, page_counter)
+            if not next_url:
+                return
+            page_counter += 1
+            url = next_url
+            headers = ""
+
+    def _next_page_url(self, json_response, page_counter):
+        """
+        Find the URL of the page following json_response, if we are to follow it.
+
+        :param json_response (dict): A page returned by the FMC.
+        :param page_counter (int): Number of pages followed so far.
+        :return: (str) URL or None
+        """
+        try:
+            paging = json_response["paging"]
+        except (KeyError, TypeError):
+            # Used only when the response only has "one page" of results.
+            return None
+        if "next" not in paging or page_counter > self.MAX_PAGING_REQUESTS:
+            return None
+        logging.debug(
+            "Paging:  Offset:%s, Limit:%s, Count:%s.",
+            paging["offset"],
+            paging["limit"],
+            paging["count"],
+        )
+        return paging["next"][0]
+
+    def _prefetch_pages(self, paging, page_counter):
+        """
+        GET the rest of a listing with up to paging_workers requests in flight and yield the pages in order.
+
+        The remaining offsets are worked out from the first page's "paging" count and limit.  Only a bounded window
+        of pages is fetched ahead of the consumer.
+
+        :param paging (dict): The "paging" section of the first page.
+        :param page_counter (int): Number of pages followed so far.
+        :return: (generator) JSON response of each page
+        """
+        logging.debug("In the FMC _prefetch_pages() class method.")
+        limit = paging["limit"]
+        offsets = range(paging["offset"] + limit, paging["count"], limit)[
+            : max(self.MAX_PAGING_REQUESTS - page_counter + 1, 0)
+        ]
+        logging.info(
+            f"Fetching {len(offsets)} more pages with {self.paging_workers} concurrent requests."
+        )
+        futures = deque()
+        with ThreadPoolExecutor(
+            max_workers=self.paging_workers, thread_name_prefix="fmcapi-paging"
+        ) as executor:
+            try:
+                for offset in offsets:
+                    futures.append(
+                        executor.submit(
+                            copy_context().run,
+                            self._send_request,
+                            method="get",
+                            url=set_url_query(
+                                paging["next"][0], offset=offset, limit=limit
+                            ),
+                        )
+                    )
+                    if len(futures) >= self.paging_workers * 2:
+                        yield futures.popleft().result()
+                while futures:
+                    yield futures.popleft().result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def iter_items(self, url="", headers=""):
+        """
+        GET a listing from FMC and yield its items one at a time.
+
+        Only one page is held in memory at a time, so this is the way to walk very large listings.
+
+        :param url (str): URL for API call.
+        :param headers (str):  String of header variables.
+        :return: (generator) Each item of the listing
+        """
+        logging.debug("In the FMC iter_items() class method.")
+        for page in self.iter_pages(method="get", url=url, headers=headers):
+            yield from page.get("items", [])
+
+    def _send_request(self, method="", url="", headers="", json_data=None):
+        """
+        Send a single API call to FMC, waiting out 429s, refreshing the token on 401s and retrying per retry_policy.
+
+        Paging is not followed here.  That is left to the caller.
+
+        :param method (str): GET, POST, PUT, or DELETE
+        :param url (str): URL for API call.
+        :param headers (str):  String of header variables.
+        :param json_data (str):  JSON formatted string as payload. (Default is None)
+        :return: (dict) JSON response from FMC
+        """
+        logging.debug("In the FMC _send_request() class method.")
+
         if headers == "":
             # These values for headers works for most API requests.
             headers = {
                 "Content-Type": "application/json",
+                "Accept-Encoding": self.accept_encoding,
                 "X-auth-access-token": self.mytoken.get_token(),
             }
         status_code = 429
         response = None
         json_response = None
-        logging.debug(
-            f"Being sent to FMC's API:\n\tHEADERS={headers}\n\tURL={url}\n\tMETHOD={method}\n\t"
-            f"MORE_ITEMS={more_items}\n\tJSON_DATA={json_data}"
-        )
+        attempt = 0
+        throttled = 0
+        reauthenticated = 0
+        rate_limit_wait = 0.0
+        wire_bytes = 0
+        endpoint = endpoint_template(url)
+        start = time.monotonic()
+        succeeded = False
+        span = None
+        if self.tracer is not None:
+            span = self.tracer.start_span(
+                f"HTTP {method.upper()}", endpoint=endpoint
+            )
         try:
             while status_code == 429:
-                if method == "get":
-                    response = self.requests_session.get(
-                        url, headers=headers, verify=self.VERIFY_CERT, timeout=self.timeout
-                    )
-                elif method == "post":
-                    response = self.requests_session.post(
-                        url, json=json_data, headers=headers, verify=self.VERIFY_CERT, timeout=self.timeout
-                    )
-                elif method == "put":
-                    response = self.requests_session.put(
-                        url, json=json_data, headers=headers, verify=self.VERIFY_CERT, timeout=self.timeout
-                    )
-                elif method == "delete":
-                    response = self.requests_session.delete(
-                        url, headers=headers, verify=self.VERIFY_CERT, timeout=self.timeout
+                attempt += 1
+                response = None
+                if self.circuit_breaker:
+                    self.circuit_breaker.acquire(endpoint)
+                try:
+                    if self.scheduler:
+                        rate_limit_wait += self.scheduler.acquire()
+                    elif self.rate_limiter:
+                        rate_limit_wait += self.rate_limiter.acquire()
+                except BaseException:
+                    if self.circuit_breaker:
+                        self.circuit_breaker.release(endpoint)
+                    raise
+                try:
+                    if method == "get":
+                        response = self.requests_session.get(
+                            url, headers=headers, verify=self.VERIFY_CERT, timeout=self.timeout, stream=True
+                        )
+                    elif method == "post":
+                        response = self.requests_session.post(
+                            url,
+                            json=json_data,
+                            headers=headers,
+                            verify=self.VERIFY_CERT,
+                            timeout=self.timeout,
+                            stream=True,
+                        )
+                    elif method == "put":
+                        response = self.requests_session.put(
+                            url,
+                            json=json_data,
+                            headers=headers,
+                            verify=self.VERIFY_CERT,
+                            timeout=self.timeout,
+                            stream=True,
+                        )
+                    elif method == "delete":
+                        response = self.requests_session.delete(
+                            url, headers=headers, verify=self.VERIFY_CERT, timeout=self.timeout, stream=True
+                        )
+                    else:
+                        logging.error("No request method given.  Returning nothing.")
+                        raise Exception("No request method given")
+                    wire_bytes = read_body(response)
+                except self.retry_policy.retry_exceptions as err:
+                    # The body may be half read.  Leave it alone.
+                    response = None
+                    if self.circuit_breaker:
+                        self.circuit_breaker.on_failure(endpoint)
+                    if not self.retry_policy.should_retry_exception(method, err, attempt):
+                        raise
+                    delay = self.retry_policy.backoff(attempt)
+                    logging.warning(
+                        f"{type(err).__name__} while talking to the FMC.  Try {attempt} of "
+                        f"{self.retry_policy.max_attempts} failed, trying again in {delay:.1f} seconds."
                     )
-                else:
-                    logging.error("No request method given.  Returning nothing.")
-                    raise Exception("No request method given")
-                if self.debug:
-                    debug_msg = ["Response from FMC's API:"]
-                    for response_var in dir(response):
-                        if "__" not in response_var:
-                            tmp_var = getattr(response, response_var)
-                            debug_msg.append(f"\n\t{response_var}={tmp_var}")
-                    logging.debug("".join(debug_msg))
-
+                    time.sleep(delay)
+                    continue
+                except Exception:
+                    response = None
+                    if self.circuit_breaker:
+                        self.circuit_breaker.release(endpoint)
+                    raise
                 status_code = response.status_code
+                if self.circuit_breaker:
+                    if self.circuit_breaker.is_failure(status_code):
+                        self.circuit_breaker.on_failure(endpoint)
+                    elif status_code in (401, 429):
+                        self.circuit_breaker.release(endpoint)
+                    else:
+                        self.circuit_breaker.on_success(endpoint)
                 if status_code == 429:
+                    throttled += 1
+                if status_code == 429 and self.rate_limiter:
+                    backoff = self.rate_limiter.on_too_many_requests(
+                        retry_after=self.retry_policy.retry_after(response)
+                    )
+                    logging.warning(
+                        f"Too many connections to the FMC.  Slowing down and trying again in {backoff:.1f} "
+                        f"seconds."
+                    )
+                elif status_code == 429:
                     logging.warning(
                         f"Too many connections to the FMC.  Waiting {self.TOO_MANY_CONNECTIONS_TIMEOUT} "
                         f"seconds and trying again."
                     )
-                    time.sleep(self.TOO_MANY_CONNECTIONS_TIMEOUT + randint(-2, 2))
+                    delay = self.TOO_MANY_CONNECTIONS_TIMEOUT + randint(-2, 2)
+                    time.sleep(delay)
+                    rate_limit_wait += delay
+                elif self.rate_limiter:
+                    self.rate_limiter.on_success()
                 if status_code == 401:
                     logging.warning("Token has expired. Trying to refresh.")
-                    self.mytoken.access_token = None
-                    self.mytoken.access_token = self.mytoken.get_token()
+                    reauthenticated += 1
                     headers = {
                         "Content-Type": "application/json",
-                        "X-auth-access-token": self.mytoken.access_token,
+                        "Accept-Encoding": self.accept_encoding,
+                        "X-auth-access-token": self.mytoken.renew(
+                            headers.get("X-auth-access-token")
+                        ),
                     }
                     status_code = 429
+                elif self.retry_policy.should_retry_status(method, status_code, attempt):
+                    delay = self.retry_policy.backoff(attempt, response)
+                    logging.warning(
+                        f"FMC responded with HTTP {status_code}.  Try {attempt} of "
+                        f"{self.retry_policy.max_attempts} failed, trying again in {delay:.1f} seconds."
+                    )
+                    time.sleep(delay)
+                    status_code = 429
                 if status_code == 422:
                     logging.warning(
                         "Either:\n\t1. Payload too large.  FMC can only handle a payload of "
                         f"{self.FMC_MAX_PAYLOAD} bytes.\n\t2.The payload contains an unprocessable or "
                         f"unreadable entity such as a invalid attribut name or incorrect JSON syntax "
                     )
-            json_response = json.loads(response.text)
+            json_response = self.json_decoder(response.content)
             if status_code > 301 or "error" in json_response:
                 response.raise_for_status()
+            succeeded = True
         except requests.exceptions.HTTPError as err:
             logging.error(f"Error in POST operation --> {str(err)}")
             logging.error(f"json_response -->\t{json_response}")
             self.error_response = json_response
-            if response:
-                response.close()
             raise Exception("Error in POST operation")
-        if response:
-            response.close()
-        try:
-            if (
-                "next" in json_response["paging"]
-                and self.page_counter <= self.MAX_PAGING_REQUESTS
-            ):
-                self.more_items += json_response["items"]
-                logging.debug(
-                    f"Paging:  Offset:{json_response['paging']['offset']}, "
-                    f"Limit:{json_response['paging']['limit']}, "
-                    f"Count:{json_response['paging']['count']}, "
-                    f"Gathered_Items:{len(self.more_items)}."
+        finally:
+            if response is not None:
+                status = response.status_code
+            else:
+                status = type(exc_info()[1]).__name__
+            if self.metrics or span:
+                response_bytes = len(response.content) if response is not None else 0
+            if self.metrics:
+                self.metrics.record(
+                    host=self.host,
+                    method=method,
+                    endpoint=endpoint,
+                    status=status,
+                    response_bytes=response_bytes,
+                    wire_bytes=wire_bytes,
+                    latency=time.monotonic() - start,
+                    retries=attempt - 1,
+                    throttled=throttled,
+                    reauthenticated=reauthenticated,
+                    rate_limit_wait=rate_limit_wait,
+                )
+            if span:
+                span.set(
+                    status=status,
+                    response_bytes=response_bytes,
+                    wire_bytes=wire_bytes,
+                    retries=attempt - 1,
+                    rate_limit_wait=rate_limit_wait,
                 )
-                self.page_counter += 1
-                return self.send_to_api(
+                span.finish(error=None if succeeded else exc_info()[1])
+            if self.request_log and self.request_log.wanted(failed=not succeeded):
+                self.request_log.log(
                     method=method,
-                    url=json_response["paging"]["next"][0],
+                    url=url,
+                    headers=headers,
                     json_data=json_data,
-                    more_items=self.more_items,
+                    status=status,
+                    attempts=attempt,
+                    elapsed=time.monotonic() - start,
+                    rate_limit_wait=rate_limit_wait,
+                    response=response,
+                    wire_bytes=wire_bytes,
                 )
-            else:
-                json_response["items"] = self.more_items + json_response["items"]
-                self.more_items = []
-                return json_response
-        except KeyError:
-            # Used only when the response only has "one page" of results.
-            return json_response
+            self._forget_written(method, url)
+        return json_response
+
+    def _forget_written(self, method, url):
+        """
+        Drop what a POST, PUT or DELETE may have changed from response_cache and name_resolver, and stop GETs already
+        in flight from being shared.  Called for every request, however it was sent.
+
+        :param method (str): GET, POST, PUT, or DELETE
+        :param url (str): URL for API call.
+        :return: None
+        """
+        if method not in ("post", "put", "delete"):
+            return
+        if self.response_cache:
+            self.response_cache.invalidate(method, url)
+        if self.name_resolver:
+            self.name_resolver.invalidate(method, url)
+        if self.single_flight:
+            self.single_flight.forget()
 
 
 class Token(object):
@@ -321,6 +834,10 @@ class Token(object):
     TOKEN_REFRESH_TIME = int(
         TOKEN_LIFETIME * 0.95
     )  # Refresh token at 95% refresh time.
+    BACKGROUND_REFRESH_TIME = int(
+        TOKEN_LIFETIME * 0.85
+    )  # Background refresher renews tokens well before get_token() would.
+    BACKGROUND_RETRY_TIME = 30
     API_PLATFORM_VERSION = "api/fmc_platform/v1"
 
     def __init__(
@@ -331,22 +848,27 @@ class Token(object):
         domain=None,
         verify_cert=False,
         timeout=5,
-        requests_session=None
+        requests_session=None,
+        token_cache=None,
+        background_refresh=False,
     ):
         """
         Initialize variables used in the Token class.
 
-        :param host (str):  FMC hostname/IP (Default is 192.168.45.45)
+        :param host (str):  FMC hostname/IP, optionally prefixed with http:// or https:// (Default is 192.168.45.45)
         :param username (str): FMC Admin user (Default is admin)
         :param password (str): FMC user's password (Default is Admin123)
         :param domain (str):  UUID of domain.  Default is None which implies Global domain.
         :param verify_cert (bool):  Validate cert  (Default is False)
         :param timeout (int):  Maximum seconds to establish connection (Default is 5)
         :param requests_session: Reuse provided request session
+        :param token_cache (TokenCache): Reuse, and share, tokens kept on disk.  (Default is None)
+        :param background_refresh (bool): Renew tokens ahead of expiry in a background thread.  (Default is False)
         :return: None
         """
         logging.debug("In the Token __init__() class method.")
 
+        self.__scheme = "http" if host.startswith("http://") else "https"
         self.__host = host.removeprefix("https://").removeprefix("http://")
         self.__username = username
         self.__password = password
@@ -358,76 +880,141 @@ class Token(object):
         self.access_token = None
         self.refresh_token = None
         self.token_creation_time = None
+        self.token_renewal_time = None
         self.requests_session = requests_session or requests.session()
+        self.lock = threading.RLock()
+        self.token_cache = token_cache
+        self.cache_key = TokenCache.key(self.__host, self.__username, self.__domain)
+        self.refresher = None
+        self.stop_refresher = threading.Event()
         self.generate_tokens()
+        if background_refresh and self.access_token:
+            self.start_background_refresh()
 
-    def generate_tokens(self):
+    def generate_tokens(self, force_new=False):
         """
         Create new or refresh expired tokens.
 
+        :param force_new (bool): Get new tokens from generatetoken even if the current ones could be refreshed.
         :return: None
         """
         logging.debug("In the Token generate_tokens() class method.")
 
-        if self.token_refreshes <= self.MAX_REFRESHES and self.access_token is not None:
-            headers = {
-                "Content-Type": "application/json",
-                "X-auth-access-token": self.access_token,
-                "X-auth-refresh-token": self.refresh_token,
-            }
-            url = f"https://{self.__host}/{self.API_PLATFORM_VERSION}/auth/refreshtoken"
-            logging.info(
-                f"Refreshing tokens, {self.token_refreshes} out of {self.MAX_REFRESHES} refreshes, "
-                f"from {url}."
-            )
-            response = self.requests_session.post(url, headers=headers, verify=self.verify_cert, timeout=self.timeout)
-            logging.debug(
-                "Response from refreshtoken() post:\n"
-                f"\turl: {url}\n"
-                f"\theaders: {headers}\n"
-                f"\tresponse: {response}"
-            )
-            self.token_refreshes += 1
-        else:
-            self.token_refreshes = 0
-            self.token_creation_time = (
-                datetime.datetime.now()
-            )  # Can't trust that your clock is in sync with FMC's.
-            headers = {"Content-Type": "application/json"}
-            url = (
-                f"https://{self.__host}/{self.API_PLATFORM_VERSION}/auth/generatetoken"
-            )
-            logging.info(f"Requesting new tokens from {url}.")
-            response = self.requests_session.post(
-                url,
-                headers=headers,
-                auth=requests.auth.HTTPBasicAuth(self.__username, self.__password),
-                verify=self.verify_cert,
-                timeout=self.timeout,
-            )
-            logging.debug(
-                "Response from generatetoken() post:\n"
-                f"\turl: {url}\n"
-                f"\theaders: {headers}\n"
-                f"\tresponse: {response}"
-            )
-        self.access_token = response.headers.get("X-auth-access-token")
-        self.refresh_token = response.headers.get("X-auth-refresh-token")
-        self.uuid = response.headers.get("DOMAIN_UUID")
-        if self.access_token:
-            domain_response = response.headers.get("DOMAINS")
-            if domain_response is None:
-                raise Exception
-            self.all_domain = json.loads(domain_response)
-            if self.__domain is not None:
-                for domain in self.all_domain:
-                    if "global/" + self.__domain.lower() == domain["name"].lower():
-                        logging.info(f"Domain set to {domain['name']}")
-                        self.uuid = domain["uuid"]
-                    else:
-                        logging.info(
-                            "Domain name entered not found in FMC, falling back to Global"
-                        )
+        with self.lock, self.token_cache.lock() if self.token_cache else nullcontext():
+            if (
+                not force_new
+                and self.token_refreshes <= self.MAX_REFRESHES
+                and self.access_token is not None
+            ):
+                headers = {
+                    "Content-Type": "application/json",
+                    "X-auth-access-token": self.access_token,
+                    "X-auth-refresh-token": self.refresh_token,
+                }
+                url = f"{self.__scheme}://{self.__host}/{self.API_PLATFORM_VERSION}/auth/refreshtoken"
+                logging.info(
+                    f"Refreshing tokens, {self.token_refreshes} out of {self.MAX_REFRESHES} refreshes, "
+                    f"from {url}."
+                )
+                response = self.requests_session.post(url, headers=headers, verify=self.verify_cert, timeout=self.timeout)
+                logging.debug(
+                    "Response from refreshtoken() post:\n"
+                    f"\turl: {url}\n"
+                    f"\theaders: {headers}\n"
+                    f"\tresponse: {response}"
+                )
+                self.token_refreshes += 1
+                self.token_renewal_time = datetime.datetime.now()
+            elif self.token_cache and self.load_cached_tokens():
+                return
+            else:
+                self.token_refreshes = 0
+                self.token_creation_time = (
+                    datetime.datetime.now()
+                )  # Can't trust that your clock is in sync with FMC's.
+                self.token_renewal_time = self.token_creation_time
+                headers = {"Content-Type": "application/json"}
+                url = (
+                    f"{self.__scheme}://{self.__host}/{self.API_PLATFORM_VERSION}/auth/generatetoken"
+                )
+                logging.info(f"Requesting new tokens from {url}.")
+                response = self.requests_session.post(
+                    url,
+                    headers=headers,
+                    auth=requests.auth.HTTPBasicAuth(self.__username, self.__password),
+                    verify=self.verify_cert,
+                    timeout=self.timeout,
+                )
+                logging.debug(
+                    "Response from generatetoken() post:\n"
+                    f"\turl: {url}\n"
+                    f"\theaders: {headers}\n"
+                    f"\tresponse: {response}"
+                )
+            self.access_token = response.headers.get("X-auth-access-token")
+            self.refresh_token = response.headers.get("X-auth-refresh-token")
+            self.uuid = response.headers.get("DOMAIN_UUID")
+            if self.access_token:
+                domain_response = response.headers.get("DOMAINS")
+                if domain_response is None:
+                    raise Exception
+                self.all_domain = json.loads(domain_response)
+                if self.__domain is not None:
+                    for domain in self.all_domain:
+                        if "global/" + self.__domain.lower() == domain["name"].lower():
+                            logging.info(f"Domain set to {domain['name']}")
+                            self.uuid = domain["uuid"]
+                        else:
+                            logging.info(
+                                "Domain name entered not found in FMC, falling back to Global"
+                            )
+                if self.token_cache:
+                    self.store_cached_tokens()
+
+    def load_cached_tokens(self):
+        """
+        Adopt the tokens in the token cache if they are still usable.
+
+        :return: (bool) True if cached tokens are now in use.
+        """
+        logging.debug("In the Token load_cached_tokens() class method.")
+        entry = self.token_cache.load(self.cache_key, max_age=self.TOKEN_REFRESH_TIME)
+        if entry is None or entry["access_token"] == self.access_token:
+            return False
+        logging.info(f"Using tokens from the token cache {self.token_cache.path}.")
+        self.access_token = entry["access_token"]
+        self.refresh_token = entry["refresh_token"]
+        self.uuid = entry["uuid"]
+        self.all_domain = entry["all_domain"]
+        self.token_refreshes = entry["token_refreshes"]
+        self.token_creation_time = datetime.datetime.fromtimestamp(
+            entry["token_creation_time"]
+        )
+        self.token_renewal_time = datetime.datetime.fromtimestamp(
+            entry.get("token_renewal_time", entry["token_creation_time"])
+        )
+        return True
+
+    def store_cached_tokens(self):
+        """
+        Save the current tokens to the token cache.
+
+        :return: None
+        """
+        logging.debug("In the Token store_cached_tokens() class method.")
+        self.token_cache.store(
+            self.cache_key,
+            {
+                "access_token": self.access_token,
+                "refresh_token": self.refresh_token,
+                "uuid": self.uuid,
+                "all_domain": self.all_domain,
+                "token_refreshes": self.token_refreshes,
+                "token_creation_time": self.token_creation_time.timestamp(),
+                "token_renewal_time": self.token_renewal_time.timestamp(),
+            },
+            max_age=self.TOKEN_REFRESH_TIME,
+        )
 
     def get_token(self):
         """
@@ -436,18 +1023,122 @@ class Token(object):
         :return self.access_token
         """
         logging.debug("In the Token get_token() class method.")
-        if (
-            datetime.datetime.now()
-            > (
-                self.token_creation_time
-                + datetime.timedelta(seconds=self.TOKEN_REFRESH_TIME)
-            )
-            or self.access_token == None
-        ):
-            logging.info("Token expired.  Generating a new token.")
-            self.token_refreshes = 0
-            self.access_token = None
-            self.refresh_token = None
-            self.generate_tokens()
+        access_token = self.access_token
+        if access_token is not None and not self.is_expiring():
+            # Fast path.  No lock, so API calls never wait on a background refresh.
+            return access_token
+        with self.lock:
+            if self.is_expiring() or self.access_token == None:
+                logging.info("Token expired.  Generating a new token.")
+                self.token_refreshes = 0
+                self.access_token = None
+                self.refresh_token = None
+                self.generate_tokens()
+
+            return self.access_token
+
+    def is_expiring(self, seconds=None):
+        """
+        Check whether the access token is older than 'seconds'.
+
+        :param seconds (int): Age at which the token counts as expiring.  (Default is TOKEN_REFRESH_TIME)
+        :return: (bool)
+        """
+        if seconds is None:
+            seconds = self.TOKEN_REFRESH_TIME
+        return datetime.datetime.now() > (
+            self.token_renewal_time + datetime.timedelta(seconds=seconds)
+        )
+
+    def renew(self, rejected_token=None):
+        """
+        Replace an access token that the FMC rejected (HTTP 401) with new tokens.
+
+        When several threads get a 401 for the same token only the first one generates new tokens.  The others find
+        the token already replaced and just use the new one.
+
+        :param rejected_token (str): The access token that got the 401.  None forces new tokens.
+        :return self.access_token
+        """
+        logging.debug("In the Token renew() class method.")
+        with self.lock:
+            if rejected_token is None or rejected_token == self.access_token:
+                logging.info("Access token rejected.  Generating a new token.")
+                if self.token_cache:
+                    self.token_cache.discard(self.cache_key, self.access_token)
+                self.token_refreshes = 0
+                self.access_token = None
+                self.refresh_token = None
+                self.generate_tokens()
+            return self.access_token
+
+    def start_background_refresh(self):
+        """
+        Start a daemon thread that renews the tokens before they expire.
+
+        Tokens are refreshed via /auth/refreshtoken until MAX_REFRESHES is used up.  Then new tokens are requested
+        from /auth/generatetoken.  The old access token stays in use until its replacement arrives.
+
+        :return: None
+        """
+        logging.debug("In the Token start_background_refresh() class method.")
+        if self.refresher is not None and self.refresher.is_alive():
+            return
+        self.stop_refresher.clear()
+        self.refresher = threading.Thread(
+            target=self._background_refresh,
+            name="fmcapi-token-refresh",
+            daemon=True,
+        )
+        self.refresher.start()
+
+    def stop_background_refresh(self):
+        """
+        Stop the background refresh thread, if there is one.
+
+        :return: None
+        """
+        logging.debug("In the Token stop_background_refresh() class method.")
+        self.stop_refresher.set()
+        if self.refresher is not None:
+            self.refresher.join()
+            self.refresher = None
 
-        return self.access_token
+    def _background_refresh(self):
+        while True:
+            due = (
+                self.token_renewal_time
+                + datetime.timedelta(seconds=self.BACKGROUND_REFRESH_TIME)
+                - datetime.datetime.now()
+            ).total_seconds()
+            if self.stop_refresher.wait(max(due, 0)):
+                return
+            try:
+                self.refresh_ahead()
+            except Exception as err:
+                logging.error(
+                    f"Background token refresh failed: {err}.  Trying again in {self.BACKGROUND_RETRY_TIME} "
+                    f"seconds."
+                )
+                if self.stop_refresher.wait(self.BACKGROUND_RETRY_TIME):
+                    return
+
+    def refresh_ahead(self):
+        """
+        Renew the tokens now, before they expire.
+
+        :return: None
+        """
+        logging.debug("In the Token refresh_ahead() class method.")
+        with self.lock:
+            if not self.is_expiring(self.BACKGROUND_REFRESH_TIME):
+                # Renewed by another thread meanwhile.
+                return
+            previous_token = self.access_token
+            if self.token_refreshes < self.MAX_REFRESHES:
+                self.generate_tokens()
+            if self.access_token is None or self.access_token == previous_token:
+                self.generate_tokens(force_new=True)
+            if self.access_token is None:
+                self.access_token = previous_token
+                raise Exception("FMC did not return new tokens")
@@ -0,0 +1,123 @@
+"""
+Run the same work against many FMCs at once.
+
+The FMCFleet class logs in to a list of FMCs concurrently and then runs a callable, or an api_objects method, against
+each of them with bounded parallelism.  A fleet-wide job takes about as long as its slowest FMC instead of the sum of
+all of them.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from .fmc import FMC
+
+
+class FMCFleet(object):
+    """A group of FMC connections that are used together."""
+
+    logging.debug("In the FMCFleet() class.")
+
+    MAX_WORKERS = 8
+
+    def __init__(self, fmcs, max_workers=None, **kwargs):
+        """
+        Instantiate some variables prior to calling the __enter__() method.
+
+        :param fmcs (list): One dict of FMC class arguments (host, username, password, domain, etc.) per FMC.  An
+        optional "name" key labels the FMC in results.  (Default label is the host)
+        :param max_workers (int): Most FMCs worked on at the same time.  (Default is MAX_WORKERS)
+        :param **kwargs: FMC class arguments shared by every FMC, such as autodeploy or limit.
+        :return: None
+        """
+        logging.debug("In the FMCFleet __init__() class method.")
+        self.max_workers = max_workers or self.MAX_WORKERS
+        self.fmc_kwargs = {}
+        for fmc in fmcs:
+            fmc = dict(fmc)
+            name = fmc.pop("name", fmc.get("host"))
+            if name in self.fmc_kwargs:
+                raise ValueError(f"FMC name {name} is used more than once.")
+            self.fmc_kwargs[name] = dict(kwargs, **fmc)
+        self.fmcs = {}
+        self.connect_errors = {}
+
+    def __enter__(self):
+        """
+        Log in to every FMC concurrently.
+
+        FMCs that fail to log in are left out of self.fmcs and their exception is kept in self.connect_errors.
+
+        :return: self
+        """
+        logging.debug("In the FMCFleet __enter__() class method.")
+
+        def connect(name):
+            return FMC(**self.fmc_kwargs[name]).__enter__()
+
+        outcome = self._map(connect, list(self.fmc_kwargs))
+        self.fmcs = outcome["results"]
+        self.connect_errors = outcome["errors"]
+        for name, err in self.connect_errors.items():
+            logging.error(f"Could not connect to FMC {name}: {err}")
+        logging.info(f"Connected to {len(self.fmcs)} of {len(self.fmc_kwargs)} FMCs.")
+        return self
+
+    def __exit__(self, *args):
+        """
+        Run __exit__() (autodeploy) on every connected FMC concurrently.
+
+        :param args:
+        :return: None
+        """
+        logging.debug("In the FMCFleet __exit__() class method.")
+        outcome = self._map(lambda name: self.fmcs[name].__exit__(*args), self.fmcs)
+        for name, err in outcome["errors"].items():
+            logging.error(f"Error closing FMC {name}: {err}")
+
+    def _map(self, func, names):
+        results = {}
+        errors = {}
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="fmcapi-fleet"
+        ) as executor:
+            futures = {name: executor.submit(func, name) for name in names}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as err:
+                    errors[name] = err
+        return {"results": results, "errors": errors}
+
+    def run(self, func, *args, **kwargs):
+        """
+        Call func(fmc, *args, **kwargs) for every connected FMC, up to max_workers at a time.
+
+        :param func: Callable whose first argument is an FMC object.
+        :param args: Other positional arguments for func.
+        :param kwargs: Other keyword arguments for func.
+        :return: (dict) {"results": {name: return value}, "errors": {name: exception}}
+        """
+        logging.debug("In the FMCFleet run() class method.")
+        outcome = self._map(
+            lambda name: func(self.fmcs[name], *args, **kwargs), self.fmcs
+        )
+        for name, err in outcome["errors"].items():
+            logging.error(f"Error on FMC {name}: {err}")
+        return outcome
+
+    def run_object(self, api_class, method="get", **kwargs):
+        """
+        Instantiate an api_objects class on every connected FMC and call one of its methods.
+
+        e.g. fleet.run_object(fmcapi.Hosts, "get", name="dns-server")
+
+        :param api_class: An fmcapi class such as fmcapi.Hosts.
+        :param method (str): Name of the method to call.  (Default is get)
+        :param kwargs: Passed when instantiating api_class.
+        :return: (dict) {"results": {name: return value}, "errors": {name: exception}}
+        """
+        logging.debug("In the FMCFleet run_object() class method.")
+
+        def call(fmc):
+            return getattr(api_class(fmc=fmc, **kwargs), method)()
+
+        return self.run(call)
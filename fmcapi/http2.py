@@ -0,0 +1,148 @@
+"""
+HTTP/2 transport for the FMC class, built on httpx.
+
+With HTTP/1.1 every request in flight needs its own (TLS) connection to the FMC.  The HTTP2Session class offers the
+requests session methods used by FMC and Token (get, post, put, delete) on top of an httpx client speaking HTTP/2,
+which multiplexes all concurrent requests over a single connection.  It returns requests Response objects and raises
+requests exceptions so that everything above the transport, retries included, works unchanged.
+
+Needs the optional httpx package with HTTP/2 support:  pip install "httpx[http2]"
+"""
+
+import logging
+import threading
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class HTTP2Session(object):
+    """requests-like session that sends requests with an HTTP/2 httpx client."""
+
+    logging.debug("In the HTTP2Session() class.")
+
+    def __init__(self, verify=False, max_connections=10, http1=True):
+        """
+        Initialize the session.  The httpx client is created on first use.
+
+        :param verify (bool): Validate the FMC's certificate.  (Default is False)
+        :param max_connections (int): Most connections open at once.  (Default is 10)
+        :param http1 (bool): Fall back to HTTP/1.1 when the server does not negotiate HTTP/2, as with plain http://
+        URLs.  False insists on HTTP/2.  (Default is True)
+        :return: None
+        """
+        logging.debug("In the HTTP2Session __init__() class method.")
+        if httpx is None:
+            raise ImportError(
+                'The http2 transport needs httpx.  Install it with: pip install "httpx[http2]"'
+            )
+        self.verify = verify
+        self.max_connections = max_connections
+        self.http1 = http1
+        self.lock = threading.Lock()
+        self.client = None
+        self.counters = {}
+
+    def _client(self):
+        with self.lock:
+            if self.client is None:
+                self.client = httpx.Client(
+                    http2=True,
+                    http1=self.http1,
+                    verify=self.verify,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                    ),
+                )
+            return self.client
+
+    def request(
+        self, method, url, headers=None, json=None, auth=None, timeout=None, **kwargs
+    ):
+        """
+        Send a request and convert the httpx response into a requests Response.
+
+        :param method (str): HTTP method.
+        :param url (str): URL of the request.
+        :param headers (dict): Request headers.
+        :param json: JSON payload.
+        :param auth: requests HTTPBasicAuth, or a (username, password) tuple.
+        :param timeout: Seconds, or a (connect, read) tuple as with requests.
+        :param kwargs: verify and stream are accepted for compatibility and ignored.
+        :return: requests Response
+        """
+        if isinstance(auth, requests.auth.HTTPBasicAuth):
+            auth = (auth.username, auth.password)
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        try:
+            reply = self._client().request(
+                method.upper(),
+                url,
+                headers=headers,
+                json=json,
+                auth=auth,
+                timeout=timeout,
+            )
+        except httpx.ConnectTimeout as err:
+            raise requests.exceptions.ConnectTimeout(str(err)) from err
+        except httpx.TimeoutException as err:
+            raise requests.exceptions.ReadTimeout(str(err)) from err
+        except httpx.TransportError as err:
+            raise requests.exceptions.ConnectionError(str(err)) from err
+        with self.lock:
+            self.counters[reply.http_version] = (
+                self.counters.get(reply.http_version, 0) + 1
+            )
+        response = requests.Response()
+        response.status_code = reply.status_code
+        response.reason = reply.reason_phrase
+        response.headers = CaseInsensitiveDict(reply.headers)
+        response._content = reply.content
+        response._content_consumed = True
+        response.raw = None
+        response.wire_bytes = reply.num_bytes_downloaded
+        response.encoding = reply.encoding
+        response.url = str(reply.url)
+        response.elapsed = reply.elapsed
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("get", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("post", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("put", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("delete", url, **kwargs)
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def stats(self):
+        """
+        Responses received per HTTP version.
+
+        :return: (dict) e.g. {"HTTP/2": 120}
+        """
+        with self.lock:
+            return dict(self.counters)
+
+    def close(self):
+        """
+        Close the client's connections.  A new client is created if the session is used again.
+
+        :return: None
+        """
+        with self.lock:
+            if self.client is not None:
+                self.client.close()
+                self.client = None
@@ -0,0 +1,187 @@
+"""
+Count and time the API calls an FMC object makes.
+
+Every call made through FMC.send_to_api() (one per page when paging) is recorded in a Metrics registry by host, method,
+endpoint template and final HTTP status.  Endpoint templates have the UUIDs replaced with {id} so that calls for
+different objects are counted together.  The registry can be read as a dict with snapshot() or scraped as Prometheus
+text with prometheus().
+"""
+
+import logging
+import threading
+
+LABELS = ("host", "method", "endpoint", "status")
+
+
+class Metrics(object):
+    """Thread safe registry of request counters and latency histograms."""
+
+    logging.debug("In the Metrics() class.")
+
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self, buckets=None):
+        """
+        Initialize the registry.
+
+        :param buckets (tuple): Upper bounds, in seconds, of the latency histogram buckets.  (Default is
+        DEFAULT_BUCKETS)
+        :return: None
+        """
+        logging.debug("In the Metrics __init__() class method.")
+        self.buckets = tuple(sorted(buckets or self.DEFAULT_BUCKETS))
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def record(
+        self,
+        host,
+        method,
+        endpoint,
+        status,
+        response_bytes=0,
+        wire_bytes=0,
+        latency=0.0,
+        retries=0,
+        throttled=0,
+        reauthenticated=0,
+        rate_limit_wait=0.0,
+    ):
+        """
+        Add one API call to the registry.
+
+        :param host (str): FMC hostname/IP.
+        :param method (str): GET, POST, PUT or DELETE.
+        :param endpoint (str): Endpoint template from helper_functions.endpoint_template().
+        :param status (str): Final HTTP status, or the exception name if no response was received.
+        :param response_bytes (int): Size of the response body.
+        :param wire_bytes (int): Size of the response body as transferred, i.e. compressed.
+        :param latency (float): Seconds from the first attempt until the call returned, including retries and waits.
+        :param retries (int): Attempts made after the first one.
+        :param throttled (int): 429 responses received.
+        :param reauthenticated (int): 401 responses that made us renew the token.
+        :param rate_limit_wait (float): Seconds spent waiting on the rate limiter or a 429.
+        :return: None
+        """
+        key = (host, method.upper(), endpoint, str(status))
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {
+                    "count": 0,
+                    "response_bytes": 0,
+                    "wire_bytes": 0,
+                    "latency_sum": 0.0,
+                    "latency_buckets": [0] * len(self.buckets),
+                    "retries": 0,
+                    "throttled": 0,
+                    "reauthenticated": 0,
+                    "rate_limit_wait": 0.0,
+                }
+            series["count"] += 1
+            series["response_bytes"] += response_bytes
+            series["wire_bytes"] += wire_bytes
+            series["latency_sum"] += latency
+            for index, bound in enumerate(self.buckets):
+                if latency <= bound:
+                    series["latency_buckets"][index] += 1
+            series["retries"] += retries
+            series["throttled"] += throttled
+            series["reauthenticated"] += reauthenticated
+            series["rate_limit_wait"] += rate_limit_wait
+
+    def reset(self):
+        """
+        Forget everything recorded so far.
+
+        :return: None
+        """
+        with self.lock:
+            self.series = {}
+
+    def snapshot(self):
+        """
+        Copy of the registry.
+
+        :return: (dict) "requests" is a list with one dict per host/method/endpoint/status.  "totals" sums the
+        counters over all of them.
+        """
+        logging.debug("In the Metrics snapshot() class method.")
+        with self.lock:
+            series = [(key, dict(value)) for key, value in self.series.items()]
+        requests = []
+        totals = {
+            "count": 0,
+            "response_bytes": 0,
+            "wire_bytes": 0,
+            "latency_sum": 0.0,
+            "retries": 0,
+            "throttled": 0,
+            "reauthenticated": 0,
+            "rate_limit_wait": 0.0,
+        }
+        for key, value in sorted(series):
+            value["latency_buckets"] = dict(zip(self.buckets, value["latency_buckets"]))
+            requests.append(dict(zip(LABELS, key), **value))
+            for counter in totals:
+                totals[counter] += value[counter]
+        return {"requests": requests, "totals": totals}
+
+    def prometheus(self, prefix="fmcapi"):
+        """
+        Registry in the Prometheus text exposition format.
+
+        :param prefix (str): Prepended to every metric name.  (Default is fmcapi)
+        :return: (str) Metrics text.
+        """
+        logging.debug("In the Metrics prometheus() class method.")
+        requests = self.snapshot()["requests"]
+        counters = (
+            ("requests_total", "count", "API calls made."),
+            ("response_bytes_total", "response_bytes", "Bytes of response bodies."),
+            (
+                "wire_bytes_total",
+                "wire_bytes",
+                "Bytes of response bodies as transferred.",
+            ),
+            ("retries_total", "retries", "Attempts made after the first one."),
+            ("throttled_total", "throttled", "429 responses received."),
+            ("reauthentications_total", "reauthenticated", "401 responses received."),
+            (
+                "rate_limit_wait_seconds_total",
+                "rate_limit_wait",
+                "Seconds spent waiting on the rate limiter or a 429.",
+            ),
+        )
+        lines = []
+        for name, counter, help_text in counters:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for request in requests:
+                lines.append(
+                    f"{prefix}_{name}{{{_labels(request)}}} {request[counter]}"
+                )
+        name = f"{prefix}_request_duration_seconds"
+        lines.append(f"# HELP {name} Seconds taken by API calls, including retries.")
+        lines.append(f"# TYPE {name} histogram")
+        for request in requests:
+            labels = _labels(request)
+            for bound, count in request["latency_buckets"].items():
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {request["count"]}')
+            lines.append(f"{name}_sum{{{labels}}} {request['latency_sum']}")
+            lines.append(f"{name}_count{{{labels}}} {request['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(request):
+    pairs = []
+    for label in LABELS:
+        value = (
+            str(request[label])
+            .replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("\n", "\\n")
+        )
+        pairs.append(f'{label}="{value}"')
+    return ",".join(pairs)
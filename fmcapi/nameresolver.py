@@ -0,0 +1,103 @@
+"""
+Resolve object names without listing their collection every time.
+
+Most api_objects helpers (AccessRules.acp, AccessRules.source_zone, PhysicalInterfaces.device,
+IPv4StaticRoutes.gw, ...) look an object up with get(name=...) on a throwaway object, which sends a listing of the
+whole collection each time.  The NameResolver class loads each collection once, keeps its items by name for a
+limited time and answers those lookups from memory.  There is one per FMC object and collections are keyed by URL, so
+every domain has its own.  Any POST, PUT or DELETE sent through the same FMC object drops the collections it changed.
+"""
+
+import copy
+import logging
+import threading
+import time
+from .responsecache import normalize_url, changed_collections
+
+
+class NameResolver(object):
+    """Name to object lookup tables of whole collections, with a time to live."""
+
+    logging.debug("In the NameResolver() class.")
+
+    def __init__(self, ttl=300):
+        """
+        Initialize the resolver.
+
+        :param ttl (int): Seconds a loaded collection is used before it is loaded again.  (Default is 300)
+        :return: None
+        """
+        logging.debug("In the NameResolver __init__() class method.")
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.collections = {}
+        self.generation = 0
+        self.counters = {"hits": 0, "misses": 0, "loads": 0, "invalidations": 0}
+
+    def lookup(self, collection_url, name, load):
+        """
+        Find an object by name, loading its collection first if it is not loaded or has expired.
+
+        :param collection_url: (str) URL of the collection, without query.
+        :param name: (str) Name of the object.
+        :param load: Callable returning every item of the collection.
+        :return: (dict) A copy of the item, or None if the collection has no object by that name.
+        """
+        key = normalize_url(collection_url)
+        with self.lock:
+            entry = self.collections.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self.collections[key]
+                entry = None
+            generation = self.generation
+        if entry is None:
+            names = {}
+            for item in load():
+                if "name" in item:
+                    names.setdefault(item["name"], item)
+            entry = (time.monotonic() + self.ttl, names)
+            with self.lock:
+                self.counters["loads"] += 1
+                if generation == self.generation:
+                    self.collections[key] = entry
+        item = entry[1].get(name)
+        with self.lock:
+            self.counters["hits" if item is not None else "misses"] += 1
+        return copy.deepcopy(item)
+
+    def invalidate(self, method, url):
+        """
+        Drop the collections a write changed, along with those nested below them.
+
+        :param method: (str) POST, PUT or DELETE.
+        :param url: (str) URL of the write.
+        :return: None
+        """
+        prefixes = changed_collections(method, url)
+        with self.lock:
+            self.generation += 1
+            for key in list(self.collections):
+                if any(
+                    key == prefix or key.startswith(f"{prefix}/") for prefix in prefixes
+                ):
+                    del self.collections[key]
+                    self.counters["invalidations"] += 1
+
+    def clear(self):
+        """
+        Drop every loaded collection.
+
+        :return: None
+        """
+        with self.lock:
+            self.generation += 1
+            self.collections.clear()
+
+    def stats(self):
+        """
+        Resolver counters.
+
+        :return: (dict) hits, misses, loads, invalidations and collections currently loaded.
+        """
+        with self.lock:
+            return dict(self.counters, collections=len(self.collections))
@@ -0,0 +1,115 @@
+"""
+Pace the requests sent to the FMC.
+
+The FMC answers with a 429 once a client goes over its request budget (about 120 requests per minute).  Rather than
+hitting that wall and then sleeping for a fixed amount of time, the RateLimiter class spaces requests out so the budget
+is rarely exceeded and backs off adaptively on the 429s that still get through.
+"""
+
+import logging
+import threading
+import time
+from random import uniform
+
+
+class RateLimiter(object):
+    """
+    Token bucket shared by every thread (and, through AsyncFMC's worker pool, every coroutine) using an FMC object.
+
+    Each request takes one token.  Tokens are added back at 'rate' per 'per' seconds, up to 'burst' tokens.  On a 429
+    the refill rate is halved and all requests are held back for an exponentially growing delay.  Each successful
+    request then nudges the rate back up towards the configured budget.
+    """
+
+    logging.debug("In the RateLimiter() class.")
+
+    BACKOFF_START = 1
+    BACKOFF_MAX = 30
+    RECOVERY_STEP = 0.05
+    MIN_RATE_FACTOR = 0.1
+
+    def __init__(self, rate=120, per=60, burst=10):
+        """
+        Initialize the token bucket.
+
+        :param rate (int): Number of requests allowed every 'per' seconds.  (Default is 120)
+        :param per (int): Length, in seconds, of the window 'rate' applies to.  (Default is 60)
+        :param burst (int): Most requests that can be sent back to back after an idle period.  (Default is 10)
+        :return: None
+        """
+        logging.debug("In the RateLimiter __init__() class method.")
+        if rate <= 0 or per <= 0:
+            raise ValueError(
+                f"RateLimiter needs a positive rate and per, not rate={rate} and per={per}."
+            )
+        self.max_rate = rate / per
+        self.rate = self.max_rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.consecutive_429s = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(
+            self.burst, self.tokens + (now - self.last_refill) * self.rate
+        )
+        self.last_refill = now
+
+    def acquire(self):
+        """
+        Block until a request may be sent.
+
+        :return: (float) Seconds spent waiting.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = max(-self.tokens / self.rate, self.blocked_until - now, 0.0)
+        waited = 0.0
+        while wait > 0:
+            time.sleep(wait)
+            waited += wait
+            # The token is already taken.  Only a 429 that arrived while sleeping holds this request back further.
+            with self.lock:
+                wait = self.blocked_until - time.monotonic()
+        return waited
+
+    def on_success(self):
+        """
+        Record a request that was not rate limited and let the rate recover.
+
+        :return: None
+        """
+        with self.lock:
+            self.consecutive_429s = 0
+            if self.rate < self.max_rate:
+                self.rate = min(
+                    self.max_rate, self.rate + self.max_rate * self.RECOVERY_STEP
+                )
+
+    def on_too_many_requests(self, retry_after=None):
+        """
+        Record a 429 response.  Slow the refill rate and hold back every request for a while.
+
+        :param retry_after (float): Seconds the FMC asked us to wait, if it said.
+        :return: (float) Seconds requests will be held back.
+        """
+        with self.lock:
+            self.consecutive_429s += 1
+            self.rate = max(self.rate / 2, self.max_rate * self.MIN_RATE_FACTOR)
+            if retry_after is None:
+                backoff = min(
+                    self.BACKOFF_START * 2 ** (self.consecutive_429s - 1),
+                    self.BACKOFF_MAX,
+                )
+                backoff += uniform(0, backoff / 10)
+            else:
+                backoff = retry_after
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + backoff)
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+            return self.blocked_until - now
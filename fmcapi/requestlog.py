@@ -0,0 +1,175 @@
+"""
+Structured logging of FMC API requests.
+
+The RequestLogger class writes one JSON line per API call to the "fmcapi.requests" logger: a request ID, method, URL,
+status, attempts, timing, sizes and (redacted, truncated) headers and payloads.  Nothing is built unless that logger
+is enabled for the RequestLogger's level and the call is picked by sampling, so the cost when logging is off is a
+level check.
+"""
+
+import json
+import logging
+import os
+from random import random
+
+REDACTED = "REDACTED"
+
+
+class RequestLogger(object):
+    """Builds and emits per-request log records on demand."""
+
+    logging.debug("In the RequestLogger() class.")
+
+    REDACT_KEYS = (
+        "password",
+        "secret",
+        "sharedkey",
+        "authorization",
+        "x-auth-access-token",
+        "x-auth-refresh-token",
+    )
+
+    def __init__(
+        self,
+        logger="fmcapi.requests",
+        level=logging.DEBUG,
+        sample_rate=1.0,
+        max_payload=1024,
+        log_payloads=True,
+        redact_keys=None,
+    ):
+        """
+        Initialize the RequestLogger.
+
+        :param logger (str): Name of the logger to write to.  (Default is fmcapi.requests)
+        :param level (int): Level of the records.  (Default is logging.DEBUG)
+        :param sample_rate (float): Share of successful calls to log, 0 to 1.  Failed calls are always logged.
+        (Default is 1)
+        :param max_payload (int): Characters of each payload to keep.  (Default is 1024)
+        :param log_payloads (bool): Include the request and response bodies.  (Default is True)
+        :param redact_keys (tuple): Header and JSON keys whose values are replaced with REDACTED, matched without
+        regard to case.  (Default is REDACT_KEYS)
+        :return: None
+        """
+        logging.debug("In the RequestLogger __init__() class method.")
+        self.logger = logging.getLogger(logger)
+        self.level = level
+        self.sample_rate = sample_rate
+        self.max_payload = max_payload
+        self.log_payloads = log_payloads
+        self.redact_keys = {key.lower() for key in (redact_keys or self.REDACT_KEYS)}
+
+    def wanted(self, failed=False):
+        """
+        Decide whether a call should be logged.
+
+        :param failed (bool): The call failed.
+        :return: (bool)
+        """
+        if not self.logger.isEnabledFor(self.level):
+            return False
+        return failed or self.sample_rate >= 1 or random() < self.sample_rate
+
+    def redact(self, data):
+        """
+        Copy of data with the values of redact_keys replaced.
+
+        :param data: JSON-like data (dicts, lists and scalars).
+        :return: Redacted copy.
+        """
+        if isinstance(data, dict):
+            return {
+                key: (
+                    REDACTED
+                    if str(key).lower() in self.redact_keys
+                    else self.redact(value)
+                )
+                for key, value in data.items()
+            }
+        if isinstance(data, list):
+            return [self.redact(value) for value in data]
+        return data
+
+    def truncate(self, text):
+        """
+        Cut text down to max_payload characters.
+
+        :param text (str): Text to shorten.
+        :return: (str)
+        """
+        if len(text) <= self.max_payload:
+            return text
+        return f"{text[: self.max_payload]}...({len(text) - self.max_payload} more characters)"
+
+    @staticmethod
+    def request_bytes(json_data, response=None):
+        """
+        Size in bytes of the request body that was sent.
+
+        :param json_data: Request payload.
+        :param response: The final requests Response, whose prepared request holds the body as sent.  (Default is None)
+        :return: (int)
+        """
+        body = getattr(getattr(response, "request", None), "body", None)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if isinstance(body, bytes):
+            return len(body)
+        if json_data is None:
+            return 0
+        return len(json.dumps(json_data).encode("utf-8"))
+
+    def log(
+        self,
+        method,
+        url,
+        headers,
+        json_data,
+        status,
+        attempts,
+        elapsed,
+        rate_limit_wait,
+        response=None,
+        wire_bytes=0,
+    ):
+        """
+        Build and emit the record of one call.  Only call this after wanted() said so.
+
+        :param method (str): HTTP method.
+        :param url (str): URL of the call.
+        :param headers (dict): Request headers.
+        :param json_data: Request payload.
+        :param status: HTTP status, or the exception name if there was no response.
+        :param attempts (int): Requests sent, including retries.
+        :param elapsed (float): Seconds the call took.
+        :param rate_limit_wait (float): Seconds spent waiting on the rate limiter or a 429.
+        :param response: The final requests Response, if any.
+        :param wire_bytes (int): Size of the response body as transferred, i.e. compressed.
+        :return: (dict) The record.
+        """
+        payload = json.dumps(self.redact(json_data)) if json_data is not None else ""
+        record = {
+            "request_id": os.urandom(6).hex(),
+            "method": method.upper(),
+            "url": url,
+            "status": status,
+            "attempts": attempts,
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "rate_limit_wait_ms": round(rate_limit_wait * 1000, 2),
+            "request_bytes": self.request_bytes(json_data, response),
+            "response_bytes": len(response.content) if response is not None else 0,
+            "wire_bytes": wire_bytes,
+            "request_headers": self.redact(dict(headers or {})),
+        }
+        if self.log_payloads:
+            record["request_payload"] = self.truncate(payload)
+            if response is not None:
+                try:
+                    body = json.dumps(self.redact(json.loads(response.content)))
+                except ValueError:
+                    body = response.content.decode("utf-8", "replace")
+                record["response_payload"] = self.truncate(body)
+        self.logger.log(
+            self.level, json.dumps(record), extra={"fmcapi_request": record}
+        )
+        return record
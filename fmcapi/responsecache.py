@@ -0,0 +1,178 @@
+"""
+Cache GET responses for the length of a run.
+
+Reference data such as security zones, variable sets, intrusion and file policies, VLAN tags and port objects is read
+over and over by the api_objects helpers.  The ResponseCache class keeps full GET responses (all pages) keyed by
+normalized URL, for a limited time and up to a limited number of entries.  Any POST, PUT or DELETE sent through the
+same FMC object drops the cached responses of the collection it changed.
+"""
+
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Collections whose listings include the objects of other collections.
+AGGREGATE_COLLECTIONS = {
+    "/object/networkaddresses": ("/object/hosts", "/object/networks", "/object/ranges"),
+    "/object/ports": (
+        "/object/protocolportobjects",
+        "/object/icmpv4objects",
+        "/object/icmpv6objects",
+    ),
+}
+
+
+def normalize_url(url):
+    """
+    Put a URL in a canonical form: lower case scheme and host, no trailing slash and sorted query parameters.
+
+    :param url: (str) URL to normalize.
+    :return: (str) Normalized URL.
+    """
+    scheme, netloc, path, query, fragment = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)), safe=",")
+    return urlunsplit((scheme.lower(), netloc.lower(), path.rstrip("/"), query, ""))
+
+
+def changed_collections(method, url):
+    """
+    Work out which collections a write changes.
+
+    A POST changes the collection in its URL.  A PUT or DELETE changes the collection holding the object in its URL.
+    Collections that aggregate the changed one (e.g. networkaddresses for hosts) change too.
+
+    :param method: (str) POST, PUT or DELETE.
+    :param url: (str) URL of the write.
+    :return: (list) Normalized URLs of the changed collections.
+    """
+    scheme, netloc, path = urlsplit(normalize_url(url))[:3]
+    if method.lower() != "post":
+        path = path.rsplit("/", 1)[0]
+    paths = [path]
+    for aggregate, members in AGGREGATE_COLLECTIONS.items():
+        for member in members:
+            if path.endswith(member):
+                paths.append(path[: -len(member)] + aggregate)
+    return [urlunsplit((scheme, netloc, path, "", "")) for path in paths]
+
+
+class ResponseCache(object):
+    """Size bounded LRU cache of GET responses with a time to live."""
+
+    logging.debug("In the ResponseCache() class.")
+
+    EXCLUDE = ("/auth/", "/deployment/", "/job/", "/health/", "/audit/")
+
+    def __init__(self, ttl=300, max_entries=256, exclude=None):
+        """
+        Initialize the cache.
+
+        :param ttl (int): Seconds a response is served from the cache.  (Default is 300)
+        :param max_entries (int): Most responses kept.  The least recently used is dropped first.  (Default is 256)
+        :param exclude (tuple): URL path fragments that are never cached, such as ones for status that changes on
+        its own.  (Default is EXCLUDE)
+        :return: None
+        """
+        logging.debug("In the ResponseCache __init__() class method.")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.exclude = self.EXCLUDE if exclude is None else exclude
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.generation = 0
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def cacheable(self, url):
+        """
+        Whether GETs of this URL may be cached.
+
+        :param url: (str) URL of the GET.
+        :return: (bool)
+        """
+        path = urlsplit(url).path
+        return not any(fragment in path for fragment in self.exclude)
+
+    def get(self, url):
+        """
+        Look up a response.
+
+        :param url: (str) URL of the GET.
+        :return: (dict) A copy of the cached response, or None.
+        """
+        key = normalize_url(url)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.counters["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.counters["hits"] += 1
+            response = entry[1]
+        return copy.deepcopy(response)
+
+    def put(self, url, response, generation):
+        """
+        Store a response, unless a write invalidated the cache since the GET was sent.
+
+        :param url: (str) URL of the GET.
+        :param response: (dict) The response.
+        :param generation: (int) Value of self.generation when the GET was sent.
+        :return: None
+        """
+        response = copy.deepcopy(response)
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[normalize_url(url)] = (time.monotonic() + self.ttl, response)
+            self.entries.move_to_end(normalize_url(url))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def invalidate(self, method, url):
+        """
+        Drop the cached responses of the collection a write changed.
+
+        A POST changes the collection in its URL.  A PUT or DELETE changes the collection holding the object in its
+        URL.  Responses of that collection, its objects and their sub-collections, and of collections that aggregate
+        it (e.g. networkaddresses for hosts) are dropped.
+
+        :param method: (str) POST, PUT or DELETE.
+        :param url: (str) URL of the write.
+        :return: None
+        """
+        prefixes = changed_collections(method, url)
+        with self.lock:
+            self.generation += 1
+            for key in list(self.entries):
+                base = key.split("?", 1)[0]
+                if any(
+                    base == prefix or base.startswith(f"{prefix}/")
+                    for prefix in prefixes
+                ):
+                    del self.entries[key]
+                    self.counters["invalidations"] += 1
+
+    def clear(self):
+        """
+        Drop every cached response.
+
+        :return: None
+        """
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+    def stats(self):
+        """
+        Cache counters.
+
+        :return: (dict) hits, misses, evictions, invalidations and current entries.
+        """
+        with self.lock:
+            return dict(self.counters, entries=len(self.entries))
@@ -0,0 +1,137 @@
+"""
+Decide whether, and when, a failed request to the FMC is tried again.
+
+Connection resets, read timeouts and 5xx responses are usually transient.  The RetryPolicy class describes which of
+these failures are retried, how many times and with what delay, so that long running jobs survive a short blip.
+"""
+
+import datetime
+import logging
+import requests
+from email.utils import parsedate_to_datetime
+from random import uniform
+
+
+class RetryPolicy(object):
+    """Retry settings used by FMC.send_to_api()."""
+
+    logging.debug("In the RetryPolicy() class.")
+
+    RETRY_STATUSES = (500, 502, 503, 504)
+    RETRY_EXCEPTIONS = (
+        requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+    )
+    # Requests that certainly never reached the FMC.  These are safe to retry even for POST.
+    NOT_SENT_EXCEPTIONS = (requests.exceptions.ConnectTimeout,)
+    NOT_PROCESSED_STATUSES = (503,)
+    IDEMPOTENT_METHODS = ("get", "put", "delete")
+
+    def __init__(
+        self,
+        max_attempts=5,
+        backoff_factor=1,
+        backoff_max=60,
+        jitter=True,
+        retry_statuses=RETRY_STATUSES,
+        retry_exceptions=RETRY_EXCEPTIONS,
+        retry_post=False,
+        respect_retry_after=True,
+    ):
+        """
+        Initialize the retry settings.
+
+        :param max_attempts (int): Total tries of a request, including the first.  1 disables retries.  (Default is 5)
+        :param backoff_factor (float): Delay, in seconds, before the first retry.  It doubles on each retry.
+        (Default is 1)
+        :param backoff_max (float): Longest delay between tries, in seconds.  (Default is 60)
+        :param jitter (bool): Randomize each delay between half and all of its value.  (Default is True)
+        :param retry_statuses (tuple): HTTP status codes that are retried.  (Default is RETRY_STATUSES)
+        :param retry_exceptions (tuple): Exception classes that are retried.  (Default is RETRY_EXCEPTIONS)
+        :param retry_post (bool): Retry POSTs on any retryable failure.  POST is not idempotent so by default it is
+        only retried when the FMC cannot have acted on it.  (Default is False)
+        :param respect_retry_after (bool): Wait as long as a Retry-After response header asks.  (Default is True)
+        :return: None
+        """
+        logging.debug("In the RetryPolicy __init__() class method.")
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_statuses = tuple(retry_statuses)
+        self.retry_exceptions = tuple(retry_exceptions)
+        self.retry_post = retry_post
+        self.respect_retry_after = respect_retry_after
+
+    def _is_idempotent(self, method):
+        return self.retry_post or method.lower() in self.IDEMPOTENT_METHODS
+
+    def should_retry_status(self, method, status_code, attempt):
+        """
+        Check whether a response with this status code should be retried.
+
+        :param method (str): HTTP method of the request.
+        :param status_code (int): HTTP status code of the response.
+        :param attempt (int): Number of tries made so far.
+        :return: (bool)
+        """
+        if attempt >= self.max_attempts or status_code not in self.retry_statuses:
+            return False
+        return self._is_idempotent(method) or status_code in self.NOT_PROCESSED_STATUSES
+
+    def should_retry_exception(self, method, exception, attempt):
+        """
+        Check whether a request that raised this exception should be retried.
+
+        :param method (str): HTTP method of the request.
+        :param exception (Exception): What the HTTP library raised.
+        :param attempt (int): Number of tries made so far.
+        :return: (bool)
+        """
+        if attempt >= self.max_attempts or not isinstance(
+            exception, self.retry_exceptions
+        ):
+            return False
+        return self._is_idempotent(method) or isinstance(
+            exception, self.NOT_SENT_EXCEPTIONS
+        )
+
+    def retry_after(self, response):
+        """
+        Read the Retry-After header of a response.
+
+        :param response: Response from the FMC.
+        :return: (float) Seconds to wait or None if there is no usable header.
+        """
+        if not self.respect_retry_after or response is None:
+            return None
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            logging.debug(f"Ignoring unreadable Retry-After header: {value}")
+            return None
+        return max((when - datetime.datetime.now(when.tzinfo)).total_seconds(), 0.0)
+
+    def backoff(self, attempt, response=None):
+        """
+        Work out how long to wait before the next try.
+
+        :param attempt (int): Number of tries made so far.
+        :param response: Response from the FMC, if there was one.  Its Retry-After header wins when present.
+        :return: (float) Seconds to wait.
+        """
+        retry_after = self.retry_after(response)
+        if retry_after is not None:
+            return retry_after
+        delay = min(self.backoff_factor * 2 ** (attempt - 1), self.backoff_max)
+        if self.jitter:
+            delay = uniform(delay / 2, delay)
+        return delay
@@ -0,0 +1,139 @@
+"""
+Share the FMC's rate budget between requests of different importance.
+
+On their own, requests waiting on the RateLimiter are let through in whatever order their threads wake up, so one
+caller sending thousands of requests (a nightly export) pushes everybody else's single requests (a bot looking up one
+object) to the back for minutes.  The RequestScheduler class queues the requests per priority class and hands out the
+rate limiter's tokens by weighted fair queueing: every class that has requests waiting gets a share of the budget in
+proportion to its weight, and first come first served within a class.
+
+The priority of the requests sent by a block of code is set with request_priority():
+
+    with fmcapi.request_priority("bulk"):
+        fmcapi.Hosts(fmc=fmc).get()
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+current_priority = ContextVar("fmcapi_request_priority", default="normal")
+
+
+@contextmanager
+def request_priority(priority):
+    """
+    Send the requests made in the body of a with statement, including those made by worker threads it starts through
+    fmcapi, with the given priority.
+
+    :param priority (str): Priority class, e.g. "interactive", "normal" or "bulk".
+    :return: None
+    """
+    token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class RequestScheduler(object):
+    """Weighted fair queue in front of a RateLimiter, shared by every thread using an FMC object."""
+
+    logging.debug("In the RequestScheduler() class.")
+
+    WEIGHTS = {"interactive": 16, "normal": 4, "bulk": 1}
+
+    def __init__(self, rate_limiter, weights=None):
+        """
+        Initialize the scheduler.
+
+        :param rate_limiter (RateLimiter): Rate limiter whose tokens are handed out.
+        :param weights (dict): Share of the rate budget of each priority class when all of them are busy.
+        (Default is WEIGHTS)
+        :return: None
+        """
+        logging.debug("In the RequestScheduler __init__() class method.")
+        self.rate_limiter = rate_limiter
+        self.weights = dict(weights or self.WEIGHTS)
+        self.queues = {priority: deque() for priority in self.weights}
+        # Virtual finish time of each class.  The class with the lowest one goes next.
+        self.passes = {priority: 0.0 for priority in self.weights}
+        self.virtual_time = 0.0
+        self.dispatching = False
+        self.counters = {
+            priority: {"requests": 0, "wait": 0.0} for priority in self.weights
+        }
+        self.condition = threading.Condition()
+
+    def _next(self):
+        waiting = [priority for priority in self.queues if self.queues[priority]]
+        if not waiting:
+            return None
+        priority = min(
+            waiting,
+            key=lambda name: (self.passes[name], -self.weights[name]),
+        )
+        return self.queues[priority][0]
+
+    def acquire(self, priority=None):
+        """
+        Block until a request may be sent.
+
+        :param priority (str): Priority class of the request.  (Default is the one set by request_priority())
+        :return: (float) Seconds spent waiting, in the queue and on the rate limiter.
+        """
+        priority = priority or current_priority.get()
+        if priority not in self.weights:
+            raise ValueError(
+                f"Unknown request priority {priority}.  Choose from {list(self.weights)}."
+            )
+        start = time.monotonic()
+        ticket = object()
+        with self.condition:
+            queue = self.queues[priority]
+            if not queue:
+                self.passes[priority] = max(self.passes[priority], self.virtual_time)
+            queue.append(ticket)
+            try:
+                while self.dispatching or self._next() is not ticket:
+                    self.condition.wait()
+            except BaseException:
+                queue.remove(ticket)
+                self.condition.notify_all()
+                raise
+            self.dispatching = True
+        try:
+            self.rate_limiter.acquire()
+        finally:
+            with self.condition:
+                self.queues[priority].popleft()
+                self.virtual_time = self.passes[priority]
+                self.passes[priority] += 1 / self.weights[priority]
+                self.dispatching = False
+                waited = time.monotonic() - start
+                self.counters[priority]["requests"] += 1
+                self.counters[priority]["wait"] += waited
+                self.condition.notify_all()
+        return waited
+
+    def stats(self):
+        """
+        Snapshot of the scheduler.
+
+        :return: (dict) Per priority class: requests let through, total and average seconds waited, and requests
+        waiting now.
+        """
+        with self.condition:
+            stats = {}
+            for priority, counters in self.counters.items():
+                stats[priority] = dict(counters)
+                stats[priority]["average_wait"] = (
+                    counters["wait"] / counters["requests"]
+                    if counters["requests"]
+                    else 0.0
+                )
+                stats[priority]["queued"] = len(self.queues[priority])
+            return stats
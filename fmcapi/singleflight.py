@@ -0,0 +1,95 @@
+"""
+Share one GET between callers that ask for the same thing at the same time.
+
+When many threads (or AsyncFMC coroutines) build rules in parallel they tend to GET the same listings, e.g.
+/object/networkaddresses?expanded=true, at the same moment.  The SingleFlight class lets the first caller send the
+request while the others wait for it and get a copy of its result, saving both rate limit budget and bandwidth.
+"""
+
+import copy
+import logging
+import threading
+
+
+class Flight(object):
+    """One call in progress."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Coalesces identical concurrent calls."""
+
+    logging.debug("In the SingleFlight() class.")
+
+    def __init__(self):
+        """
+        Initialize the SingleFlight object.
+
+        :return: None
+        """
+        logging.debug("In the SingleFlight __init__() class method.")
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.counters = {"calls": 0, "coalesced": 0}
+
+    def do(self, key, func):
+        """
+        Call func(), unless a call with the same key is in progress, in which case wait for it and share its result.
+
+        :param key: Identifies calls that are interchangeable, e.g. a normalized URL.
+        :param func: Callable that makes the call.
+        :return: What func returned.  Callers that waited get their own deep copy.
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is None:
+                flight = self.flights[key] = Flight()
+                self.counters["calls"] += 1
+                leader = True
+            else:
+                flight.waiters += 1
+                self.counters["coalesced"] += 1
+                leader = False
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+        try:
+            result = func()
+        except BaseException as err:
+            flight.error = err
+            raise
+        finally:
+            with self.lock:
+                if self.flights.get(key) is flight:
+                    del self.flights[key]
+                waiters = flight.waiters
+            if flight.error is None and waiters:
+                # Snapshot before the leader's caller can change the result.
+                flight.result = copy.deepcopy(result)
+            flight.done.set()
+        return result
+
+    def forget(self):
+        """
+        Make later callers start new calls instead of joining the ones in progress, e.g. after a write.
+
+        :return: None
+        """
+        with self.lock:
+            self.flights = {}
+
+    def stats(self):
+        """
+        Coalescing counters.
+
+        :return: (dict) calls actually made, coalesced calls that shared one, and calls in progress.
+        """
+        with self.lock:
+            return dict(self.counters, in_flight=len(self.flights))
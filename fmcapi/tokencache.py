@@ -0,0 +1,164 @@
+"""
+Share FMC tokens between processes and runs.
+
+Every new Token normally logs in to the FMC with /auth/generatetoken.  That costs a round-trip and one of the FMC's
+limited sessions per user.  The TokenCache class keeps valid access/refresh token pairs in a file so that short-lived
+scripts, cron jobs and parallel processes using the same host/user/domain can reuse them.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class TokenCache(object):
+    """On-disk token store protected by a file lock."""
+
+    logging.debug("In the TokenCache() class.")
+
+    DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".fmcapi", "token_cache.json")
+
+    def __init__(self, path=None):
+        """
+        Initialize the TokenCache object.
+
+        :param path (str): File to keep the tokens in.  A ".lock" file is created next to it.  (Default is
+        DEFAULT_PATH)
+        :return: None
+        """
+        logging.debug("In the TokenCache __init__() class method.")
+        self.path = path or self.DEFAULT_PATH
+        self.lock_path = f"{self.path}.lock"
+        self.thread_lock = threading.RLock()
+        self.lock_depth = 0
+        self.lock_file = None
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    @staticmethod
+    def key(host, username, domain=None):
+        """
+        Build the cache key of a host/user/domain combination.
+
+        :param host (str): FMC hostname/IP.
+        :param username (str): FMC user.
+        :param domain (str): Domain name.  None means Global.
+        :return: (str) key
+        """
+        return hashlib.sha256(f"{host}|{username}|{domain}".encode()).hexdigest()
+
+    @contextmanager
+    def lock(self):
+        """
+        Hold the cache file lock.  Reentrant within a thread and exclusive across threads and processes.
+
+        :return: None
+        """
+        with self.thread_lock:
+            if self.lock_depth == 0:
+                self.lock_file = open(self.lock_path, "a+")
+                if fcntl:
+                    fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+                else:
+                    self.lock_file.seek(0)
+                    msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            self.lock_depth += 1
+            try:
+                yield
+            finally:
+                self.lock_depth -= 1
+                if self.lock_depth == 0:
+                    if fcntl:
+                        fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+                    else:
+                        self.lock_file.seek(0)
+                        msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                    self.lock_file.close()
+                    self.lock_file = None
+
+    def _read(self):
+        try:
+            with open(self.path) as cache_file:
+                return json.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logging.warning(
+                f"Token cache {self.path} is unreadable.  Starting a new one."
+            )
+            return {}
+
+    def _write(self, entries):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".token_cache")
+        try:
+            os.chmod(tmp_path, 0o600)
+            with os.fdopen(fd, "w") as cache_file:
+                json.dump(entries, cache_file)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def _renewed(entry):
+        return entry.get("token_renewal_time", entry["token_creation_time"])
+
+    def load(self, key, max_age):
+        """
+        Get the cached tokens for a key if they are still young enough to use.
+
+        :param key (str): Cache key from key().
+        :param max_age (int): Seconds after they were last renewed that the tokens stop being usable.
+        :return: (dict) Cached token entry or None.
+        """
+        with self.lock():
+            entry = self._read().get(key)
+        if entry is None or time.time() > self._renewed(entry) + max_age:
+            return None
+        return entry
+
+    def store(self, key, entry, max_age):
+        """
+        Save the tokens for a key and drop entries that have aged out.
+
+        :param key (str): Cache key from key().
+        :param entry (dict): access_token, refresh_token, uuid, all_domain, token_refreshes, token_creation_time and
+        token_renewal_time (epoch seconds).
+        :param max_age (int): Seconds after they were last renewed that the tokens stop being usable.
+        :return: None
+        """
+        with self.lock():
+            now = time.time()
+            entries = {
+                cached_key: cached_entry
+                for cached_key, cached_entry in self._read().items()
+                if now <= self._renewed(cached_entry) + max_age
+            }
+            entries[key] = entry
+            self._write(entries)
+
+    def discard(self, key, access_token):
+        """
+        Forget the tokens for a key, but only if they are the ones the FMC rejected.
+
+        :param key (str): Cache key from key().
+        :param access_token (str): The access token that is no longer valid.
+        :return: None
+        """
+        with self.lock():
+            entries = self._read()
+            if key in entries and entries[key]["access_token"] == access_token:
+                del entries[key]
+                self._write(entries)
@@ -0,0 +1,262 @@
+"""
+Trace which fmcapi calls generate which API traffic.
+
+A Tracer records nested spans: one per api_objects method call (get, post, and helpers such as
+AccessRules.source_network), one per FMC.send_to_api() call and one per HTTP request.  Each span knows its parent, so
+the export shows which helper made which requests and where the time went.  Tracing is off unless a Tracer is given
+to the FMC object.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+current_span = ContextVar("fmcapi_current_span", default=None)
+
+# Bookkeeping methods that would only add noise to a trace.
+UNTRACED_METHODS = (
+    "format_data",
+    "parse_kwargs",
+    "valid_for_get",
+    "valid_for_post",
+    "valid_for_put",
+    "valid_for_delete",
+)
+
+
+class Span(object):
+    """One timed operation within a trace."""
+
+    def __init__(self, tracer, name, parent=None, attributes=None):
+        """
+        Start the span.  Use Tracer.start_span() or Tracer.span() rather than creating a Span directly.
+
+        :param tracer (Tracer): Tracer that keeps the span once it is finished.
+        :param name (str): What is being timed.
+        :param parent (Span): Enclosing span.  (Default is None, a new trace)
+        :param attributes (dict): Extra details to keep with the span.
+        :return: None
+        """
+        self.tracer = tracer
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.start_time = time.time()
+        self.duration = None
+        self._start = time.perf_counter()
+        self._token = current_span.set(self)
+
+    def set(self, **attributes):
+        """
+        Add details to the span.
+
+        :return: None
+        """
+        self.attributes.update(attributes)
+
+    def finish(self, error=None):
+        """
+        End the span and hand it to its tracer.
+
+        :param error (Exception): Exception that ended the operation, if any.
+        :return: None
+        """
+        self.duration = time.perf_counter() - self._start
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        current_span.reset(self._token)
+        self.tracer.add(self)
+
+    def to_dict(self):
+        """
+        Span as a JSON friendly dict.
+
+        :return: (dict)
+        """
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Tracer(object):
+    """Collects finished spans."""
+
+    logging.debug("In the Tracer() class.")
+
+    MAX_SPANS = 100000
+
+    def __init__(self, max_spans=None):
+        """
+        Initialize the Tracer.
+
+        :param max_spans (int): Finished spans to keep.  Older ones are dropped.  (Default is MAX_SPANS)
+        :return: None
+        """
+        logging.debug("In the Tracer __init__() class method.")
+        self.max_spans = max_spans or self.MAX_SPANS
+        self.lock = threading.Lock()
+        self.spans = []
+        self.dropped = 0
+
+    def start_span(self, name, **attributes):
+        """
+        Start a span as a child of the current one.  It becomes the current span until its finish() is called.
+
+        :param name (str): What is being timed.
+        :param attributes: Extra details to keep with the span.
+        :return: (Span)
+        """
+        return Span(self, name, parent=current_span.get(), attributes=attributes)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Time the body of a with statement.
+
+        e.g. with fmc.tracer.span("nightly cleanup"): ...
+
+        :param name (str): What is being timed.
+        :param attributes: Extra details to keep with the span.
+        :return: (Span)
+        """
+        span = self.start_span(name, **attributes)
+        try:
+            yield span
+        except BaseException as err:
+            span.finish(error=err)
+            raise
+        span.finish()
+
+    def add(self, span):
+        """
+        Keep a finished span.
+
+        :param span (Span): The span.
+        :return: None
+        """
+        with self.lock:
+            self.spans.append(span)
+            if len(self.spans) > self.max_spans:
+                del self.spans[0]
+                self.dropped += 1
+
+    def reset(self):
+        """
+        Forget all finished spans.
+
+        :return: None
+        """
+        with self.lock:
+            self.spans = []
+            self.dropped = 0
+
+    def export(self):
+        """
+        Finished spans, oldest first.
+
+        :return: (list) One dict per span.
+        """
+        with self.lock:
+            spans = list(self.spans)
+        return sorted(
+            (span.to_dict() for span in spans), key=lambda span: span["start_time"]
+        )
+
+    def tree(self):
+        """
+        Finished spans nested under their parents, for a flame graph style breakdown.
+
+        Each span gets a "children" list and a "self_time", its duration less that of its children.  Spans whose
+        parent is not (yet) finished are treated as roots.
+
+        :return: (list) Root spans.
+        """
+        spans = self.export()
+        by_id = {span["span_id"]: dict(span, children=[]) for span in spans}
+        roots = []
+        for span in by_id.values():
+            parent = by_id.get(span["parent_id"])
+            if parent is None:
+                roots.append(span)
+            else:
+                parent["children"].append(span)
+        for span in by_id.values():
+            span["self_time"] = span["duration"] - sum(
+                child["duration"] for child in span["children"]
+            )
+        return roots
+
+    def to_json(self, path=None, nested=True):
+        """
+        Export the spans as JSON.
+
+        :param path (str): File to write to.  (Default is None, just return the JSON)
+        :param nested (bool): Export tree() rather than the flat export().  (Default is True)
+        :return: (str) JSON
+        """
+        logging.debug("In the Tracer to_json() class method.")
+        text = json.dumps(self.tree() if nested else self.export(), indent=2)
+        if path:
+            with open(path, "w") as json_file:
+                json_file.write(text)
+        return text
+
+
+def traced(func):
+    """
+    Decorate an api_objects method so that it is timed in a span when its FMC has a tracer.
+
+    :param func: The method.
+    :return: Wrapped method.
+    """
+    if getattr(func, "__traced__", False):
+        return func
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        tracer = getattr(getattr(self, "fmc", None), "tracer", None)
+        # Anything else, such as the mock FMC objects used in tests, is not traced.
+        if not isinstance(tracer, Tracer):
+            return func(self, *args, **kwargs)
+        with tracer.span(func.__qualname__, object=type(self).__name__):
+            return func(self, *args, **kwargs)
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def trace_methods(cls):
+    """
+    Apply traced() to the public methods defined in a class.
+
+    UNTRACED_METHODS, properties, static/class methods, generators and coroutines are left alone.
+
+    :param cls: The class.
+    :return: None
+    """
+    for name, value in list(vars(cls).items()):
+        if (
+            name.startswith("_")
+            or name in UNTRACED_METHODS
+            or not inspect.isfunction(value)
+            or inspect.isgeneratorfunction(value)
+            or inspect.iscoroutinefunction(value)
+        ):
+            continue
+        setattr(cls, name, traced(value))
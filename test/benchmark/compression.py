@@ -0,0 +1,89 @@
+"""
+Measure transfer bytes and wall time of large listings with and without compression.
+
+A listing of expanded host objects is fetched from an FMCEmulator whose responses are paced to a given bandwidth and
+delayed by a given latency, imitating a WAN link to a remote FMC, and again with no limits, imitating a LAN.  The emulator
+runs in this process, so process CPU includes its compression work as well as the client's decompression and
+decoding.  Run from the top of the repo with: PYTHONPATH=. python test/benchmark/compression.py [--objects 10000] [--output results.json]
+"""
+
+import argparse
+import json
+import time
+import fmcapi
+
+LINKS = {
+    "lan": {"bandwidth": None, "latency": 0.0},
+    "wan_50mbit": {"bandwidth": 50 * 1000 * 1000 // 8, "latency": 0.04},
+    "wan_10mbit": {"bandwidth": 10 * 1000 * 1000 // 8, "latency": 0.08},
+}
+ENCODINGS = {"identity": None, "gzip": "gzip", "deflate": "deflate"}
+
+
+def measure(link, encoding, objects):
+    with fmcapi.FMCEmulator(**LINKS[link]) as emulator:
+        emulator.seed(
+            "object/hosts",
+            [
+                {
+                    "name": f"host{i}",
+                    "type": "Host",
+                    "value": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+                    "description": "Created by the fmcapi benchmark",
+                    "overridable": False,
+                    "metadata": {"lastUser": {"name": "admin"}, "timestamp": i},
+                }
+                for i in range(objects)
+            ],
+        )
+        with fmcapi.FMC(
+            host=emulator.url,
+            autodeploy=False,
+            check_server_version=False,
+            rate_limit=None,
+            accept_encoding=ENCODINGS[encoding],
+            logging_level="WARNING",
+        ) as fmc:
+            fmc.metrics.reset()
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            items = len(fmcapi.Hosts(fmc=fmc).get()["items"])
+            cpu = time.process_time() - cpu_start
+            wall = time.perf_counter() - wall_start
+            totals = fmc.metrics.snapshot()["totals"]
+    return {
+        "link": link,
+        "encoding": encoding,
+        "items": items,
+        "requests": totals["count"],
+        "wire_bytes": totals["wire_bytes"],
+        "decoded_bytes": totals["response_bytes"],
+        "wall_seconds": round(wall, 3),
+        "process_cpu_seconds": round(cpu, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--objects", type=int, default=10000)
+    parser.add_argument("--output", help="Write the JSON results to this file.")
+    args = parser.parse_args()
+    results = []
+    for link in LINKS:
+        for encoding in ENCODINGS:
+            result = measure(link, encoding, args.objects)
+            results.append(result)
+            print(
+                f"{link:11} {encoding:9} {result['wire_bytes']:>11,} wire bytes "
+                f"{result['decoded_bytes']:>11,} decoded  {result['wall_seconds']:7.3f} s wall "
+                f"{result['process_cpu_seconds']:6.3f} s process CPU"
+            )
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(
+                {"objects": args.objects, "results": results}, output_file, indent=2
+            )
+
+
+if __name__ == "__main__":
+    main()
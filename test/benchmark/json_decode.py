@@ -0,0 +1,78 @@
+"""
+Benchmark decoding of a 1000 item expanded page.
+
+Compares the old path (response.text then json.loads) with the decoders available in fmcapi.jsondecoder, which decode
+response.content directly.  Run from the top of the repo with: PYTHONPATH=. python test/benchmark/json_decode.py
+"""
+
+import json
+import time
+from requests import Response
+from fmcapi.jsondecoder import JSON_DECODERS
+
+ROUNDS = 50
+
+
+def page(items=1000):
+    return {
+        "links": {"self": "https://fmc/api/fmc_config/v1/domain/x/object/hosts"},
+        "items": [
+            {
+                "id": f"00505686-9A1E-0ed3-0000-{i:012d}",
+                "name": f"host-{i}",
+                "type": "Host",
+                "value": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+                "description": "Created by the fmcapi benchmark",
+                "overridable": False,
+                "links": {
+                    "self": f"https://fmc/api/fmc_config/v1/domain/x/object/hosts/{i}",
+                    "parent": "https://fmc/api/fmc_config/v1/domain/x/object/networkaddresses",
+                },
+                "metadata": {
+                    "lastUser": {"name": "admin"},
+                    "domain": {
+                        "name": "Global",
+                        "id": "e276abec-e0f2-11e3-8169-6d9ed49b625f",
+                    },
+                    "ipType": "V_4",
+                    "parentType": "NetworkAddress",
+                    "timestamp": 1571346742000 + i,
+                },
+            }
+            for i in range(items)
+        ],
+        "paging": {"offset": 0, "limit": items, "count": items, "pages": 1},
+    }
+
+
+def response(body):
+    # A fresh Response per round so response.text is not served from a cache.
+    resp = Response()
+    resp._content = body
+    resp.headers["Content-Type"] = "application/json"
+    resp.encoding = None
+    return resp
+
+
+def cpu_ms(func, body):
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        func(response(body))
+    return (time.process_time() - start) / ROUNDS * 1000
+
+
+def main():
+    body = json.dumps(page()).encode()
+    print(f"Page size: {len(body)} bytes, {ROUNDS} rounds")
+    baseline = cpu_ms(lambda resp: json.loads(resp.text), body)
+    print(f"{'json.loads(response.text)':32} {baseline:8.2f} ms CPU per page")
+    for name, decoder in JSON_DECODERS.items():
+        result = cpu_ms(lambda resp: decoder(resp.content), body)
+        print(
+            f"{name + '(response.content)':32} {result:8.2f} ms CPU per page"
+            f"  ({baseline / result:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
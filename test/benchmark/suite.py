@@ -0,0 +1,255 @@
+"""
+End-to-end benchmarks of fmcapi against a local FMCEmulator.
+
+Each scenario drives the real object and transport layers over HTTP and reports wall and CPU time, throughput,
+per-operation latency percentiles, and HTTP requests and bytes per operation.  Results are written as JSON so that a
+later run can be compared against them:
+
+    PYTHONPATH=. python test/benchmark/suite.py --output before.json
+    PYTHONPATH=. python test/benchmark/suite.py --output after.json --baseline before.json
+
+With --baseline the run exits with status 1 if any scenario's throughput fell by more than --tolerance.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import fmcapi
+from fmcapi.jsondecoder import JSON_DECODERS
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+
+    return register
+
+
+def hosts(count, prefix="host"):
+    return [
+        {
+            "name": f"{prefix}{i}",
+            "type": "Host",
+            "value": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+            "description": "Created by the fmcapi benchmark",
+            "overridable": False,
+        }
+        for i in range(count)
+    ]
+
+
+@scenario("list_10k")
+def list_10k(fmc, emulator, scale):
+    """GET a listing of 10,000 hosts."""
+    emulator.seed("object/hosts", hosts(int(10000 * scale)))
+    return [lambda: fmcapi.Hosts(fmc=fmc).get()] * 3
+
+
+@scenario("list_100k")
+def list_100k(fmc, emulator, scale):
+    """GET a listing of 100,000 hosts."""
+    emulator.seed("object/hosts", hosts(int(100000 * scale)))
+    return [lambda: fmcapi.Hosts(fmc=fmc).get()]
+
+
+@scenario("get_by_name")
+def get_by_name(fmc, emulator, scale):
+    """get(name=) of single hosts out of 1,000."""
+    count = int(1000 * scale)
+    emulator.seed("object/hosts", hosts(count))
+    return [
+        lambda i=i: fmcapi.Hosts(fmc=fmc, name=f"host{i * 7 % count}").get()
+        for i in range(50)
+    ]
+
+
+@scenario("acp_rules_helpers")
+def acp_rules_helpers(fmc, emulator, scale):
+    """Build and POST 50 access rules with the source_network/destination_network helpers, out of 500 hosts."""
+    # Every rule uses one of the hosts, so both counts follow --scale.
+    count = max(1, int(50 * scale))
+    emulator.seed("object/hosts", hosts(max(count, int(500 * scale))))
+    emulator.seed(
+        "object/networks",
+        [{"name": f"net{i}", "value": f"172.16.{i}.0/24"} for i in range(50)],
+    )
+    emulator.seed("object/networkgroups", [{"name": f"group{i}"} for i in range(50)])
+    fmcapi.AccessPolicies(fmc=fmc, name="benchmark-helpers").post()
+
+    def build_rule(i):
+        rule = fmcapi.AccessRules(
+            fmc=fmc, acp_name="benchmark-helpers", name=f"rule{i}", action="ALLOW"
+        )
+        rule.source_network(action="add", name=f"host{i}")
+        rule.destination_network(action="add", name=f"net{i % 50}")
+        rule.post()
+
+    return [lambda i=i: build_rule(i) for i in range(count)]
+
+
+@scenario("bulk_post")
+def bulk_post(fmc, emulator, scale):
+    """Bulk.post of 1,000 access rules."""
+    count = int(1000 * scale)
+    operations = []
+    for run in range(3):
+        acp = fmcapi.AccessPolicies(fmc=fmc, name=f"benchmark-bulk-{run}")
+        acp.post()
+        url = fmcapi.AccessRules(fmc=fmc, acp_id=acp.id).URL
+
+        def post(url=url):
+            bulk = fmcapi.Bulk(fmc=fmc, url=url, section="mandatory")
+            for i in range(count):
+                bulk.add({"name": f"rule{i}", "action": "ALLOW", "enabled": True})
+            bulk.post()
+
+        operations.append(post)
+    return operations
+
+
+@scenario("deployment")
+def deployment(fmc, emulator, scale):
+    """DeploymentRequests.post() for 50 deployable devices."""
+    fmcapi.DeployableDevices.WAIT_TIME = 0
+    emulator.seed(
+        "deployment/deployabledevices",
+        [
+            {
+                "name": f"ftd{i}",
+                "canBeDeployed": True,
+                "version": str(1600000000000 + i),
+                "device": {"id": f"device-{i}", "type": "Device"},
+                "type": "DeployableDevice",
+            }
+            for i in range(int(50 * scale))
+        ],
+    )
+    return [lambda: fmcapi.DeploymentRequests(fmc=fmc).post()] * 20
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def run_scenario(name, args):
+    with fmcapi.FMCEmulator(latency=args.latency) as emulator:
+        with fmcapi.FMC(
+            host=emulator.url,
+            autodeploy=False,
+            rate_limit=None,
+            paging_workers=args.paging_workers,
+            logging_level="WARNING",
+        ) as fmc:
+            operations = SCENARIOS[name](fmc, emulator, args.scale)
+            fmc.metrics.reset()
+            requests_before = emulator.stats()["requests"]
+            latencies = []
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            for operation in operations:
+                start = time.perf_counter()
+                operation()
+                latencies.append(time.perf_counter() - start)
+            cpu = time.process_time() - cpu_start
+            wall = time.perf_counter() - wall_start
+            totals = fmc.metrics.snapshot()["totals"]
+            requests = emulator.stats()["requests"] - requests_before
+    return {
+        "scenario": name,
+        "description": SCENARIOS[name].__doc__,
+        "operations": len(operations),
+        "wall_seconds": round(wall, 4),
+        "cpu_seconds": round(cpu, 4),
+        "operations_per_second": round(len(operations) / wall, 3),
+        "latency_seconds": {
+            "mean": round(statistics.mean(latencies), 5),
+            "p50": round(percentile(latencies, 50), 5),
+            "p95": round(percentile(latencies, 95), 5),
+            "max": round(max(latencies), 5),
+        },
+        "http_requests": requests,
+        "http_requests_per_operation": round(requests / len(operations), 2),
+        "response_bytes": totals["response_bytes"],
+    }
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    previous = {result["scenario"]: result for result in baseline["results"]}
+    for result in results:
+        before = previous.get(result["scenario"])
+        if before is None:
+            continue
+        change = result["operations_per_second"] / before["operations_per_second"] - 1
+        result["change_vs_baseline"] = round(change, 3)
+        if change < -tolerance:
+            regressions.append(result["scenario"])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Multiply object counts by this."
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds the emulator adds."
+    )
+    parser.add_argument("--paging-workers", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON results to this file.")
+    parser.add_argument("--baseline", help="Earlier JSON results to compare with.")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = []
+    for name in args.scenarios:
+        result = run_scenario(name, args)
+        results.append(result)
+        print(
+            f"{name:20} {result['operations']:4} ops {result['wall_seconds']:9.3f} s "
+            f"{result['operations_per_second']:9.2f} ops/s  p95 {result['latency_seconds']['p95']:.4f} s  "
+            f"{result['http_requests_per_operation']:7.2f} requests/op"
+        )
+    report = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "json_decoders": list(JSON_DECODERS),
+            "scale": args.scale,
+            "latency": args.latency,
+            "paging_workers": args.paging_workers,
+        },
+        "results": results,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        for setting in ("scale", "latency", "paging_workers"):
+            if baseline["meta"].get(setting) != report["meta"][setting]:
+                print(f"Warning: the baseline was run with a different {setting}.")
+        regressions = compare(results, baseline, args.tolerance)
+        report["regressions"] = regressions
+        for name in regressions:
+            print(f"Regression: {name} is more than {args.tolerance:.0%} slower.")
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
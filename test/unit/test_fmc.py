@@ -0,0 +1,1744 @@
+"""
+Test fmc.py
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import mock
+import os
+import requests
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+except ImportError:
+    h2 = None
+
+import fmcapi
+from fmcapi import api_objects
+
+
+def mock_response(json_data, status_code=200):
+    response = mock.Mock()
+    response.status_code = status_code
+    response.text = json.dumps(json_data)
+    response.content = response.text.encode()
+    response.headers = {}
+    return response
+
+
+def paged_responses(items, limit):
+    """Build the list of responses the FMC would return for a listing of 'items', 'limit' items per page."""
+    responses = []
+    for offset in range(0, len(items), limit):
+        paging = {"offset": offset, "limit": limit, "count": len(items), "pages": 0}
+        if offset + limit < len(items):
+            paging["next"] = [
+                f"https://fmc/api/fmc_config/v1/domain/uuid/object/hosts?offset={offset + limit}&limit={limit}"
+            ]
+        responses.append(
+            mock_response({"items": items[offset : offset + limit], "paging": paging})
+        )
+    return responses
+
+
+def hosts_data(count):
+    return [{"name": f"host{i}", "value": f"10.0.0.{i}"} for i in range(count)]
+
+
+def connected_fmc(fmc_class=fmcapi.FMC, mock_session=True, **kwargs):
+    """Return an FMC object that looks like it went through __enter__() without talking to an FMC."""
+    kwargs.setdefault("rate_limit", None)
+    fmc = fmc_class(check_server_version=False, autodeploy=False, **kwargs)
+    fmc.mytoken = mock.Mock()
+    fmc.mytoken.get_token.return_value = "token"
+    fmc.uuid = "uuid"
+    fmc.serverVersion = "9" * 10
+    fmc.build_urls()
+    if mock_session:
+        fmc.requests_session = mock.Mock()
+    return fmc
+
+
+class TestFMC(unittest.TestCase):
+    def test_send_to_api_follows_paging(self):
+        items = [{"name": f"host{i}", "id": str(i)} for i in range(25)]
+        fmc = connected_fmc()
+        fmc.requests_session.get.side_effect = paged_responses(items, limit=10)
+
+        response = fmc.send_to_api(method="get", url="https://fmc/object/hosts")
+
+        self.assertEqual(items, response["items"])
+        self.assertEqual(3, fmc.requests_session.get.call_count)
+
+    def test_send_to_api_paging_is_not_recursive(self):
+        items = [{"name": f"host{i}", "id": str(i)} for i in range(1500)]
+        fmc = connected_fmc()
+        fmc.requests_session.get.side_effect = paged_responses(items, limit=1)
+
+        response = fmc.send_to_api(method="get", url="https://fmc/object/hosts")
+
+        self.assertEqual(items, response["items"])
+
+    def test_iter_items_yields_page_by_page(self):
+        items = [{"name": f"host{i}", "id": str(i)} for i in range(25)]
+        fmc = connected_fmc()
+        fmc.requests_session.get.side_effect = paged_responses(items, limit=10)
+
+        iterator = api_objects.Hosts(fmc=fmc).iter_all()
+
+        self.assertEqual(items[:10], [next(iterator) for _ in range(10)])
+        self.assertEqual(1, fmc.requests_session.get.call_count)
+        self.assertEqual(items[10:], list(iterator))
+        self.assertEqual(3, fmc.requests_session.get.call_count)
+
+    def test_parallel_paging_keeps_page_order(self):
+        items = [{"name": f"host{i}", "id": str(i)} for i in range(95)]
+        pages = {
+            json.loads(page.text)["paging"]["offset"]: page
+            for page in paged_responses(items, limit=10)
+        }
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        def get(url, **kwargs):
+            with lock:
+                in_flight.append(url)
+                peak.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.remove(url)
+            offset = int(parse_qs(urlsplit(url).query).get("offset", ["0"])[0])
+            return pages[offset]
+
+        fmc = connected_fmc(paging_workers=4)
+        fmc.requests_session.get.side_effect = get
+
+        response = fmc.send_to_api(method="get", url="https://fmc/object/hosts")
+
+        self.assertEqual(items, response["items"])
+        self.assertEqual(10, fmc.requests_session.get.call_count)
+        self.assertLessEqual(max(peak), 4)
+        self.assertGreater(max(peak), 1)
+
+    def test_async_send_to_api_follows_paging(self):
+        items = [{"name": f"host{i}", "id": str(i)} for i in range(25)]
+        fmc = connected_fmc(fmc_class=fmcapi.AsyncFMC, max_workers=4)
+        fmc.requests_session.get.side_effect = paged_responses(items, limit=10)
+
+        async def run():
+            async with fmc:
+                return await fmc.asend_to_api(
+                    method="get", url="https://fmc/object/hosts"
+                )
+
+        with mock.patch.object(fmcapi.FMC, "__enter__", return_value=fmc):
+            response = asyncio.run(run())
+
+        self.assertEqual(items, response["items"])
+
+    def test_async_object_methods_run_concurrently(self):
+        fmc = connected_fmc(fmc_class=fmcapi.AsyncFMC, max_workers=4)
+        fmc.requests_session.post.side_effect = (
+            lambda url, json, **kwargs: mock_response(dict(json, id=json["name"]))
+        )
+
+        async def run():
+            async with fmc:
+                hosts = [
+                    api_objects.Hosts(fmc=fmc, name=f"host{i}", value="10.0.0.1")
+                    for i in range(20)
+                ]
+                return await asyncio.gather(*[host.apost() for host in hosts])
+
+        with mock.patch.object(fmcapi.FMC, "__enter__", return_value=fmc):
+            responses = asyncio.run(run())
+
+        self.assertEqual([f"host{i}" for i in range(20)], [r["id"] for r in responses])
+
+
+class TestThreadSafety(unittest.TestCase):
+    def test_concurrent_paged_gets_do_not_mix_results(self):
+        listings = {
+            f"https://fmc/object/type{n}": [
+                {"name": f"type{n}-{i}", "id": f"{n}-{i}"} for i in range(n * 7 + 3)
+            ]
+            for n in range(8)
+        }
+        pages = {}
+        for base_url, items in listings.items():
+            for page in paged_responses(items, limit=5):
+                offset = json.loads(page.text)["paging"]["offset"]
+                pages[(base_url, offset)] = json.loads(page.text)
+
+        def get(url, **kwargs):
+            time.sleep(0.001)
+            split = urlsplit(url)
+            offset = int(parse_qs(split.query).get("offset", ["0"])[0])
+            base_url = f"https://fmc{split.path}" if offset else url
+            page = json.loads(json.dumps(pages[(base_url, offset)]))
+            if "next" in page["paging"]:
+                page["paging"]["next"] = [f"{base_url}?offset={offset + 5}&limit=5"]
+            return mock_response(page)
+
+        fmc = connected_fmc()
+        fmc.requests_session.get.side_effect = get
+        results = {}
+        errors = []
+
+        def worker(thread_number):
+            try:
+                for call in range(20):
+                    base_url = f"https://fmc/object/type{(thread_number + call) % 8}"
+                    response = fmc.send_to_api(method="get", url=base_url)
+                    results.setdefault(base_url, []).append(response["items"])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
+        for base_url, responses in results.items():
+            for items in responses:
+                self.assertEqual(listings[base_url], items)
+
+    def test_concurrent_401s_renew_the_token_once(self):
+        counter = iter(range(100))
+
+        def post(url, **kwargs):
+            time.sleep(0.01)
+            response = mock.Mock()
+            response.headers = {
+                "X-auth-access-token": f"access{next(counter)}",
+                "X-auth-refresh-token": "refresh",
+                "DOMAIN_UUID": "uuid",
+                "DOMAINS": "[]",
+            }
+            return response
+
+        session = mock.Mock()
+        session.post.side_effect = post
+        token = fmcapi.fmc.Token(host="fmc", requests_session=session)
+        rejected = token.access_token
+
+        threads = [
+            threading.Thread(target=token.renew, args=(rejected,)) for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(2, session.post.call_count)
+        self.assertEqual("access1", token.get_token())
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(0.02)
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StallingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    calls = 0
+
+    def do_GET(self):
+        type(self).calls += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "100")
+        self.end_headers()
+        self.wfile.write(b'{"items": [')
+        self.wfile.flush()
+        time.sleep(0.5)
+
+    def log_message(self, *args):
+        pass
+
+
+class SlowBodyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.flush()
+        time.sleep(0.3)
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), JSONHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        fmc = connected_fmc(mock_session=False)
+
+        for n in range(5):
+            response = fmc.send_to_api(method="get", url=f"{self.url}/{n}")
+            self.assertEqual(f"/{n}", response["path"])
+
+        stats = fmc.pool_stats()
+        self.assertEqual(5, stats["requests"])
+        self.assertEqual(1, stats["connections_created"])
+        self.assertEqual(4, stats["connections_reused"])
+
+    def test_stalled_body_is_retried(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StallingHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        fmc = connected_fmc(
+            mock_session=False,
+            read_timeout=0.1,
+            retry_policy=fmcapi.RetryPolicy(max_attempts=2, backoff_factor=0.001),
+        )
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            fmc.send_to_api(
+                method="get", url=f"http://127.0.0.1:{server.server_address[1]}/"
+            )
+        self.assertEqual(2, StallingHandler.calls)
+
+    def test_pool_saturation_is_counted(self):
+        fmc = connected_fmc(mock_session=False, pool_maxsize=2, pool_block=True)
+
+        threads = [
+            threading.Thread(
+                target=fmc.send_to_api,
+                kwargs={"method": "get", "url": f"{self.url}/{n}"},
+            )
+            for n in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = fmc.pool_stats()
+        self.assertEqual(6, stats["requests"])
+        self.assertLessEqual(stats["connections_created"], 2)
+        self.assertGreater(stats["saturated"], 0)
+
+    def test_requests_are_in_flight_until_their_body_is_read(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), SlowBodyHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        fmc = connected_fmc(mock_session=False, pool_maxsize=2, pool_block=False)
+
+        threads = [
+            threading.Thread(
+                target=fmc.send_to_api,
+                kwargs={"method": "get", "url": f"{url}/{n}"},
+            )
+            for n in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.03)
+        for thread in threads:
+            thread.join()
+
+        stats = fmc.pool_stats()
+        self.assertEqual(6, stats["requests"])
+        self.assertGreaterEqual(stats["peak_in_flight"], 4)
+        self.assertGreaterEqual(stats["saturated"], 2)
+        self.assertEqual(0, stats["in_flight"])
+
+    def test_separate_read_timeout(self):
+        fmc = fmcapi.FMC(timeout=3, read_timeout=60)
+        self.assertEqual((3, 60), fmc.timeout)
+
+
+def token_session():
+    """Mock requests session that hands out access0, access1, ... from generatetoken and refreshtoken."""
+    counter = iter(range(1000))
+
+    def post(url, **kwargs):
+        response = mock.Mock()
+        response.headers = {
+            "X-auth-access-token": f"access{next(counter)}",
+            "X-auth-refresh-token": "refresh",
+            "DOMAIN_UUID": "uuid",
+            "DOMAINS": "[]",
+        }
+        return response
+
+    session = mock.Mock()
+    session.post.side_effect = post
+    return session
+
+
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "tokens.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_tokens_are_reused_across_token_objects(self):
+        first_session = token_session()
+        first = fmcapi.fmc.Token(
+            host="fmc",
+            requests_session=first_session,
+            token_cache=fmcapi.TokenCache(self.path),
+        )
+        second_session = token_session()
+        second = fmcapi.fmc.Token(
+            host="fmc",
+            requests_session=second_session,
+            token_cache=fmcapi.TokenCache(self.path),
+        )
+
+        self.assertEqual(first.access_token, second.access_token)
+        self.assertEqual("uuid", second.uuid)
+        second_session.post.assert_not_called()
+        self.assertEqual(0o600, os.stat(self.path).st_mode & 0o777)
+
+    def test_cache_is_keyed_by_host_user_and_domain(self):
+        fmcapi.fmc.Token(
+            host="fmc",
+            requests_session=token_session(),
+            token_cache=fmcapi.TokenCache(self.path),
+        )
+        other_session = token_session()
+        fmcapi.fmc.Token(
+            host="fmc",
+            username="someone",
+            requests_session=other_session,
+            token_cache=fmcapi.TokenCache(self.path),
+        )
+        self.assertEqual(1, other_session.post.call_count)
+
+    def test_rejected_token_is_not_reused(self):
+        cache = fmcapi.TokenCache(self.path)
+        token = fmcapi.fmc.Token(
+            host="fmc", requests_session=token_session(), token_cache=cache
+        )
+        token.renew("access0")
+
+        other_session = token_session()
+        other = fmcapi.fmc.Token(
+            host="fmc", requests_session=other_session, token_cache=cache
+        )
+        self.assertEqual("access1", token.access_token)
+        self.assertEqual("access1", other.access_token)
+        other_session.post.assert_not_called()
+
+    def test_expired_tokens_are_not_reused(self):
+        cache = fmcapi.TokenCache(self.path)
+        fmcapi.fmc.Token(
+            host="fmc", requests_session=token_session(), token_cache=cache
+        )
+        with mock.patch("fmcapi.tokencache.time.time", return_value=time.time() + 3600):
+            other_session = token_session()
+            fmcapi.fmc.Token(
+                host="fmc", requests_session=other_session, token_cache=cache
+            )
+        self.assertEqual(1, other_session.post.call_count)
+
+
+class TestBackgroundTokenRefresh(unittest.TestCase):
+    def test_refreshes_then_generates_new_tokens(self):
+        session = token_session()
+        token = fmcapi.fmc.Token(host="fmc", requests_session=session)
+        token.BACKGROUND_REFRESH_TIME = 0
+        token.start_background_refresh()
+        deadline = time.monotonic() + 5
+        while session.post.call_count < 6 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        token.stop_background_refresh()
+
+        urls = [call.args[0].rsplit("/", 1)[1] for call in session.post.call_args_list]
+        self.assertEqual(
+            ["generatetoken"]
+            + ["refreshtoken"] * 3
+            + ["generatetoken", "refreshtoken"],
+            urls[:6],
+        )
+        self.assertIsNone(token.refresher)
+
+    def test_get_token_does_not_wait_on_refresh(self):
+        token = fmcapi.fmc.Token(host="fmc", requests_session=token_session())
+        refreshing = threading.Event()
+        done = threading.Event()
+
+        def hold_lock():
+            with token.lock:
+                refreshing.set()
+                done.wait(5)
+
+        threading.Thread(target=hold_lock).start()
+        refreshing.wait(5)
+        start = time.monotonic()
+        self.assertEqual("access0", token.get_token())
+        self.assertLess(time.monotonic() - start, 1)
+        done.set()
+
+    def test_refresher_does_not_outlive_a_failed_enter(self):
+        session = mock.Mock()
+        session.post.return_value = mock_response({})
+        token = fmcapi.fmc.Token(
+            host="fmc", requests_session=session, background_refresh=True
+        )
+        self.assertIsNone(token.refresher)
+
+        with fmcapi.FMCEmulator() as emulator:
+            fmc = fmcapi.FMC(
+                host=emulator.url,
+                autodeploy=False,
+                rate_limit=None,
+                background_token_refresh=True,
+            )
+            with mock.patch.object(
+                api_objects.ServerVersion, "get", side_effect=RuntimeError("down")
+            ):
+                with self.assertRaises(RuntimeError):
+                    fmc.__enter__()
+        self.assertIsNone(fmc.mytoken.refresher)
+
+
+class TestFMCFleet(unittest.TestCase):
+    @staticmethod
+    def fake_enter(self):
+        if self.host == "down":
+            raise fmcapi.fmc.AuthenticationError("Access token not found")
+        fmc = connected_fmc(host=self.host)
+        fmc.requests_session.get.side_effect = lambda url, **kwargs: (
+            time.sleep(0.2) or mock_response({"items": [{"name": fmc.host}]})
+        )
+        return fmc
+
+    @mock.patch.object(fmcapi.FMC, "__exit__")
+    def test_runs_against_every_fmc_concurrently(self, mock_exit):
+        hosts = [{"host": f"fmc{n}", "username": "admin"} for n in range(6)]
+        hosts.append({"host": "down"})
+        with mock.patch.object(fmcapi.FMC, "__enter__", new=self.fake_enter):
+            with fmcapi.FMCFleet(fmcs=hosts, max_workers=6, autodeploy=False) as fleet:
+                start = time.monotonic()
+                outcome = fleet.run_object(api_objects.Hosts, "get")
+                elapsed = time.monotonic() - start
+
+        self.assertEqual(["down"], list(fleet.connect_errors))
+        self.assertEqual({f"fmc{n}" for n in range(6)}, set(outcome["results"]))
+        self.assertEqual("fmc3", outcome["results"]["fmc3"]["items"][0]["name"])
+        self.assertEqual({}, outcome["errors"])
+        self.assertLess(elapsed, 0.2 * 3)
+        self.assertEqual(6, mock_exit.call_count)
+
+    @mock.patch.object(fmcapi.FMC, "__exit__")
+    def test_errors_are_collected_per_fmc(self, _):
+        def audit(fmc):
+            if fmc.host == "fmc1":
+                raise ValueError("boom")
+            return fmc.host
+
+        hosts = [{"host": "fmc0"}, {"host": "fmc1", "name": "lab"}]
+        with mock.patch.object(fmcapi.FMC, "__enter__", new=self.fake_enter):
+            with fmcapi.FMCFleet(fmcs=hosts) as fleet:
+                outcome = fleet.run(audit)
+
+        self.assertEqual({"fmc0": "fmc0"}, outcome["results"])
+        self.assertIsInstance(outcome["errors"]["lab"], ValueError)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_requests_are_paced_after_burst(self):
+        limiter = fmcapi.RateLimiter(rate=50, per=1, burst=5)
+        start = time.monotonic()
+        for _ in range(15):
+            limiter.acquire()
+        # 5 tokens are free, the other 10 arrive at 50 per second.
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+
+    def test_limiter_is_shared_between_threads(self):
+        limiter = fmcapi.RateLimiter(rate=100, per=1, burst=1)
+        start = time.monotonic()
+        threads = [
+            threading.Thread(target=lambda: [limiter.acquire() for _ in range(5)])
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+
+    def test_too_many_requests_backs_off_adaptively(self):
+        limiter = fmcapi.RateLimiter(rate=120, per=60)
+        first = limiter.on_too_many_requests()
+        second = limiter.on_too_many_requests()
+        self.assertLess(first, 2)
+        self.assertGreater(second, first)
+        self.assertLess(limiter.rate, limiter.max_rate)
+        limiter.on_success()
+        self.assertEqual(0, limiter.consecutive_429s)
+        self.assertEqual(3, limiter.on_too_many_requests(retry_after=3))
+
+    def test_rate_limit_false_turns_pacing_off(self):
+        fmc = connected_fmc(rate_limit=False)
+        fmc.requests_session.get.return_value = mock_response({"name": "host1"})
+        self.assertIsNone(fmc.rate_limiter)
+        self.assertIsNone(fmc.scheduler)
+        self.assertEqual(
+            {"name": "host1"},
+            fmc.send_to_api(method="get", url="https://fmc/object/hosts/1"),
+        )
+        self.assertIsNone(connected_fmc(rate_limit=0).rate_limiter)
+        with self.assertRaises(ValueError):
+            fmcapi.RateLimiter(rate=0)
+
+    def test_429_does_not_charge_waiting_requests_again(self):
+        limiter = fmcapi.RateLimiter(rate=10, per=1, burst=1)
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.02)
+        limiter.on_too_many_requests(retry_after=0.4)
+        for thread in threads:
+            thread.join()
+        # One token per request: the burst token plus 3 owed when the 429 arrived.
+        self.assertGreaterEqual(limiter.tokens, -3.01)
+
+    def test_send_to_api_does_not_sleep_fixed_timeout_on_429(self):
+        fmc = connected_fmc(rate_limit=fmcapi.RateLimiter(rate=6000, per=60))
+        fmc.rate_limiter.BACKOFF_START = 0.01
+        fmc.requests_session.get.side_effect = [
+            mock_response({}, status_code=429),
+            mock_response({"name": "host1"}),
+        ]
+
+        start = time.monotonic()
+        response = fmc.send_to_api(method="get", url="https://fmc/object/hosts/1")
+
+        self.assertEqual({"name": "host1"}, response)
+        self.assertLess(time.monotonic() - start, 1)
+
+
+class TestRequestScheduler(unittest.TestCase):
+    def test_interactive_request_overtakes_bulk_queue(self):
+        scheduler = fmcapi.RequestScheduler(fmcapi.RateLimiter(rate=20, per=1, burst=1))
+        order = []
+
+        def send(priority):
+            scheduler.acquire(priority)
+            order.append(priority)
+
+        threads = [threading.Thread(target=send, args=("bulk",)) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.02)
+        with fmcapi.request_priority("interactive"):
+            scheduler.acquire()
+        order.append("interactive")
+        for thread in threads:
+            thread.join()
+
+        self.assertLess(order.index("interactive"), 3)
+        stats = scheduler.stats()
+        self.assertEqual(10, stats["bulk"]["requests"])
+        self.assertEqual(1, stats["interactive"]["requests"])
+
+    def test_classes_share_the_budget_by_weight(self):
+        scheduler = fmcapi.RequestScheduler(
+            fmcapi.RateLimiter(rate=1000, per=1, burst=1),
+            weights={"normal": 3, "bulk": 1},
+        )
+        order = []
+        lock = threading.Lock()
+
+        def send(priority):
+            scheduler.acquire(priority)
+            with lock:
+                order.append(priority)
+
+        with scheduler.condition:
+            # Hold dispatching back until every request is queued.
+            scheduler.dispatching = True
+            threads = [
+                threading.Thread(target=send, args=(priority,))
+                for priority in ["bulk"] * 20 + ["normal"] * 20
+            ]
+            for thread in threads:
+                thread.start()
+            while sum(len(queue) for queue in scheduler.queues.values()) < 40:
+                scheduler.condition.wait(0.01)
+            scheduler.dispatching = False
+            scheduler.condition.notify_all()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(6, order[:8].count("normal"))
+
+    def test_fmc_schedules_its_requests(self):
+        fmc = connected_fmc(rate_limit=120)
+        fmc.requests_session.get.return_value = mock_response({"name": "host1"})
+
+        with fmcapi.request_priority("bulk"):
+            fmc.send_to_api(method="get", url="https://fmc/object/hosts/1")
+        self.assertEqual(1, fmc.scheduler.stats()["bulk"]["requests"])
+        self.assertIsNone(connected_fmc(scheduler=False).scheduler)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def fast_fmc(self, **kwargs):
+        return connected_fmc(
+            retry_policy=fmcapi.RetryPolicy(backoff_factor=0.001, **kwargs)
+        )
+
+    def test_get_is_retried_on_5xx_and_connection_errors(self):
+        fmc = self.fast_fmc()
+        fmc.requests_session.get.side_effect = [
+            requests.exceptions.ConnectionError("reset"),
+            mock_response({}, status_code=503),
+            requests.exceptions.ReadTimeout("slow"),
+            mock_response({"name": "host1"}),
+        ]
+
+        response = fmc.send_to_api(method="get", url="https://fmc/object/hosts/1")
+
+        self.assertEqual({"name": "host1"}, response)
+        self.assertEqual(4, fmc.requests_session.get.call_count)
+
+    def test_gives_up_after_max_attempts(self):
+        fmc = self.fast_fmc(max_attempts=3)
+        fmc.requests_session.get.side_effect = requests.exceptions.ConnectionError(
+            "reset"
+        )
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            fmc.send_to_api(method="get", url="https://fmc/object/hosts/1")
+        self.assertEqual(3, fmc.requests_session.get.call_count)
+
+    def test_post_is_only_retried_when_not_processed(self):
+        fmc = self.fast_fmc()
+        fmc.requests_session.post.side_effect = [
+            requests.exceptions.ConnectTimeout("never sent"),
+            requests.exceptions.ReadTimeout("maybe processed"),
+        ]
+
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            fmc.send_to_api(method="post", url="https://fmc/object/hosts", json_data={})
+        self.assertEqual(2, fmc.requests_session.post.call_count)
+
+    def test_retry_after_header_is_honored(self):
+        policy = fmcapi.RetryPolicy()
+        response = mock_response({}, status_code=503)
+        response.headers = {"Retry-After": "7"}
+        self.assertEqual(7, policy.backoff(1, response))
+        response.headers = {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}
+        self.assertEqual(0, policy.backoff(1, response))
+        self.assertLessEqual(policy.backoff(3), 4)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_failing_endpoint_fails_fast(self):
+        fmc = connected_fmc(
+            retry_policy=fmcapi.RetryPolicy(backoff_factor=0.001),
+            circuit_breaker=fmcapi.CircuitBreaker(failure_threshold=3, cooldown=60),
+        )
+        fmc.requests_session.get.side_effect = requests.exceptions.ConnectionError(
+            "reset"
+        )
+
+        with self.assertRaises(fmcapi.CircuitOpenError):
+            fmc.send_to_api(
+                method="get", url="https://fmc/deployment/deployabledevices"
+            )
+        self.assertEqual(3, fmc.requests_session.get.call_count)
+        with self.assertRaises(fmcapi.CircuitOpenError):
+            fmc.send_to_api(
+                method="get", url="https://fmc/deployment/deployabledevices"
+            )
+        self.assertEqual(3, fmc.requests_session.get.call_count)
+
+        fmc.requests_session.get.side_effect = None
+        fmc.requests_session.get.return_value = mock_response({"name": "host1"})
+        fmc.send_to_api(method="get", url="https://fmc/object/hosts/1")
+        stats = fmc.circuit_breaker.stats()
+        self.assertEqual(1, stats["opened"])
+        self.assertEqual(2, stats["rejected"])
+        self.assertEqual({"/deployment/deployabledevices": "open"}, stats["circuits"])
+
+    def test_probe_slot_is_freed_when_rate_limit_wait_fails(self):
+        breaker = fmcapi.CircuitBreaker(failure_threshold=1, cooldown=0)
+        fmc = connected_fmc(rate_limit=120, circuit_breaker=breaker)
+        fmc.requests_session.get.return_value = mock_response({"name": "host1"})
+        url = "https://fmc/deployment/deployabledevices"
+        breaker.acquire("/deployment/deployabledevices")
+        breaker.on_failure("/deployment/deployabledevices")
+
+        with fmcapi.request_priority("urgent"):
+            with self.assertRaises(ValueError):
+                fmc.send_to_api(method="get", url=url)
+        fmc.send_to_api(method="get", url=url)
+        self.assertEqual(breaker.CLOSED, breaker.state("/deployment/deployabledevices"))
+
+    def test_half_open_probe(self):
+        breaker = fmcapi.CircuitBreaker(failure_threshold=1, cooldown=0.05)
+        breaker.acquire("/a")
+        breaker.on_failure("/a")
+        self.assertEqual(breaker.OPEN, breaker.state("/a"))
+        with self.assertRaises(fmcapi.CircuitOpenError):
+            breaker.acquire("/a")
+        time.sleep(0.06)
+        breaker.acquire("/a")
+        with self.assertRaises(fmcapi.CircuitOpenError):
+            breaker.acquire("/a")
+        breaker.on_failure("/a")
+        self.assertEqual(breaker.OPEN, breaker.state("/a"))
+        time.sleep(0.06)
+        breaker.acquire("/a")
+        breaker.on_success("/a")
+        self.assertEqual(breaker.CLOSED, breaker.state("/a"))
+        breaker.acquire("/a")
+
+    def test_waiting_caller_gets_through_after_cooldown(self):
+        breaker = fmcapi.CircuitBreaker(failure_threshold=1, cooldown=0.05, wait=True)
+        breaker.acquire("/a")
+        breaker.on_failure("/a")
+        self.assertGreater(breaker.acquire("/a"), 0.03)
+
+
+class TestJSONDecoder(unittest.TestCase):
+    def test_default_decoder_parses_bytes(self):
+        decoder = fmcapi.jsondecoder.get_json_decoder()
+        self.assertEqual({"name": "ü"}, decoder('{"name": "ü"}'.encode()))
+
+    def test_decoder_can_be_chosen(self):
+        self.assertIs(
+            fmcapi.jsondecoder.stdlib_loads,
+            fmcapi.jsondecoder.get_json_decoder("json"),
+        )
+        with self.assertRaises(ValueError):
+            fmcapi.jsondecoder.get_json_decoder("simdjson")
+
+    def test_send_to_api_uses_configured_decoder(self):
+        decoded = []
+
+        def decoder(content):
+            decoded.append(content)
+            return json.loads(content)
+
+        fmc = connected_fmc(json_decoder=decoder)
+        fmc.requests_session.get.return_value = mock_response({"name": "host1"})
+
+        response = fmc.send_to_api(method="get", url="https://fmc/object/hosts/1")
+
+        self.assertEqual({"name": "host1"}, response)
+        self.assertEqual([b'{"name": "host1"}'], decoded)
+
+
+class TestMetrics(unittest.TestCase):
+    def test_endpoint_template_strips_uuids(self):
+        url = (
+            "https://fmc/api/fmc_config/v1/domain/e276abec-e0f2-11e3-8169-6d9ed49b625f"
+            "/object/hosts/00505686-9A1E-0ed3-0000-000000000001?expanded=true"
+        )
+        self.assertEqual(
+            "/api/fmc_config/v1/domain/{id}/object/hosts/{id}",
+            api_objects.helper_functions.endpoint_template(url),
+        )
+
+    def test_calls_are_recorded(self):
+        fmc = connected_fmc()
+        fmc.requests_session.get.side_effect = [
+            mock_response({}, status_code=401),
+            mock_response({"name": "host1"}),
+        ]
+        fmc.mytoken.renew.return_value = "access1"
+
+        fmc.send_to_api(
+            method="get",
+            url="https://fmc/object/hosts/00505686-9a1e-0ed3-0000-000000000001",
+        )
+
+        snapshot = fmc.metrics.snapshot()
+        self.assertEqual(1, len(snapshot["requests"]))
+        request = snapshot["requests"][0]
+        self.assertEqual("GET", request["method"])
+        self.assertEqual("/object/hosts/{id}", request["endpoint"])
+        self.assertEqual("200", request["status"])
+        self.assertEqual(1, request["count"])
+        self.assertEqual(1, request["retries"])
+        self.assertEqual(1, request["reauthenticated"])
+        self.assertEqual(len(b'{"name": "host1"}'), request["response_bytes"])
+        self.assertEqual(1, request["latency_buckets"][60])
+
+    def test_failed_calls_are_recorded(self):
+        fmc = connected_fmc(retry_policy=fmcapi.RetryPolicy(max_attempts=1))
+        fmc.requests_session.get.side_effect = requests.exceptions.ConnectionError()
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            fmc.send_to_api(method="get", url="https://fmc/object/hosts")
+
+        request = fmc.metrics.snapshot()["requests"][0]
+        self.assertEqual("ConnectionError", request["status"])
+
+    def test_prometheus_text(self):
+        metrics = fmcapi.Metrics(buckets=(1,))
+        metrics.record("fmc", "get", "/object/hosts", 200, latency=0.5)
+        metrics.record("fmc", "get", "/object/hosts", 200, latency=2)
+
+        text = metrics.prometheus()
+
+        labels = 'host="fmc",method="GET",endpoint="/object/hosts",status="200"'
+        self.assertIn(f"fmcapi_requests_total{{{labels}}} 2", text)
+        self.assertIn(
+            f'fmcapi_request_duration_seconds_bucket{{{labels},le="1"}} 1', text
+        )
+        self.assertIn(
+            f'fmcapi_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', text
+        )
+        self.assertIn(f"fmcapi_request_duration_seconds_sum{{{labels}}} 2.5", text)
+
+    def test_metrics_can_be_turned_off(self):
+        fmc = connected_fmc(metrics=None)
+        fmc.requests_session.get.return_value = mock_response({"name": "host1"})
+        fmc.send_to_api(method="get", url="https://fmc/object/hosts/1")
+        self.assertIsNone(fmc.metrics)
+
+
+class TestTracing(unittest.TestCase):
+    def test_spans_nest_from_helper_to_http(self):
+        class Lookup(api_objects.Hosts):
+            def resolve(self, *names):
+                return [
+                    api_objects.Hosts(fmc=self.fmc, name=name).get() for name in names
+                ]
+
+        tracer = fmcapi.Tracer()
+        fmc = connected_fmc(tracer=tracer)
+        fmc.requests_session.get.side_effect = lambda *args, **kwargs: mock_response(
+            {"items": [{"name": "host1", "id": "1"}, {"name": "host2", "id": "2"}]}
+        )
+
+        Lookup(fmc=fmc).resolve("host1", "host2")
+
+        (root,) = tracer.tree()
+        self.assertTrue(root["name"].endswith("Lookup.resolve"))
+        self.assertEqual(2, len(root["children"]))
+        get = root["children"][0]
+        self.assertEqual("APIClassTemplate.get", get["name"])
+        self.assertEqual("Hosts", get["attributes"]["object"])
+        (send,) = get["children"]
+        self.assertEqual("FMC.send_to_api", send["name"])
+        (http,) = send["children"]
+        self.assertEqual("HTTP GET", http["name"])
+        self.assertEqual(200, http["attributes"]["status"])
+        self.assertEqual(root["trace_id"], http["trace_id"])
+        self.assertEqual(7, len(json.loads(tracer.to_json(nested=False))))
+
+    def test_prefetched_pages_keep_their_parent(self):
+        items = [{"name": f"host{i}", "id": str(i)} for i in range(25)]
+        pages = paged_responses(items, limit=10)
+        tracer = fmcapi.Tracer()
+        fmc = connected_fmc(tracer=tracer, paging_workers=3)
+        fmc.requests_session.get.side_effect = lambda url, **kwargs: pages[
+            (
+                0
+                if "offset" not in url
+                else int(parse_qs(urlsplit(url).query)["offset"][0]) // 10
+            )
+        ]
+
+        fmc.send_to_api(method="get", url="https://fmc/object/hosts")
+
+        (send,) = tracer.tree()
+        self.assertEqual(3, len(send["children"]))
+        self.assertEqual(25, send["attributes"]["items"])
+
+    def test_errors_are_recorded(self):
+        tracer = fmcapi.Tracer()
+        fmc = connected_fmc(tracer=tracer)
+        fmc.requests_session.get.return_value = mock_response(
+            {"error": "nope"}, status_code=404
+        )
+        fmc.requests_session.get.return_value.raise_for_status.side_effect = (
+            requests.exceptions.HTTPError("404")
+        )
+
+        with self.assertRaises(Exception):
+            fmc.send_to_api(method="get", url="https://fmc/object/hosts/1")
+
+        (send,) = tracer.tree()
+        self.assertIn("Error in POST operation", send["error"])
+        self.assertEqual(404, send["children"][0]["attributes"]["status"])
+
+    def test_no_tracer_no_spans(self):
+        fmc = connected_fmc()
+        fmc.requests_session.get.return_value = mock_response({"items": []})
+        self.assertEqual({"items": []}, api_objects.Hosts(fmc=fmc).get())
+
+    def test_mock_fmc_is_not_traced(self):
+        fmc = mock.Mock()
+        fmc.serverVersion = "9" * 10
+        fmc.send_to_api.return_value = {"items": []}
+        self.assertEqual({"items": []}, api_objects.Hosts(fmc=fmc).get())
+
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "fmc.jsonl.gz")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def record(self):
+        fmc = connected_fmc(cassette=self.path, mock_session=False)
+        fmc.requests_session.session = mock.Mock()
+        token_response = mock_response({})
+        token_response.headers = {"X-auth-access-token": "secret", "DOMAINS": "[]"}
+        fmc.requests_session.session.post.side_effect = [
+            token_response,
+            mock_response({"name": "host1", "id": "1"}, status_code=201),
+        ]
+        fmc.requests_session.session.get.side_effect = paged_responses(
+            [{"name": f"host{i}", "id": str(i)} for i in range(15)], limit=10
+        )
+        fmc.requests_session.post("https://fmc/auth/generatetoken")
+        fmc.send_to_api(
+            method="post", url="https://fmc/object/hosts", json_data={"name": "host1"}
+        )
+        listing = fmc.send_to_api(method="get", url="https://fmc/object/hosts")
+        fmc.requests_session.close()
+        return listing
+
+    def test_lowercase_token_headers_are_redacted(self):
+        session = mock.Mock()
+        response = mock_response({})
+        response.headers = {
+            "x-auth-access-token": "secret",
+            "x-auth-refresh-token": "secret",
+            "content-length": "2",
+        }
+        session.post.return_value = response
+        recorder = fmcapi.cassette.RecordingSession(session, self.path)
+        recorder.post("https://fmc/auth/generatetoken")
+        recorder.close()
+
+        with gzip.open(self.path, "rt") as cassette:
+            entry = json.loads(cassette.readline())
+        self.assertEqual(
+            {"x-auth-access-token": "REDACTED", "x-auth-refresh-token": "REDACTED"},
+            entry["headers"],
+        )
+
+    def test_replay_answers_like_the_fmc(self):
+        listing = self.record()
+
+        fmc = connected_fmc(
+            cassette=self.path, cassette_mode="replay", mock_session=False
+        )
+        token = fmc.requests_session.post("https://fmc/auth/generatetoken")
+        self.assertEqual("REDACTED", token.headers["x-auth-access-token"])
+        self.assertEqual(
+            {"name": "host1", "id": "1"},
+            fmc.send_to_api(
+                method="post",
+                url="https://fmc/object/hosts",
+                json_data={"name": "host1"},
+            ),
+        )
+        self.assertEqual(
+            listing, fmc.send_to_api(method="get", url="https://fmc/object/hosts")
+        )
+        self.assertEqual(
+            listing, fmc.send_to_api(method="get", url="https://fmc/object/hosts")
+        )
+
+    def test_unrecorded_request_raises(self):
+        self.record()
+
+        fmc = connected_fmc(
+            cassette=self.path, cassette_mode="replay", mock_session=False
+        )
+        with self.assertRaises(fmcapi.CassetteError):
+            fmc.send_to_api(
+                method="post",
+                url="https://fmc/object/hosts",
+                json_data={"name": "host2"},
+            )
+
+    def test_recorded_latency_can_be_replayed(self):
+        self.record()
+        session = fmcapi.cassette.ReplaySession(self.path, latency=1)
+        for entry in session.entries.values():
+            entry[0]["elapsed"] = 0.1
+
+        start = time.monotonic()
+        session.get("https://fmc/object/hosts")
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+
+
+class TestFMCEmulator(unittest.TestCase):
+    def setUp(self):
+        self.emulator = fmcapi.FMCEmulator(domains=["Child"]).start()
+        self.addCleanup(self.emulator.stop)
+
+    def fmc(self, **kwargs):
+        kwargs.setdefault("rate_limit", None)
+        return fmcapi.FMC(host=self.emulator.url, autodeploy=False, **kwargs)
+
+    def test_object_crud_and_paging(self):
+        with self.fmc(limit=10) as fmc:
+            for i in range(25):
+                api_objects.Hosts(fmc=fmc, name=f"host{i}", value=f"10.0.0.{i}").post()
+            self.assertEqual(25, len(api_objects.Hosts(fmc=fmc).get()["items"]))
+            host = api_objects.Hosts(fmc=fmc, name="host3")
+            host.get()
+            host.value = "10.9.9.9"
+            host.put()
+            self.assertEqual(
+                "10.9.9.9", api_objects.Hosts(fmc=fmc, id=host.id).get()["value"]
+            )
+            api_objects.Hosts(fmc=fmc, id=host.id).delete()
+            self.assertEqual(24, len(api_objects.Hosts(fmc=fmc).get()["items"]))
+            self.assertEqual("7.0.0", fmc.serverVersion)
+
+    def test_domains_and_bulk_accessrules(self):
+        with self.fmc(domain="Child") as fmc:
+            self.assertEqual(self.emulator.domains[1]["uuid"], fmc.uuid)
+            api_objects.AccessPolicies(fmc=fmc, name="acp1").post()
+            rules = api_objects.AccessRules(fmc=fmc, acp_name="acp1")
+            response = fmc.send_to_api(
+                method="post",
+                url=f"{rules.URL}?bulk=true",
+                json_data=[{"name": f"rule{i}", "action": "ALLOW"} for i in range(3)],
+            )
+            self.assertEqual(3, len(response["items"]))
+            self.assertEqual(3, len(rules.get()["items"]))
+
+    def test_throttling_and_token_refresh(self):
+        self.emulator.rate_limit = 2
+        with self.fmc(check_server_version=False) as fmc:
+            url = f"{fmc.configuration_url}/object/hosts"
+            for status in (200, 200, 429):
+                response = fmc.requests_session.get(
+                    url, headers={"X-auth-access-token": fmc.mytoken.get_token()}
+                )
+                self.assertEqual(status, response.status_code)
+
+            self.emulator.rate_limit = None
+            old_token = fmc.mytoken.get_token()
+            self.emulator.tokens[old_token]["expires"] = 0
+            fmc.send_to_api(method="get", url=url)
+            self.assertNotEqual(old_token, fmc.mytoken.get_token())
+        self.assertEqual(
+            {"throttled": 1, "unauthorized": 1},
+            {key: self.emulator.stats()[key] for key in ("throttled", "unauthorized")},
+        )
+
+    def test_bad_credentials(self):
+        with self.assertRaises(fmcapi.fmc.AuthenticationError):
+            self.fmc(password="wrong").__enter__()
+
+
+class TestRequestLog(unittest.TestCase):
+    def test_record_is_redacted_and_truncated(self):
+        fmc = connected_fmc(request_log=fmcapi.RequestLogger(max_payload=40))
+        fmc.requests_session.post.return_value = mock_response(
+            {"name": "vpn1", "sharedKey": "hunter2", "description": "x" * 100}
+        )
+
+        with self.assertLogs("fmcapi.requests", level="DEBUG") as logs:
+            fmc.send_to_api(
+                method="post",
+                url="https://fmc/object/vpns",
+                json_data={"name": "vpn1", "sharedKey": "hunter2"},
+            )
+
+        (line,) = logs.records
+        record = json.loads(line.getMessage())
+        self.assertEqual(record, line.fmcapi_request)
+        self.assertEqual("POST", record["method"])
+        self.assertEqual(200, record["status"])
+        self.assertEqual(1, record["attempts"])
+        self.assertEqual("REDACTED", record["request_headers"]["X-auth-access-token"])
+        self.assertNotIn("hunter2", line.getMessage())
+        self.assertTrue(record["response_payload"].endswith("more characters)"))
+
+    def test_request_bytes_are_bytes_sent(self):
+        emulator = fmcapi.FMCEmulator().start()
+        self.addCleanup(emulator.stop)
+        fmc = fmcapi.FMC(
+            host=emulator.url,
+            autodeploy=False,
+            rate_limit=None,
+            check_server_version=False,
+            request_log=fmcapi.RequestLogger(),
+        ).__enter__()
+        self.addCleanup(fmc.__exit__, None, None, None)
+        payload = {"name": "hôte-é", "value": "10.1.1.1", "sharedKey": "hunter2"}
+
+        with self.assertLogs("fmcapi.requests", level="DEBUG") as logs:
+            fmc.send_to_api(
+                method="post",
+                url=f"{fmc.configuration_url}/object/hosts",
+                json_data=payload,
+            )
+
+        (record,) = [r.fmcapi_request for r in logs.records]
+        self.assertEqual(
+            len(json.dumps(payload, ensure_ascii=True).encode("utf-8")),
+            record["request_bytes"],
+        )
+        self.assertEqual(
+            len(json.dumps(payload, ensure_ascii=False).encode("utf-8")),
+            fmcapi.RequestLogger.request_bytes(
+                None,
+                mock.Mock(
+                    request=mock.Mock(body=json.dumps(payload, ensure_ascii=False))
+                ),
+            ),
+        )
+
+    def test_nothing_is_built_when_disabled(self):
+        fmc = connected_fmc()
+        fmc.requests_session.get.return_value = mock_response({"name": "host1"})
+        logging.getLogger("fmcapi.requests").setLevel(logging.INFO)
+        self.addCleanup(logging.getLogger("fmcapi.requests").setLevel, logging.NOTSET)
+
+        with mock.patch.object(fmc.request_log, "log") as log:
+            fmc.send_to_api(method="get", url="https://fmc/object/hosts/1")
+        log.assert_not_called()
+
+    def test_sampling_keeps_failures(self):
+        fmc = connected_fmc(request_log=fmcapi.RequestLogger(sample_rate=0))
+        not_found = mock_response({"error": "nope"}, status_code=404)
+        not_found.raise_for_status.side_effect = requests.exceptions.HTTPError("404")
+        fmc.requests_session.get.side_effect = [
+            mock_response({"name": "host1"}),
+            not_found,
+        ]
+
+        with self.assertLogs("fmcapi.requests", level="DEBUG") as logs:
+            fmc.send_to_api(method="get", url="https://fmc/object/hosts/1")
+            with self.assertRaises(Exception):
+                fmc.send_to_api(method="get", url="https://fmc/object/hosts/2")
+
+        self.assertEqual([404], [r.fmcapi_request["status"] for r in logs.records])
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.emulator = fmcapi.FMCEmulator().start()
+        self.addCleanup(self.emulator.stop)
+        self.fmc = fmcapi.FMC(
+            host=self.emulator.url,
+            autodeploy=False,
+            rate_limit=None,
+            check_server_version=False,
+            response_cache=True,
+        ).__enter__()
+
+    def requests_sent(self, func):
+        before = self.emulator.stats()["requests"]
+        func()
+        return self.emulator.stats()["requests"] - before
+
+    def test_repeated_gets_are_served_from_cache(self):
+        self.emulator.seed("object/hosts", hosts_data(3))
+        self.assertEqual(1, self.requests_sent(api_objects.Hosts(fmc=self.fmc).get))
+        response = {}
+        self.assertEqual(
+            0,
+            self.requests_sent(
+                lambda: response.update(api_objects.Hosts(fmc=self.fmc).get())
+            ),
+        )
+        self.assertEqual(3, len(response["items"]))
+        response["items"].clear()
+        self.assertEqual(3, len(api_objects.Hosts(fmc=self.fmc).get()["items"]))
+
+    def test_writes_invalidate_their_collection(self):
+        self.emulator.seed("object/hosts", hosts_data(3))
+        self.emulator.seed("object/securityzones", [{"name": "inside"}])
+        api_objects.Hosts(fmc=self.fmc).get()
+        api_objects.SecurityZones(fmc=self.fmc).get()
+        api_objects.NetworkAddresses(fmc=self.fmc).get()
+
+        api_objects.Hosts(fmc=self.fmc, name="new", value="10.1.1.1").post()
+
+        self.assertEqual(4, len(api_objects.Hosts(fmc=self.fmc).get()["items"]))
+        self.assertEqual(
+            4, len(api_objects.NetworkAddresses(fmc=self.fmc).get()["items"])
+        )
+        self.assertEqual(
+            0, self.requests_sent(api_objects.SecurityZones(fmc=self.fmc).get)
+        )
+        host = api_objects.Hosts(fmc=self.fmc, name="new")
+        host.get()
+        host.delete()
+        self.assertEqual(3, len(api_objects.Hosts(fmc=self.fmc).get()["items"]))
+
+    def test_async_writes_invalidate_their_collection(self):
+        self.emulator.seed("object/hosts", hosts_data(3))
+        url = f"{self.fmc.configuration_url}/object/hosts"
+        fmc = connected_fmc(
+            fmc_class=fmcapi.AsyncFMC,
+            mock_session=False,
+            host=self.emulator.url,
+            response_cache=True,
+        )
+        fmc.requests_session = self.fmc.requests_session
+        fmc.mytoken = self.fmc.mytoken
+        fmc.uuid = self.fmc.uuid
+        fmc.build_urls()
+
+        fmc.send_to_api(method="get", url=url)
+
+        async def run():
+            async with fmc:
+                await fmc.asend_to_api(
+                    method="post",
+                    url=url,
+                    json_data={"name": "new", "value": "10.1.1.1"},
+                )
+
+        with mock.patch.object(fmcapi.FMC, "__enter__", return_value=fmc):
+            asyncio.run(run())
+        self.assertEqual(1, fmc.response_cache.stats()["invalidations"])
+        self.assertEqual(4, len(fmc.send_to_api(method="get", url=url)["items"]))
+
+    def test_ttl_and_lru(self):
+        cache = fmcapi.ResponseCache(ttl=60, max_entries=2)
+        for name in ("a", "b", "c"):
+            cache.put(f"https://fmc/object/{name}", {"name": name}, cache.generation)
+        self.assertIsNone(cache.get("https://fmc/object/a"))
+        self.assertEqual({"name": "b"}, cache.get("https://FMC/object/b/"))
+        cache.ttl = -1
+        cache.put("https://fmc/object/d?b=2&a=1", {}, cache.generation)
+        self.assertIsNone(cache.get("https://fmc/object/d?a=1&b=2"))
+        stale = cache.generation
+        cache.invalidate("put", "https://fmc/object/x/1")
+        cache.put("https://fmc/object/e", {}, stale)
+        self.assertIsNone(cache.get("https://fmc/object/e"))
+
+
+class TestNameResolver(unittest.TestCase):
+    def setUp(self):
+        self.emulator = fmcapi.FMCEmulator().start()
+        self.addCleanup(self.emulator.stop)
+        self.fmc = fmcapi.FMC(
+            host=self.emulator.url,
+            autodeploy=False,
+            rate_limit=None,
+            check_server_version=False,
+            name_resolver=True,
+        ).__enter__()
+
+    def requests_sent(self, func):
+        before = self.emulator.stats()["requests"]
+        func()
+        return self.emulator.stats()["requests"] - before
+
+    def test_helpers_load_each_collection_once(self):
+        self.emulator.seed(
+            "object/securityzones", [{"name": "inside"}, {"name": "outside"}]
+        )
+        api_objects.AccessPolicies(fmc=self.fmc, name="acp1").post()
+
+        def build_rules():
+            for i in range(20):
+                rule = api_objects.AccessRules(
+                    fmc=self.fmc, acp_name="acp1", name=f"rule{i}"
+                )
+                rule.source_zone("add", "inside")
+                rule.destination_zone("add", "outside")
+                self.assertEqual("outside", rule.destinationZones["objects"][0]["name"])
+
+        self.assertEqual(2, self.requests_sent(build_rules))
+        self.assertEqual(2, self.fmc.name_resolver.stats()["loads"])
+
+    def test_writes_invalidate_their_collection(self):
+        self.emulator.seed("object/hosts", hosts_data(3))
+        host = api_objects.Hosts(fmc=self.fmc)
+        host.get(name="new")
+        self.assertNotIn("id", host.__dict__)
+
+        api_objects.Hosts(fmc=self.fmc, name="new", value="10.1.1.1").post()
+
+        host = api_objects.Hosts(fmc=self.fmc)
+        host.get(name="new")
+        self.assertEqual("10.1.1.1", host.value)
+        self.assertEqual(
+            0,
+            self.requests_sent(lambda: api_objects.Hosts(fmc=self.fmc).get(name="new")),
+        )
+
+    def test_mock_fmc_is_not_resolved(self):
+        fmc = mock.MagicMock()
+        fmc.serverVersion = "9" * 10
+        fmc.send_to_api.return_value = {"items": [{"name": "h1", "id": "1"}]}
+        host = api_objects.Hosts(fmc=fmc, name="h1")
+        self.assertEqual({"name": "h1", "id": "1"}, host.get())
+        self.assertEqual("1", host.id)
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_identical_gets_are_sent_once(self):
+        fmc = connected_fmc()
+        release = threading.Event()
+
+        def slow_get(url, **kwargs):
+            release.wait(5)
+            return mock_response({"items": [{"name": "host1"}]})
+
+        fmc.requests_session.get.side_effect = slow_get
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    fmc.send_to_api(method="get", url="https://fmc/object/hosts")
+                )
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, fmc.requests_session.get.call_count)
+        self.assertEqual([{"items": [{"name": "host1"}]}] * 8, results)
+        self.assertEqual(8, len({id(result) for result in results}))
+        self.assertEqual(7, fmc.single_flight.stats()["coalesced"])
+
+    def test_concurrent_identical_async_gets_are_sent_once(self):
+        fmc = connected_fmc(
+            fmc_class=fmcapi.AsyncFMC, max_workers=8, response_cache=True
+        )
+
+        def slow_get(url, **kwargs):
+            time.sleep(0.2)
+            return mock_response({"items": [{"name": "host1"}]})
+
+        fmc.requests_session.get.side_effect = slow_get
+
+        async def run():
+            async with fmc:
+                results = await asyncio.gather(
+                    *[
+                        fmc.asend_to_api(method="get", url="https://fmc/object/hosts")
+                        for _ in range(8)
+                    ]
+                )
+                results.append(
+                    await fmc.asend_to_api(method="get", url="https://fmc/object/hosts")
+                )
+                return results
+
+        with mock.patch.object(fmcapi.FMC, "__enter__", return_value=fmc):
+            results = asyncio.run(run())
+
+        self.assertEqual(1, fmc.requests_session.get.call_count)
+        self.assertEqual([{"items": [{"name": "host1"}]}] * 9, results)
+        self.assertEqual(7, fmc.single_flight.stats()["coalesced"])
+        self.assertEqual(1, fmc.response_cache.stats()["hits"])
+
+    def test_errors_are_shared(self):
+        flight = fmcapi.singleflight.SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def fail():
+            started.set()
+            release.wait(5)
+            raise ValueError("boom")
+
+        def call(func):
+            try:
+                flight.do("key", func)
+            except ValueError as err:
+                errors.append(err)
+
+        leader = threading.Thread(target=call, args=(fail,))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=call, args=(lambda: "not called",))
+        follower.start()
+        time.sleep(0.1)
+        release.set()
+        leader.join()
+        follower.join()
+        self.assertEqual(2, len(errors))
+
+    def test_coalescing_can_be_turned_off(self):
+        fmc = connected_fmc(coalesce_gets=False)
+        fmc.requests_session.get.return_value = mock_response({"name": "host1"})
+        fmc.send_to_api(method="get", url="https://fmc/object/hosts/1")
+        self.assertIsNone(fmc.single_flight)
+
+
+class TestCompression(unittest.TestCase):
+    def listing(self, accept_encoding):
+        with fmcapi.FMCEmulator() as emulator:
+            emulator.seed("object/hosts", hosts_data(200))
+            with fmcapi.FMC(
+                host=emulator.url,
+                autodeploy=False,
+                check_server_version=False,
+                rate_limit=None,
+                accept_encoding=accept_encoding,
+            ) as fmc:
+                fmc.metrics.reset()
+                items = api_objects.Hosts(fmc=fmc).get()["items"]
+                totals = fmc.metrics.snapshot()["totals"]
+        return items, totals
+
+    def test_compressed_listing_is_decoded(self):
+        plain, plain_totals = self.listing(None)
+        compressed, compressed_totals = self.listing("gzip, deflate")
+        self.assertEqual(
+            [item["name"] for item in plain], [item["name"] for item in compressed]
+        )
+        self.assertEqual(plain_totals["wire_bytes"], plain_totals["response_bytes"])
+        self.assertLess(
+            compressed_totals["wire_bytes"], compressed_totals["response_bytes"] / 3
+        )
+
+    def test_recording_keeps_wire_bytes(self):
+        with tempfile.TemporaryDirectory() as tmpdir, fmcapi.FMCEmulator() as emulator:
+            emulator.seed("object/hosts", hosts_data(200))
+            with fmcapi.FMC(
+                host=emulator.url,
+                autodeploy=False,
+                check_server_version=False,
+                rate_limit=None,
+                cassette=os.path.join(tmpdir, "fmc.jsonl.gz"),
+            ) as fmc:
+                fmc.metrics.reset()
+                api_objects.Hosts(fmc=fmc).get()
+                totals = fmc.metrics.snapshot()["totals"]
+        self.assertLess(totals["wire_bytes"], totals["response_bytes"] / 3)
+
+
+class H2Server(object):
+    """Plain-text HTTP/2 server (prior knowledge, no HTTP/1.1) answering every request with its path as JSON."""
+
+    def __init__(self):
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.url = f"http://127.0.0.1:{self.sock.getsockname()[1]}"
+        self.connections = 0
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+    def handle(self, conn):
+        h2conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        )
+        h2conn.initiate_connection()
+        conn.sendall(h2conn.data_to_send())
+        paths = {}
+        with conn:
+            while True:
+                data = conn.recv(65535)
+                if not data:
+                    return
+                for event in h2conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        paths[event.stream_id] = dict(event.headers)[":path"]
+                    elif isinstance(event, h2.events.StreamEnded):
+                        body = json.dumps({"path": paths.pop(event.stream_id)}).encode()
+                        h2conn.send_headers(
+                            event.stream_id,
+                            [
+                                (":status", "200"),
+                                ("content-type", "application/json"),
+                                ("content-length", str(len(body))),
+                            ],
+                        )
+                        h2conn.send_data(event.stream_id, body, end_stream=True)
+                conn.sendall(h2conn.data_to_send())
+
+    def close(self):
+        self.sock.close()
+
+
+class TestHTTP2Transport(unittest.TestCase):
+    def test_listing_over_httpx(self):
+        # The emulator only speaks HTTP/1.1, so httpx falls back to it after negotiation.
+        with fmcapi.FMCEmulator() as emulator:
+            emulator.seed("object/hosts", hosts_data(50))
+            with fmcapi.FMC(
+                host=emulator.url,
+                autodeploy=False,
+                check_server_version=False,
+                rate_limit=None,
+                http2=True,
+            ) as fmc:
+                fmc.metrics.reset()
+                items = api_objects.Hosts(fmc=fmc).get()["items"]
+                totals = fmc.metrics.snapshot()["totals"]
+                stats = fmc.pool_stats()
+        self.assertEqual(len(items), 50)
+        self.assertLess(totals["wire_bytes"], totals["response_bytes"])
+        self.assertGreater(stats["HTTP/1.1"], 0)
+
+    @unittest.skipUnless(h2, "needs the h2 package")
+    def test_requests_are_multiplexed_over_http2(self):
+        server = H2Server()
+        self.addCleanup(server.close)
+        session = fmcapi.http2.HTTP2Session(http1=False)
+        self.addCleanup(session.close)
+        responses = {}
+
+        def get(n):
+            responses[n] = session.get(f"{server.url}/{n}", timeout=(5, 5))
+
+        threads = [threading.Thread(target=get, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual({"HTTP/2": 8}, session.stats())
+        self.assertEqual(1, server.connections)
+        for n, response in responses.items():
+            self.assertEqual({"path": f"/{n}"}, response.json())
+            self.assertGreater(response.wire_bytes, 0)
+
+    def test_failed_enter_closes_the_client(self):
+        with fmcapi.FMCEmulator() as emulator:
+            fmc = fmcapi.FMC(
+                host=emulator.url, autodeploy=False, rate_limit=None, http2=True
+            )
+            with mock.patch.object(
+                api_objects.ServerVersion, "get", side_effect=RuntimeError("down")
+            ):
+                with self.assertRaises(RuntimeError):
+                    fmc.__enter__()
+        self.assertIsNone(fmc.http2_session.client)
+
+    def test_transport_errors_become_requests_errors(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        session = fmcapi.http2.HTTP2Session()
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            session.get(f"http://127.0.0.1:{port}/", timeout=(1, 1))
+        session.close()
+
+
+class TestBulkChunking(unittest.TestCase):
+    def test_chunks_fit_by_encoded_size(self):
+        items = [{"name": f"rule{i}", "description": "x" * 100} for i in range(50)]
+        max_bytes = 1000
+        chunks = list(
+            api_objects.helper_functions.chunk_payload(items, max_bytes, max_items=100)
+        )
+
+        self.assertEqual(items, [item for chunk in chunks for item in chunk])
+        for chunk in chunks:
+            self.assertLessEqual(len(json.dumps(chunk).encode()), max_bytes)
+        for chunk, following in zip(chunks, chunks[1:]):
+            self.assertGreater(
+                len(json.dumps(chunk + following[:1]).encode()), max_bytes
+            )
+        self.assertEqual(
+            [3, 1],
+            [
+                len(chunk)
+                for chunk in api_objects.helper_functions.chunk_payload(
+                    ["é", "b", "c", "d"], 1000, max_items=3
+                )
+            ],
+        )
+
+    def test_bulk_post_sends_every_chunk(self):
+        fmc = connected_fmc()
+        fmc.requests_session.post.side_effect = (
+            lambda url, json, **kwargs: mock_response({"items": json}, status_code=201)
+        )
+        bulk = api_objects.Bulk(
+            fmc=fmc,
+            url=f"{fmc.configuration_url}/policy/accesspolicies/acp/accessrules",
+        )
+        bulk.MAX_SIZE_QTY = 4
+        for i in range(10):
+            bulk.add({"name": f"rule{i}"})
+
+        response = bulk.post()
+
+        self.assertEqual(bulk.items, response["items"])
+        self.assertEqual(3, fmc.requests_session.post.call_count)
+        url = fmc.requests_session.post.call_args[0][0]
+        self.assertTrue(url.endswith("/accessrules?bulk=true"))
+
+    def test_positioned_bulk_post_keeps_chunk_order(self):
+        fmc = connected_fmc()
+        fmc.requests_session.post.side_effect = (
+            lambda url, json, **kwargs: mock_response({"items": json}, status_code=201)
+        )
+        bulk = api_objects.Bulk(
+            fmc=fmc,
+            url=f"{fmc.configuration_url}/policy/accesspolicies/acp/accessrules",
+            insertBefore=5,
+        )
+        bulk.MAX_SIZE_QTY = 4
+        for i in range(10):
+            bulk.add({"name": f"rule{i}"})
+
+        bulk.post()
+
+        positions = [
+            parse_qs(urlsplit(call[0][0]).query)["insertBefore"]
+            for call in fmc.requests_session.post.call_args_list
+        ]
+        self.assertEqual([["5"], ["9"], ["13"]], positions)